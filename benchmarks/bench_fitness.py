@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+Benchmark of fitness recomputation of Herbivore objects, one at a time with
+fitness_calculation against Animals.update_fitness, which gathers their ages and weights
+for Animals.batch_fitness from batch_threshold animals on. The batch path is timed on its
+own too, to show where the threshold should be. The sizes go from a single cell to 10**6
+animals.
+
+Run from the repository root:
+
+    python benchmarks/bench_fitness.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biosim.animals import Animals, Herbivore  # noqa: E402
+
+SIZES = (1, 3, 5, 10, 20, 50, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6)
+
+
+def time_per_animal(func, num_animals, repeats=5):
+    """
+    Best of repeats, in nanoseconds per animal. Every repeat calls func for about 1000
+    animals in total.
+    """
+
+    calls = max(1, 1000 // num_animals)
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / calls / num_animals * 1e9
+
+
+def main():
+    rng = np.random.default_rng(1)
+    print(f"threshold: {Animals.batch_threshold} animals")
+    print(f"{'animals':>8} {'one by one [ns]':>16} {'update [ns]':>12} {'batch [ns]':>11}")
+
+    threshold = Animals.batch_threshold
+    for num_animals in SIZES:
+        herbs = [Herbivore(int(age), float(weight))
+                 for age, weight in zip(rng.integers(0, 50, num_animals),
+                                        rng.normal(20, 8, num_animals))]
+
+        def one_by_one():
+            for herb in herbs:
+                herb.fitness_calculation()
+
+        def update():
+            Animals.update_fitness(herbs)
+
+        one = time_per_animal(one_by_one, num_animals)
+        updated = time_per_animal(update, num_animals)
+        Animals.batch_threshold = 0
+        batch = time_per_animal(update, num_animals)
+        Animals.batch_threshold = threshold
+        print(f"{num_animals:>8} {one:>16.1f} {updated:>12.1f} {batch:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+Benchmark of the time it takes to draw one frame of the visualization over a long run.
+Only the drawing is timed, the simulation of each year is not.
+
+Run from the repository root:
+
+    python benchmarks/bench_frames.py
+    python benchmarks/bench_frames.py --years 1000 --max-ratio 1.5
+
+The frame times are reported in blocks of 100 years. With --max-ratio the script exits with
+an error if the last block is slower than the first block by more than the ratio.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biosim.simulation import BioSim  # noqa: E402
+
+GEOGRAPHY = """\
+WWWWWWWWWWWWWWWWWWWWW
+WWWWWWWWHWWWWLLLLLLLW
+WHHHHHLLLLWWLLLLLLLWW
+WHHHHHHHHHWWLLLLLLWWW
+WHHHHHLLLLLLLLLLLLWWW
+WHHHHHLLLDDLLLHLLLWWW
+WHHLLLLLDDDLLLHHHHWWW
+WWHHHHLLLDDLLLHWWWWWW
+WHHHLLLLLDDLLLLLLLWWW
+WHHHHLLLLDDLLLLWWWWWW
+WWHHHHLLLLLLLLWWWWWWW
+WWWHHHHLLLLLLLWWWWWWW
+WWWWWWWWWWWWWWWWWWWWW"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=1000)
+    parser.add_argument('--block', type=int, default=100)
+    parser.add_argument('--max-ratio', type=float, default=None)
+    args = parser.parse_args()
+
+    ini_pop = [{'loc': (10, 10),
+                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(150)] +
+                       [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(40)]}]
+    sim = BioSim(GEOGRAPHY, ini_pop, seed=1, backend='array')
+    sim.setup_graphics()
+    vis = sim.visualization
+
+    frame_times = []
+    for _ in range(args.years):
+        sim.simulate(1, vis_years=None)
+        start = time.perf_counter()
+        vis.update_graphics(1, sim.create_population_heatmap(), sim.num_animals_per_species)
+        vis.update_histograms(sim._statistics.collect(sim.island), sim._statistics.edges)
+        vis.draw_frame()
+        frame_times.append(time.perf_counter() - start)
+
+    print(f"{'years':>12} {'mean frame [ms]':>16} {'max frame [ms]':>15}")
+    blocks = [frame_times[start:start + args.block]
+              for start in range(0, len(frame_times), args.block)]
+    for num, block in enumerate(blocks):
+        first = num * args.block
+        print(f"{first:>5}-{first + len(block) - 1:<6} {1e3 * sum(block) / len(block):>16.2f} "
+              f"{1e3 * max(block):>15.2f}")
+
+    ratio = (sum(blocks[-1]) / len(blocks[-1])) / (sum(blocks[0]) / len(blocks[0]))
+    print(f"last block / first block: {ratio:.2f}")
+    if args.max_ratio is not None and ratio > args.max_ratio:
+        sys.exit(f"Frame time grew by {ratio:.2f}x, more than {args.max_ratio}x")
+
+
+if __name__ == '__main__':
+    main()
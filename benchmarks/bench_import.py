@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+Benchmark of the import time of biosim.simulation, with and without graphics.
+Every measurement runs in a fresh interpreter, so nothing is cached between them.
+
+Run from the repository root:
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --max-ms 250
+
+With --max-ms the script exits with an error if the headless import is slower than the
+limit, or if it loads one of the modules in LAZY_MODULES.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CASES = {
+    'headless': "import biosim.simulation",
+    'graphics': "import biosim.simulation, biosim.visualization",
+}
+
+LAZY_MODULES = ('pandas', 'matplotlib', 'subprocess')
+
+TIMER = """
+import time, sys
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+print(','.join(name for name in {lazy!r} if name in sys.modules) or '-')
+"""
+
+
+def import_time(statement, repeats=7):
+    """
+    Median import time in seconds over repeats fresh interpreters.
+
+    Returns
+    -------
+    seconds : float
+    loaded : list
+        The modules of LAZY_MODULES that were imported.
+    """
+
+    times = []
+    loaded = []
+    for _ in range(repeats):
+        out = subprocess.check_output([sys.executable, '-c',
+                                       TIMER.format(statement=statement, lazy=LAZY_MODULES)],
+                                      cwd=ROOT, env=dict(os.environ, MPLBACKEND='Agg'))
+        seconds, modules = out.decode().split()
+        times.append(float(seconds))
+        loaded = [] if modules == '-' else modules.split(',')
+    return statistics.median(times), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='fail if the headless import takes longer than this')
+    args = parser.parse_args()
+
+    print(f"{'case':>10} {'import [ms]':>12}  loaded heavy modules")
+    results = {}
+    for name, statement in CASES.items():
+        seconds, loaded = import_time(statement)
+        results[name] = seconds, loaded
+        print(f"{name:>10} {seconds * 1e3:>12.1f}  {', '.join(loaded) or '-'}")
+
+    if args.max_ms is not None:
+        seconds, loaded = results['headless']
+        if loaded:
+            sys.exit(f"Headless import loads {', '.join(loaded)}")
+        if seconds * 1e3 > args.max_ms:
+            sys.exit(f"Headless import took {seconds * 1e3:.1f} ms, limit is {args.max_ms} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+Benchmark of the memory of the animal objects of the object backend.
+
+Reports the bytes per animal of the slotted Herbivore next to an equivalent animal with a
+__dict__, as the animals were before. Then simulates a herbivore boom on the check_sim map
+with and without the pool of dead animals, and reports per year the births, the animal
+objects that were allocated and the generation 0 collections of the garbage collector,
+with the peak memory traced by tracemalloc.
+
+Run from the repository root:
+
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --years 80 --animals 200000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biosim.animals import Herbivore  # noqa: E402
+from biosim.metrics import SimulationMetrics  # noqa: E402
+from biosim.simulation import BioSim  # noqa: E402
+
+from bench_phases import ROSSUMOYA, animals  # noqa: E402
+
+
+class DictHerbivore:
+    """
+    Herbivore with the same attributes in a __dict__, as the animals were before they
+    got __slots__.
+    """
+
+    def __init__(self, age, weight):
+        self.age = age
+        self.weight = weight
+        self.alive = True
+        self.has_migrated = False
+        self.eaten = 0
+        self.phi = 0.5
+
+
+def bytes_per_animal(make_animal, num_animals):
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    population = [make_animal(5, 20.0 + index % 7) for index in range(num_animals)]
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del population
+    return size / num_animals
+
+
+def run_boom(years, pool):
+    """
+    Simulates herbivores without carnivores on the check_sim map.
+
+    Returns
+    -------
+    result : dict
+    """
+
+    ini_pop = [{'loc': (10, 10), 'pop': animals('Herbivore', 200)}]
+    metrics = SimulationMetrics()
+    sim = BioSim(ROSSUMOYA, ini_pop, seed=1, metrics=metrics)
+    species = sim.species['Herbivore']
+    if not pool:
+        species.pool_size = 0
+
+    allocated = [0]
+
+    def counting_new(cls):
+        allocated[0] += 1
+        return object.__new__(cls)
+
+    species.__new__ = counting_new
+
+    gc.collect()
+    collections = gc.get_stats()[0]['collections']
+    tracemalloc.start()
+    sim.simulate(years, vis_years=None)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    collections = gc.get_stats()[0]['collections'] - collections
+
+    return {'births_per_year': metrics.births['Herbivore'] / years,
+            'allocated_per_year': allocated[0] / years,
+            'gc_collections_per_year': collections / years,
+            'peak_memory_mb': peak / 2 ** 20,
+            'animals_end': sim.num_animals}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=60)
+    parser.add_argument('--animals', type=int, default=100000)
+    args = parser.parse_args()
+
+    for name, species in (('__dict__', DictHerbivore), ('__slots__', Herbivore)):
+        print(f"{'bytes per animal, ' + name:<30} "
+              f"{bytes_per_animal(species, args.animals):>8.1f}")
+    print()
+
+    print(f"{'':<10} {'births/year':>12} {'allocated/year':>15} {'gc gen0/year':>13} "
+          f"{'peak [MB]':>10} {'animals':>8}")
+    for name, pool in (('no pool', False), ('pool', True)):
+        result = run_boom(args.years, pool)
+        print(f"{name:<10} {result['births_per_year']:>12.0f} "
+              f"{result['allocated_per_year']:>15.0f} {result['gc_collections_per_year']:>13.1f} "
+              f"{result['peak_memory_mb']:>10.1f} {result['animals_end']:>8}")
+
+
+if __name__ == '__main__':
+    main()
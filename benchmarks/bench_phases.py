@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+Benchmark of the phases of the yearly cycle of CreateIsland on standard scenarios with
+fixed seeds:
+
+    rossumoya   the check_sim map with herbivores and carnivores in one cell
+    crowded     one Lowland cell with many herbivores and fodder for all of them
+    random200   a 200x200 random island with herbivores spread over it
+    predators   the check_sim map with as many carnivores as herbivores
+
+For every scenario the wall time of each phase is reported, with the animals processed per
+second (animals present when the phase starts, summed over the years, divided by the time
+of the phase), and the peak memory traced by tracemalloc in a second, untimed run.
+
+Run headless from the repository root:
+
+    python benchmarks/bench_phases.py --output phases.json
+    python benchmarks/bench_phases.py --backend array --scenarios crowded predators
+    python benchmarks/bench_phases.py --compare phases.json
+
+With --compare the times are printed next to those of an earlier JSON file, e.g. one
+written on another commit.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biosim.simulation import BioSim  # noqa: E402
+
+PHASES = ('new_year_reset', 'feed_animal', 'procreation_animals', 'migration_animals',
+          'aging_animals', 'death_animals')
+
+ROSSUMOYA = """\
+WWWWWWWWWWWWWWWWWWWWW
+WWWWWWWWHWWWWLLLLLLLW
+WHHHHHLLLLWWLLLLLLLWW
+WHHHHHHHHHWWLLLLLLWWW
+WHHHHHLLLLLLLLLLLLWWW
+WHHHHHLLLDDLLLHLLLWWW
+WHHLLLLLDDDLLLHHHHWWW
+WWHHHHLLLDDLLLHWWWWWW
+WHHHLLLLLDDLLLLLLLWWW
+WHHHHLLLLDDLLLLWWWWWW
+WWHHHHLLLLLLLLWWWWWWW
+WWWHHHHLLLLLLLWWWWWWW
+WWWWWWWWWWWWWWWWWWWWW"""
+
+
+def animals(species, number, age=5, weight=20):
+    return [{'species': species, 'age': age, 'weight': weight} for _ in range(number)]
+
+
+def random_island(size, seed):
+    """
+    Island of size x size cells with Water along the edge and random landscapes inside.
+    """
+
+    rng = np.random.default_rng(seed)
+    letters = rng.choice(list('LHDW'), size=(size, size), p=[0.5, 0.25, 0.15, 0.1])
+    letters[0, :] = letters[-1, :] = letters[:, 0] = letters[:, -1] = 'W'
+    return '\n'.join(''.join(row) for row in letters)
+
+
+def scenarios():
+    """
+    Returns
+    -------
+    scenarios : dict
+        Key: name - Value: dict with island_map, ini_pop, years, seed and optionally
+        params, landscape letter - parameters.
+    """
+
+    random_map = random_island(200, seed=200)
+    random_rows = random_map.split('\n')
+    random_cells = [(row, col) for row in range(2, 200, 9) for col in range(2, 200, 9)
+                    if random_rows[row - 1][col - 1] in 'LH']
+
+    return {
+        'rossumoya': {'island_map': ROSSUMOYA, 'years': 100, 'seed': 1,
+                      'ini_pop': [{'loc': (10, 10),
+                                   'pop': animals('Herbivore', 150) +
+                                   animals('Carnivore', 40)}]},
+        'crowded': {'island_map': "WWW\nWLW\nWWW", 'years': 50, 'seed': 2,
+                    'params': {'L': {'f_max': 30000}},
+                    'ini_pop': [{'loc': (2, 2), 'pop': animals('Herbivore', 2000)}]},
+        'random200': {'island_map': random_map, 'years': 10, 'seed': 3,
+                      'ini_pop': [{'loc': loc, 'pop': animals('Herbivore', 20)}
+                                  for loc in random_cells]},
+        'predators': {'island_map': ROSSUMOYA, 'years': 50, 'seed': 4,
+                      'ini_pop': [{'loc': loc, 'pop': animals('Herbivore', 100) +
+                                   animals('Carnivore', 100)}
+                                  for loc in ((5, 8), (10, 10), (3, 15))]},
+    }
+
+
+def run_years(island, years, phase_times=None, phase_animals=None):
+    """
+    Simulates the years phase by phase, in the order of CreateIsland.simulate_one_year.
+    The time of every phase and the animals present when it starts are added up when
+    phase_times and phase_animals are given.
+    """
+
+    for _ in range(years):
+        for phase in PHASES:
+            if phase_times is None:
+                getattr(island, phase)()
+                continue
+            phase_animals[phase] += island.num_animals
+            start = time.perf_counter()
+            getattr(island, phase)()
+            phase_times[phase] += time.perf_counter() - start
+        island.year += 1
+
+
+def run_scenario(scenario, backend, rng, memory=True):
+    """
+    Times one scenario and, with memory, traces its peak memory in a second run.
+
+    Returns
+    -------
+    result : dict
+    """
+
+    def make_sim():
+        sim = BioSim(scenario['island_map'], scenario['ini_pop'], seed=scenario['seed'],
+                     backend=backend, rng=rng)
+        for letter, params in scenario.get('params', {}).items():
+            sim.set_landscape_parameters(letter, params)
+        return sim
+
+    sim = make_sim()
+    animals_start = sim.island.num_animals
+    phase_times = dict.fromkeys(PHASES, 0.0)
+    phase_animals = dict.fromkeys(PHASES, 0)
+    run_years(sim.island, scenario['years'], phase_times, phase_animals)
+
+    total = sum(phase_times.values())
+    result = {'years': scenario['years'],
+              'seed': scenario['seed'],
+              'cells': len(scenario['island_map'].replace('\n', '')),
+              'animals_start': animals_start,
+              'animals_end': sim.island.num_animals,
+              'animal_years': phase_animals['feed_animal'],
+              'total_seconds': total,
+              'animals_per_second': phase_animals['feed_animal'] / total if total else None,
+              'phases': {phase: {'seconds': phase_times[phase],
+                                 'animals_per_second': (phase_animals[phase] /
+                                                        phase_times[phase]
+                                                        if phase_times[phase] else None)}
+                         for phase in PHASES}}
+
+    if memory:
+        tracemalloc.start()
+        sim = make_sim()
+        run_years(sim.island, scenario['years'])
+        result['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous=None):
+    print(f"{'scenario':<11} {'phase':<20} {'seconds':>9} {'animals/s':>12}"
+          + (f" {'previous':>9} {'ratio':>6}" if previous else ""))
+    for name, result in results['scenarios'].items():
+        rows = [(phase, values['seconds'], values['animals_per_second'])
+                for phase, values in result['phases'].items()]
+        rows.append(('total', result['total_seconds'], result['animals_per_second']))
+        old = previous['scenarios'].get(name) if previous else None
+        for phase, seconds, rate in rows:
+            line = f"{name:<11} {phase:<20} {seconds:>9.3f} {rate or 0:>12.0f}"
+            if old is not None:
+                old_seconds = (old['total_seconds'] if phase == 'total'
+                               else old['phases'][phase]['seconds'])
+                line += f" {old_seconds:>9.3f} {seconds / old_seconds:>6.2f}"
+            print(line)
+        if 'peak_memory_mb' in result:
+            print(f"{name:<11} {'peak memory [MB]':<20} {result['peak_memory_mb']:>9.1f}")
+
+
+def main(argv=None):
+    all_scenarios = scenarios()
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=['object', 'array', 'compiled'], default='object')
+    parser.add_argument('--rng', choices=['python', 'numpy'], default='python')
+    parser.add_argument('--scenarios', nargs='+', choices=list(all_scenarios),
+                        default=list(all_scenarios))
+    parser.add_argument('--years', type=int, default=None,
+                        help="years of every scenario instead of its own number")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip the tracemalloc run")
+    parser.add_argument('--output', default=None, help="JSON file to write the results to")
+    parser.add_argument('--compare', default=None, help="earlier JSON file to compare with")
+    args = parser.parse_args(argv)
+
+    results = {'commit': git_commit(),
+               'python': platform.python_version(),
+               'numpy': np.__version__,
+               'backend': args.backend,
+               'rng': args.rng,
+               'scenarios': {}}
+    for name in args.scenarios:
+        scenario = dict(all_scenarios[name])
+        if args.years is not None:
+            scenario['years'] = args.years
+        results['scenarios'][name] = run_scenario(scenario, args.backend, args.rng,
+                                                  memory=not args.no_memory)
+
+    previous = None
+    if args.compare is not None:
+        with open(args.compare) as previous_file:
+            previous = json.load(previous_file)
+    print_results(results, previous)
+
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,13 +7,40 @@ __email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
 This file contains the Animal base class and child classes for herbivores and carnivores
 """
 
+from biosim.parameters import AnimalParameters, PerSimulationType
+from biosim.rng import normals, uniforms
 from math import exp
 import random
 
+import numpy as np
 
-class Animals:
+
+class Animals(metaclass=PerSimulationType):
+    """
+    The animals are slotted, so they have no __dict__ and take little memory. Every
+    subclass must declare __slots__ = () to keep it that way.
+
+    Animals that die are given back to the pool of their class with release, and
+    newborns reuses them for offspring, so a population boom does not allocate a new
+    object for every birth. The pool holds at most pool_size animals.
+
+    update_fitness only uses NumPy for at least batch_threshold animals, since for fewer
+    animals, as in most cells, gathering the arrays costs more than it saves.
+    """
+
+    __slots__ = ('age', 'weight', 'alive', 'has_migrated', 'eaten', 'phi')
 
     params_dict = None
+    constants = None
+    pool_size = 100000
+    batch_threshold = 50
+    _pool = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._pool = []
+        if cls.params_dict is not None:
+            cls.update_constants()
 
     @classmethod
     def set_parameters(cls, params):
@@ -31,9 +58,8 @@ class Animals:
         -------
         ValueError
         """
-        # cls.params_dict.update(params)
+
         for parameter in params:
-            # cls.params_dict.update(params)
             if parameter in cls.params_dict:
                 if params[parameter] < 0:
                     raise ValueError(f"{parameter} cannot be negative.")
@@ -41,11 +67,43 @@ class Animals:
                     raise ValueError("DeltaPhiMax must be larger than zero")
                 if parameter == "eta" and not 0 <= params[parameter] <= 1:
                     raise ValueError("Eta must be greater than zero and smaller than one")
-                cls.params_dict.update(params)
             else:
                 raise ValueError("Parameter not defined for this animal")
+        cls.params_dict.update(params)
+        cls.update_constants()
 
-    def __init__(self, age=0, weight=None):
+    @classmethod
+    def update_constants(cls):
+        """
+        Makes a new cls.constants from cls.params_dict. The animals read their parameters
+        from cls.constants, so this must be called if params_dict is changed directly.
+        """
+
+        cls.constants = AnimalParameters.from_dict(cls.params_dict)
+
+    @classmethod
+    def per_simulation_class(cls, params_dict=None):
+        """
+        Subclass with its own copy of the parameters. BioSim uses one for each species, so
+        set_parameters in one simulation does not change the parameters of another.
+
+        Parameters
+        ----------
+        params_dict : dict, optional
+            Parameters of the subclass. Defaults to those of cls.
+
+        Returns
+        -------
+        species : class
+        """
+
+        own_params = dict(cls.params_dict if params_dict is None else params_dict)
+        return type(cls.__name__, (cls,), {'params_dict': own_params,
+                                           '_per_simulation_args': (own_params,),
+                                           '__slots__': (),
+                                           '__module__': cls.__module__})
+
+    def __init__(self, age=0, weight=None, rng=random):
         """
         Animal parent class, i.e. all animals in the simulation must be subclasses of
         this parent class.
@@ -62,6 +120,8 @@ class Animals:
             The age of the animal
         weight : float
             The weight of the animal
+        rng : random.Random, BlockRandom or the random module
+            Draws the weight if it is not specified.
 
         Attributes
         ----------
@@ -79,7 +139,7 @@ class Animals:
             self.age = age
 
         if weight is None:
-            self.weight = self.get_initial_weight_offspring()
+            self.weight = self.get_initial_weight_offspring(rng)
         else:
             self.weight = weight
 
@@ -102,17 +162,22 @@ class Animals:
         string = f'Type: {type(self).__name__}, Age: {self.get_age()}, Fitness: {self.phi}'
         return string
 
-    def get_initial_weight_offspring(self):
+    def get_initial_weight_offspring(self, rng=random):
         """
         Draws the weight of an animal from a gaussian distribution.
 
+        Parameters
+        ----------
+        rng : random.Random, BlockRandom or the random module
+            Random number generator of the simulation.
+
         Returns
         -------
         offspring_weight : float
         """
 
-        offspring_weight = random.gauss(self.params_dict["w_birth"],
-                                        self.params_dict["sigma_birth"])
+        constants = self.constants
+        offspring_weight = rng.gauss(constants.w_birth, constants.sigma_birth)
         return offspring_weight
 
     @staticmethod
@@ -135,6 +200,55 @@ class Animals:
         sigmoid = (1/(1 + exp(p * phi_ * (x - x_half))))
         return sigmoid
 
+    @staticmethod
+    def batch_fitness(age, weight, constants):
+        """
+        Calculates the fitness of many animals of one species in one NumPy call.
+        Same formula as fitness_calculation, and animals with weight <= 0 get fitness 0.
+
+        Parameters
+        ----------
+        age : array_like
+        weight : array_like
+        constants : AnimalParameters
+            Parameters of the species.
+
+        Returns
+        -------
+        phi : ndarray
+        """
+
+        age = np.asarray(age, dtype=float)
+        weight = np.asarray(weight, dtype=float)
+
+        with np.errstate(over='ignore'):
+            q_age = 1 / (1 + np.exp(constants.phi_age * (age - constants.a_half)))
+            q_weight = 1 / (1 + np.exp(-constants.phi_weight * (weight - constants.w_half)))
+        return np.where(weight <= 0, 0.0, q_age * q_weight)
+
+    @staticmethod
+    def update_fitness(animals):
+        """
+        Recalculates the fitness of a list of animals of the same species, with
+        batch_fitness when there are at least batch_threshold animals and with
+        fitness_calculation one by one otherwise.
+
+        Parameters
+        ----------
+        animals : list
+        """
+
+        if len(animals) < Animals.batch_threshold:
+            for animal in animals:
+                animal.fitness_calculation()
+            return
+
+        phi = Animals.batch_fitness([animal.age for animal in animals],
+                                    [animal.weight for animal in animals],
+                                    type(animals[0]).constants)
+        for animal, animal_phi in zip(animals, phi.tolist()):
+            animal.phi = animal_phi
+
     def fitness_calculation(self):
         """
         Calculates the fitness of the animal.
@@ -148,15 +262,14 @@ class Animals:
         if self.weight <= 0:
             self.phi = 0
         else:
-            q_age = self.sigmoid(self.age,
-                                 self.params_dict["a_half"], self.params_dict["phi_age"], 1)
-            q_weight = self.sigmoid(self.weight,
-                                    self.params_dict["w_half"], self.params_dict["phi_weight"], -1)
+            constants = self.constants
+            q_age = 1 / (1 + exp(constants.phi_age * (self.age - constants.a_half)))
+            q_weight = 1 / (1 + exp(-constants.phi_weight * (self.weight - constants.w_half)))
             self.phi = q_age * q_weight
 
         return self.phi
 
-    def procreation(self, num_same_species):
+    def procreation(self, num_same_species, update_fitness=True, rng=random):
         """
         Calculates the probability of animal having an offspring.
 
@@ -172,33 +285,178 @@ class Animals:
         ----------
         num_same_species : int
             The amount of animals of the same species in a single cell.
+        update_fitness : bool
+            If False, the fitness of the parent is left for the caller to update in batch.
+        rng : random.Random, BlockRandom or the random module
+            Random number generator of the simulation.
 
         Returns
         -------
         offspring : Object
         """
 
-        if (self.weight < self.params_dict["zeta"] *
-                (self.params_dict["w_birth"] + self.params_dict["sigma_birth"])):
+        constants = self.constants
+        if self.weight < constants.birth_threshold:
             return
 
-        if random.random() <= min(1, self.params_dict["gamma"] * self.phi * (num_same_species - 1)):
-            offspring = type(self)()
-            self.weight -= self.params_dict["xi"] * offspring.weight
-            self.fitness_calculation()
+        if rng.random() <= min(1, constants.gamma * self.phi * (num_same_species - 1)):
+            offspring = self.newborns([self.get_initial_weight_offspring(rng)])[0]
+            self.weight -= constants.xi * offspring.weight
+            if update_fitness:
+                self.fitness_calculation()
             return offspring
 
-    def prob_migrate(self):
+    @classmethod
+    def batch_procreation(cls, animals, rng=random):
+        """
+        Procreation of all animals of this species in one cell, with the same probabilities
+        as procreation. The animals heavy enough to give birth are found first, then the
+        births and the weights of all offspring are drawn in one go, the parents lose
+        xi times the weight of their offspring and their fitness is updated in one batch.
+
+        Parameters
+        ----------
+        animals : list
+            All animals of this species in the cell.
+        rng : random.Random, BlockRandom or the random module
+            Random number generator of the simulation.
+
+        Returns
+        -------
+        offspring : list
+            The newborns, made by newborns.
+        """
+
+        num_animals = len(animals)
+        if num_animals < 2:
+            return []
+
+        constants = cls.constants
+        threshold = constants.birth_threshold
+        candidates = [animal for animal in animals if animal.weight >= threshold]
+        if not candidates:
+            return []
+
+        factor = constants.gamma * (num_animals - 1)
+        parents = [animal for animal, draw in zip(candidates, uniforms(rng, len(candidates)))
+                   if draw <= min(1, factor * animal.phi)]
+        if not parents:
+            return []
+
+        weights = normals(rng, constants.w_birth, constants.sigma_birth, len(parents))
+        xi = constants.xi
+        for parent, weight in zip(parents, weights):
+            parent.weight -= xi * weight
+        Animals.update_fitness(parents)
+
+        return cls.newborns(weights)
+
+    @classmethod
+    def batch_death(cls, animals, rng=random):
+        """
+        Death of all animals of this species in one cell, with the same probabilities as
+        animal_dying. One number is drawn for every animal in one go, animals without
+        weight die whatever the draw, and the survivors are moved to the front of the list,
+        which is then cut, so the list is changed in place. The dead are released to the
+        pool of the class.
+
+        Parameters
+        ----------
+        animals : list
+            All animals of this species in the cell.
+        rng : random.Random, BlockRandom or the random module
+            Random number generator of the simulation.
+
+        Returns
+        -------
+        num_dead : int
+        """
+
+        num_animals = len(animals)
+        if num_animals == 0:
+            return 0
+
+        omega = cls.constants.omega
+        dead = []
+        num_survivors = 0
+        for animal, draw in zip(animals, uniforms(rng, num_animals)):
+            if animal.weight <= 0 or draw < omega * (1 - animal.phi):
+                dead.append(animal)
+            else:
+                animals[num_survivors] = animal
+                num_survivors += 1
+        del animals[num_survivors:]
+
+        Animals.release(dead)
+        return len(dead)
+
+    @classmethod
+    def newborns(cls, weights):
+        """
+        Animals of age zero with the given weights. Their fitness is calculated with
+        update_fitness, and __init__ is skipped, since it would draw a weight and calculate
+        the fitness of every animal on its own. Animals in the pool of the class are reused
+        before new objects are made.
+
+        Parameters
+        ----------
+        weights : list
+
+        Returns
+        -------
+        offspring : list
+        """
+
+        offspring = []
+        new = cls.__new__
+        pool = cls._pool
+        for weight in weights:
+            animal = pool.pop() if pool else new(cls)
+            animal.age = 0
+            animal.weight = weight
+            animal.alive = True
+            animal.has_migrated = False
+            animal.eaten = 0
+            offspring.append(animal)
+        Animals.update_fitness(offspring)
+        return offspring
+
+    @staticmethod
+    def release(animals):
+        """
+        Gives dead animals of one class back to its pool, to be reused by newborns.
+        The animals must not be used by the caller afterwards.
+
+        Parameters
+        ----------
+        animals : list
+        """
+
+        if not animals:
+            return
+
+        species = type(animals[0])
+        pool = species._pool
+        room = species.pool_size - len(pool)
+        if room > 0:
+            pool.extend(animals[:room])
+
+    def prob_migrate(self, rng=random):
         """
         Calculates the probability for the animal to migrate to new cell.
 
+        Parameters
+        ----------
+        rng : random.Random, BlockRandom or the random module
+            Random number generator of the simulation.
+
         Returns
         -------
         bool
         """
 
         if self.has_migrated is False:
-            return bool(random.random() < self.params_dict["mu"] * self.phi)
+            return bool(rng.random() < self.constants.mu * self.phi)
         return False
 
     def set_migration_true(self):
@@ -215,31 +473,39 @@ class Animals:
 
         self.has_migrated = False
 
-    def growing_older(self):
+    def growing_older(self, update_fitness=True):
         """
         When animals grows older the age increases by one and the weight decreases with a
         constant that is based on its weight. Then recalculates the fitness.
+
+        Parameters
+        ----------
+        update_fitness : bool
+            If False, the fitness is left for the caller to update in batch.
         """
 
         self.age += 1
-        self.weight = self.weight - (self.params_dict["eta"] * self.weight)
-        self.fitness_calculation()
+        self.weight = self.weight - (self.constants.eta * self.weight)
+        if update_fitness:
+            self.fitness_calculation()
 
-    def animal_dying(self):
+    def animal_dying(self, rng=random):
         """
         Calculate if the animal dies or not.
 
+        Parameters
+        ----------
+        rng : random.Random, BlockRandom or the random module
+            Random number generator of the simulation.
+
         Returns
         -------
         bool
         """
 
-        if self.weight == 0:
-            return True
-        elif random.random() < self.params_dict["omega"] * (1 - self.phi):
+        if self.weight <= 0:
             return True
-        elif random.random() >= self.params_dict["omega"] * (1 - self.phi):
-            return False
+        return rng.random() < self.constants.omega * (1 - self.phi)
 
     def get_age(self):
         return self.age
@@ -256,6 +522,8 @@ class Herbivore(Animals):
     The subclass Herbivore inheritance from the parent class Animal.
     """
 
+    __slots__ = ()
+
     params_dict = {
         'w_birth': 8.0,
         'sigma_birth': 1.5,
@@ -273,10 +541,10 @@ class Herbivore(Animals):
         'F': 10.0,
     }
 
-    def __init__(self, age=0, weight=None):
-        super().__init__(age, weight)
+    def __init__(self, age=0, weight=None, rng=random):
+        super().__init__(age, weight, rng)
 
-    def feeding(self, available_food):
+    def feeding(self, available_food, update_fitness=True):
         """
         Calculates amount of fodder the animal eats in current cell.
 
@@ -290,6 +558,8 @@ class Herbivore(Animals):
         Parameters
         ----------
         available_food : float
+        update_fitness : bool
+            If False, the fitness is left for the caller to update in batch.
 
         Returns
         -------
@@ -297,13 +567,15 @@ class Herbivore(Animals):
             The eaten amount for a herbivore.
         """
 
-        if available_food < 0:
-            self.eaten = 0
+        constants = self.constants
+        if available_food >= constants.F:
+            self.eaten = constants.F
+            self.weight += constants.max_gain
         else:
-            self.eaten = min(self.params_dict["F"], available_food)
-
-        self.weight += self.params_dict["beta"] * self.eaten
-        self.fitness_calculation()
+            self.eaten = max(available_food, 0)
+            self.weight += constants.beta * self.eaten
+        if update_fitness:
+            self.fitness_calculation()
 
         return self.eaten
 
@@ -313,6 +585,8 @@ class Carnivore(Animals):
     The subclass Herbivore inheritance from the parent class Animal.
     """
 
+    __slots__ = ()
+
     params_dict = {
         'w_birth': 6.0,
         'sigma_birth': 1.0,
@@ -331,19 +605,25 @@ class Carnivore(Animals):
         'DeltaPhiMax': 10.0
     }
 
-    def __init__(self, age=0, weight=None):
-        super().__init__(age, weight)
+    def __init__(self, age=0, weight=None, rng=random):
+        super().__init__(age, weight, rng)
 
-    def hunt_herb(self, herb_phi_sorted_list):
+    def hunt_herb(self, herb_phi_sorted_list, rng=random):
         """
         The method has all the herbivore in currents cell sorted by fitness as input.
         If the animal eat, the animal eats a herbivore. The weight of the carnivore will increase
         and the fitness is recalculated.
 
+        Herbivores already killed by another carnivore (alive is False) are skipped, so the
+        caller can leave them in the list. Since the list is sorted by increasing fitness,
+        the hunt stops at the first herbivore at least as fit as the carnivore.
+
         Parameters
         ----------
         herb_phi_sorted_list : list
             Increasing fitness.
+        rng : random.Random, BlockRandom or the random module
+            Random number generator of the simulation.
 
         Returns
         -------
@@ -351,27 +631,36 @@ class Carnivore(Animals):
             List of herbivore(s) eaten by a single carnivore
         """
 
+        constants = self.constants
+        appetite = constants.F
+        delta_phi_max = constants.DeltaPhiMax
+        inv_delta_phi_max = constants.inv_delta_phi_max
+        beta = constants.beta
+
         self.eaten = 0
         dead_herbs = []
         weight_killed_herb = 0
 
         for herb in herb_phi_sorted_list:
-            if self.phi <= herb.phi:
-                kill_prob = 0
-            elif (self.phi - herb.phi) < self.params_dict["DeltaPhiMax"]:
-                kill_prob = (self.phi - herb.phi) / (self.params_dict["DeltaPhiMax"])
+            if not herb.alive:
+                continue
+            phi_diff = self.phi - herb.phi
+            if phi_diff <= 0:
+                return dead_herbs
+            elif phi_diff < delta_phi_max:
+                kill_prob = phi_diff * inv_delta_phi_max
             else:
                 kill_prob = 1
 
-            if random.random() <= kill_prob:
-                eat = min(herb.weight, self.params_dict["F"] - weight_killed_herb)
-                self.weight += self.params_dict["beta"] * eat
+            if rng.random() <= kill_prob:
+                eat = min(herb.weight, appetite - weight_killed_herb)
+                self.weight += beta * eat
                 herb.alive = False
                 self.fitness_calculation()
                 dead_herbs.append(herb)
                 weight_killed_herb += eat
 
-                if weight_killed_herb >= self.params_dict["F"]:
+                if weight_killed_herb >= appetite:
                     return dead_herbs
 
         return dead_herbs
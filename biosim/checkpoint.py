@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File for saving a running simulation to a checkpoint and restoring it.
+
+A checkpoint is one .npz file. The animals are stored as arrays with the cell, age, weight,
+fitness and migration flag of every animal, in the order they have in their cells, and the
+fodder as one value per cell. The year, the map, the parameters and the state of the random
+number generators are stored as JSON in the array 'meta'. Restoring a checkpoint and
+simulating on gives exactly the same result as a run that was never stopped.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from biosim.rng import BlockRandom
+
+CHECKPOINT_VERSION = 1
+
+ANIMAL_SPECIES = ('Herbivore', 'Carnivore')
+COLUMNS = ('cell', 'age', 'weight', 'phi', 'has_migrated')
+
+
+def _rng_state(rng):
+    """
+    State of a random.Random or BlockRandom, as JSON data and arrays.
+    """
+
+    if isinstance(rng, BlockRandom):
+        meta = {'kind': 'numpy', 'generator': rng.generator.bit_generator.state,
+                'block_size': rng.block_size}
+        arrays = {'rng_uniform': np.array(rng._uniform[rng._next_uniform:], dtype=float),
+                  'rng_normal': np.array(rng._normal[rng._next_normal:], dtype=float)}
+        return meta, arrays
+
+    version, internal, gauss_next = rng.getstate()
+    return {'kind': 'python', 'version': version, 'gauss_next': gauss_next}, \
+        {'rng_internal': np.array(internal, dtype=np.uint64)}
+
+
+def _set_rng_state(rng, meta, arrays):
+    if meta['kind'] == 'numpy':
+        rng.generator.bit_generator.state = meta['generator']
+        rng.block_size = meta['block_size']
+        rng._uniform = arrays['rng_uniform'].tolist()
+        rng._next_uniform = 0
+        rng._normal = arrays['rng_normal'].tolist()
+        rng._next_normal = 0
+    else:
+        internal = tuple(int(value) for value in arrays['rng_internal'])
+        rng.setstate((meta['version'], internal, meta['gauss_next']))
+
+
+def _object_columns(island):
+    """
+    Columns of the animals of the object backend, cell by cell in the order of the map.
+    """
+
+    columns = {}
+    for species, attribute in zip(ANIMAL_SPECIES, ('present_herbivores', 'present_carnivores')):
+        animals = []
+        cells = []
+        for loc, cell in island.map.items():
+            present = getattr(cell, attribute)
+            animals.extend(present)
+            cells.extend([island.grid.cell_index(loc)] * len(present))
+        columns[species] = {'cell': np.array(cells, dtype=np.int64),
+                            'age': np.array([animal.age for animal in animals],
+                                            dtype=np.int64),
+                            'weight': np.array([animal.weight for animal in animals],
+                                               dtype=float),
+                            'phi': np.array([animal.phi for animal in animals], dtype=float),
+                            'has_migrated': np.array([animal.has_migrated
+                                                      for animal in animals], dtype=bool)}
+    return columns
+
+
+def save_checkpoint(sim, path):
+    """
+    Writes the state of a simulation to path. The file is written under a temporary name
+    and renamed when it is complete, so an interrupted write never replaces a good
+    checkpoint.
+
+    Parameters
+    ----------
+    sim : BioSim
+    path : str
+    """
+
+    island = sim.island
+    meta = {'version': CHECKPOINT_VERSION,
+            'year': sim._year,
+            'island_year': island.year,
+            'img_ctr': sim._img_ctr,
+            'island_map': sim.inserted_map,
+            'backend': island.backend,
+            'animal_params': {species: dict(cls.params_dict)
+                              for species, cls in sim.species.items()},
+            'landscape_params': {letter: dict(cls.params_dict)
+                                 for letter, cls in sim.landscapes.items()}}
+    meta['rng'], arrays = _rng_state(sim.rng)
+
+    if island.engine is not None:
+        engine = island.engine
+        meta['engine_rng'] = engine.rng.bit_generator.state
+        arrays['fodder'] = engine.fodder
+        for species, population in zip(ANIMAL_SPECIES, (engine.herbivores, engine.carnivores)):
+            for column in COLUMNS:
+                arrays[f'{species}_{column}'] = getattr(population, column)
+    else:
+        fodder = np.zeros(island.grid.num_cells)
+        for loc, cell in island.map.items():
+            fodder[island.grid.cell_index(loc)] = cell.available_fodder
+        arrays['fodder'] = fodder
+        for species, columns in _object_columns(island).items():
+            for column, values in columns.items():
+                arrays[f'{species}_{column}'] = values
+
+    arrays['meta'] = np.array(json.dumps(meta))
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as checkpoint_file:
+        np.savez(checkpoint_file, **arrays)
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path, **kwargs):
+    """
+    Restores a simulation from a checkpoint.
+
+    Parameters
+    ----------
+    path : str
+    **kwargs
+        Passed on to BioSim, e.g. img_dir or hist_specs, which are not in the checkpoint.
+
+    Returns
+    -------
+    sim : BioSim
+
+    Raises
+    -------
+    ValueError
+        If the checkpoint was written by an unknown version.
+    """
+
+    from biosim.simulation import BioSim
+
+    with np.load(path) as checkpoint:
+        arrays = {name: checkpoint[name] for name in checkpoint.files}
+    meta = json.loads(str(arrays['meta']))
+    if meta['version'] != CHECKPOINT_VERSION:
+        raise ValueError(f"Checkpoint version {meta['version']} is not supported, "
+                         f"expected {CHECKPOINT_VERSION}")
+
+    sim = BioSim(meta['island_map'], [], seed=None, backend=meta['backend'],
+                 rng=meta['rng']['kind'], **kwargs)
+    for species, params in meta['animal_params'].items():
+        sim.set_animal_parameters(species, params)
+    for letter, params in meta['landscape_params'].items():
+        sim.set_landscape_parameters(letter, params)
+
+    sim._year = meta['year']
+    sim._img_ctr = meta['img_ctr']
+    island = sim.island
+    island.year = meta['island_year']
+    _set_rng_state(sim.rng, meta['rng'], arrays)
+
+    columns = {species: {column: arrays[f'{species}_{column}'] for column in COLUMNS}
+               for species in ANIMAL_SPECIES}
+
+    if island.engine is not None:
+        engine = island.engine
+        engine.rng.bit_generator.state = meta['engine_rng']
+        engine.fodder[:] = arrays['fodder']
+        for species, population in zip(ANIMAL_SPECIES, (engine.herbivores, engine.carnivores)):
+            species_columns = columns[species]
+            population.add(species_columns['cell'], species_columns['age'],
+                           species_columns['weight'])
+            population.phi[:] = species_columns['phi']
+            population.has_migrated[:] = species_columns['has_migrated']
+        return sim
+
+    cells = {island.grid.cell_index(loc): cell for loc, cell in island.map.items()}
+    for index, cell in cells.items():
+        cell.available_fodder = float(arrays['fodder'][index])
+    for species, attribute in zip(ANIMAL_SPECIES, ('present_herbivores', 'present_carnivores')):
+        species_class = sim.species[species]
+        species_columns = columns[species]
+        for index, age, weight, phi, has_migrated in zip(
+                *(species_columns[column].tolist() for column in COLUMNS)):
+            animal = species_class(age, weight, sim.rng)
+            animal.phi = phi
+            animal.has_migrated = has_migrated
+            getattr(cells[index], attribute).append(animal)
+    for index, cell in cells.items():
+        island.update_cell_count(index, cell)
+
+    return sim
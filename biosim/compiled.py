@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File with the compiled backend: the yearly phases of ArrayEngine as loops over the
+Population columns, compiled in nopython mode by numba.
+
+The loops handle one animal at a time with the same rules as the animal objects, so
+hunting can follow every kill exactly: the fitness and the remaining appetite of the
+carnivore change after each herbivore it eats. The random numbers are drawn inside the
+kernels from the NumPy Generator of the engine, so a seeded simulation is reproducible.
+
+The compiled kernels are cached on disk (cache=True), so only the first run after a
+change of this file pays for the compilation. Without numba the kernels are plain Python
+functions, and make_engine falls back to ArrayEngine.
+"""
+
+import warnings
+
+import numpy as np
+
+from biosim.population import ArrayEngine
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+
+def jit(function):
+    """
+    Compiles function in nopython mode with an on-disk cache, or returns it unchanged when
+    numba is not installed.
+    """
+
+    if numba is None:
+        return function
+    return numba.njit(cache=True)(function)
+
+
+@jit
+def fitness(age, weight, a_half, phi_age, w_half, phi_weight):
+    """
+    Same formula as Animals.fitness_calculation.
+    """
+
+    if weight <= 0:
+        return 0.0
+    q_age = 1 / (1 + np.exp(phi_age * (age - a_half)))
+    q_weight = 1 / (1 + np.exp(-phi_weight * (weight - w_half)))
+    return q_age * q_weight
+
+
+@jit
+def graze_kernel(order, cell, age, weight, phi, fodder, appetite, beta, a_half, phi_age,
+                 w_half, phi_weight):
+    """
+    Herbivores eat in the given order, as in SingleCell.feed_herb.
+    """
+
+    for animal in order:
+        available = fodder[cell[animal]]
+        if available <= 0:
+            continue
+        eaten = min(appetite, available)
+        fodder[cell[animal]] = available - eaten
+        weight[animal] += beta * eaten
+        phi[animal] = fitness(age[animal], weight[animal], a_half, phi_age, w_half, phi_weight)
+
+
+@jit
+def hunt_kernel(herb_order, herb_cell, herb_phi, herb_weight, herb_alive, carn_order,
+                carn_cell, carn_age, carn_weight, carn_phi, appetite, beta, delta_phi_max,
+                a_half, phi_age, w_half, phi_weight, rng):
+    """
+    Carnivores hunt cell by cell, as in Carnivore.hunt_herb. herb_order sorts the
+    herbivores by cell and increasing fitness, carn_order the carnivores by cell and
+    decreasing fitness.
+
+    Returns
+    -------
+    num_killed : int
+    """
+
+    num_killed = 0
+    num_herbs = len(herb_order)
+    herb_start = 0
+    for position in range(len(carn_order)):
+        carn = carn_order[position]
+        cell = carn_cell[carn]
+        while herb_start < num_herbs and herb_cell[herb_order[herb_start]] < cell:
+            herb_start += 1
+
+        weight_killed_herb = 0.0
+        prey_position = herb_start
+        while prey_position < num_herbs and herb_cell[herb_order[prey_position]] == cell:
+            herb = herb_order[prey_position]
+            prey_position += 1
+            if not herb_alive[herb]:
+                continue
+            phi_difference = carn_phi[carn] - herb_phi[herb]
+            if phi_difference <= 0:
+                break
+            if phi_difference < delta_phi_max:
+                kill_prob = phi_difference / delta_phi_max
+            else:
+                kill_prob = 1.0
+
+            if rng.random() <= kill_prob:
+                eat = min(herb_weight[herb], appetite - weight_killed_herb)
+                carn_weight[carn] += beta * eat
+                herb_alive[herb] = False
+                carn_phi[carn] = fitness(carn_age[carn], carn_weight[carn], a_half, phi_age,
+                                         w_half, phi_weight)
+                weight_killed_herb += eat
+                num_killed += 1
+                if weight_killed_herb >= appetite:
+                    break
+
+    return num_killed
+
+
+@jit
+def procreation_kernel(cell, age, weight, phi, cell_count, gamma, birth_threshold, w_birth,
+                       sigma_birth, xi, a_half, phi_age, w_half, phi_weight, rng):
+    """
+    Every animal heavy enough gives birth with probability min(1, gamma * phi * (N - 1)),
+    as in Animals.procreation, and loses xi times the weight of its offspring.
+
+    Returns
+    -------
+    parents : ndarray
+        Rows of the animals that gave birth.
+    offspring_weight : ndarray
+    """
+
+    parents = np.empty(len(cell), dtype=np.int64)
+    offspring_weight = np.empty(len(cell))
+    num_births = 0
+    for animal in range(len(cell)):
+        same_species = cell_count[cell[animal]]
+        if same_species < 2 or weight[animal] < birth_threshold:
+            continue
+        if rng.random() <= min(1.0, gamma * phi[animal] * (same_species - 1)):
+            newborn_weight = rng.normal(w_birth, sigma_birth)
+            weight[animal] -= xi * newborn_weight
+            phi[animal] = fitness(age[animal], weight[animal], a_half, phi_age, w_half,
+                                  phi_weight)
+            parents[num_births] = animal
+            offspring_weight[num_births] = newborn_weight
+            num_births += 1
+
+    return parents[:num_births], offspring_weight[:num_births]
+
+
+@jit
+def migration_kernel(cell, phi, has_migrated, cell_count, neighbours, accessible, mu, rng):
+    """
+    Every animal moves with probability mu * phi to one of the four neighbouring cells,
+    chosen at random, unless that cell is water.
+
+    Returns
+    -------
+    num_migrated : int
+    """
+
+    num_migrated = 0
+    for animal in range(len(cell)):
+        has_migrated[animal] = False
+        if rng.random() >= mu * phi[animal]:
+            continue
+        new_cell = neighbours[cell[animal], int(rng.random() * 4)]
+        if not accessible[new_cell]:
+            continue
+        cell_count[cell[animal]] -= 1
+        cell_count[new_cell] += 1
+        cell[animal] = new_cell
+        has_migrated[animal] = True
+        num_migrated += 1
+
+    return num_migrated
+
+
+@jit
+def aging_kernel(age, weight, phi, eta, a_half, phi_age, w_half, phi_weight):
+    """
+    Increments age by one and reduces weight by eta * weight, as in Animals.growing_older.
+    """
+
+    for animal in range(len(age)):
+        age[animal] += 1
+        weight[animal] -= eta * weight[animal]
+        phi[animal] = fitness(age[animal], weight[animal], a_half, phi_age, w_half, phi_weight)
+
+
+@jit
+def death_kernel(weight, phi, omega, rng):
+    """
+    Animals with zero weight die, the others die with probability omega * (1 - phi).
+
+    Returns
+    -------
+    survives : ndarray
+    """
+
+    survives = np.ones(len(weight), dtype=np.bool_)
+    for animal in range(len(weight)):
+        if weight[animal] <= 0 or rng.random() < omega * (1 - phi[animal]):
+            survives[animal] = False
+    return survives
+
+
+def fitness_params(constants):
+    """
+    Parameters of the fitness of a species, in the order the kernels take them.
+
+    Parameters
+    ----------
+    constants : AnimalParameters
+
+    Returns
+    -------
+    tuple
+    """
+
+    return constants.a_half, constants.phi_age, constants.w_half, constants.phi_weight
+
+
+class NumbaEngine(ArrayEngine):
+    """
+    ArrayEngine whose phases run as compiled kernels over the Population columns. Adding
+    and removing rows is still done by Population, the kernels only change values and
+    pick the rows.
+    """
+
+    def graze(self):
+        """
+        Herbivores in each cell eat in random order.
+        """
+
+        herbs = self.herbivores
+        if len(herbs) == 0:
+            return
+
+        constants = herbs.constants
+        graze_kernel(self.rng.permutation(len(herbs)), herbs.cell, herbs.age, herbs.weight,
+                     herbs.phi, self.fodder, constants.F, constants.beta,
+                     *fitness_params(constants))
+
+    def hunt(self):
+        """
+        Carnivores hunt cell by cell, the fittest carnivore first, and each carnivore tries
+        the herbivores from the least fit upwards.
+        """
+
+        herbs = self.herbivores
+        carns = self.carnivores
+        if len(herbs) == 0 or len(carns) == 0:
+            return
+
+        constants = carns.constants
+        hunt_kernel(np.lexsort((herbs.phi, herbs.cell)), herbs.cell, herbs.phi, herbs.weight,
+                    herbs.alive, np.lexsort((-carns.phi, carns.cell)), carns.cell, carns.age,
+                    carns.weight, carns.phi, constants.F, constants.beta,
+                    constants.DeltaPhiMax, *fitness_params(constants), self.rng)
+        herbs.keep(herbs.alive)
+
+    def procreation(self):
+        """
+        Animals in cells with at least two animals of the same species give birth.
+        """
+
+        for population in (self.herbivores, self.carnivores):
+            if len(population) < 2:
+                continue
+
+            constants = population.constants
+            parents, offspring_weight = procreation_kernel(
+                population.cell, population.age, population.weight, population.phi,
+                population.cell_count, constants.gamma, constants.birth_threshold,
+                constants.w_birth, constants.sigma_birth, constants.xi,
+                *fitness_params(constants), self.rng)
+            population.add(population.cell[parents], np.zeros(len(parents)), offspring_weight)
+
+    def migration(self):
+        """
+        Every animal moves with probability mu * phi to a random neighbouring cell.
+
+        Returns
+        -------
+        num_migrated : int
+        """
+
+        num_migrated = 0
+        for population in (self.herbivores, self.carnivores):
+            if len(population) == 0:
+                continue
+            num_migrated += migration_kernel(population.cell, population.phi,
+                                             population.has_migrated, population.cell_count,
+                                             self.neighbours, self.accessible,
+                                             population.constants.mu, self.rng)
+        return num_migrated
+
+    def aging(self):
+        """
+        Increments age by one and reduces weight by eta * weight for every animal.
+        """
+
+        for population in (self.herbivores, self.carnivores):
+            if len(population) == 0:
+                continue
+            constants = population.constants
+            aging_kernel(population.age, population.weight, population.phi, constants.eta,
+                         *fitness_params(constants))
+
+    def death(self):
+        """
+        Animals with zero weight die, the others die with probability omega * (1 - phi).
+
+        Returns
+        -------
+        num_dead : int
+        """
+
+        num_dead = 0
+        for population in (self.herbivores, self.carnivores):
+            if len(population) == 0:
+                continue
+            survives = death_kernel(population.weight, population.phi,
+                                    population.constants.omega, self.rng)
+            num_dead += len(population) - int(np.count_nonzero(survives))
+            population.keep(survives)
+        return num_dead
+
+
+def make_engine(grid, rng=None, species=None):
+    """
+    NumbaEngine when numba is installed, otherwise ArrayEngine with a warning.
+
+    Parameters
+    ----------
+    grid : IslandGrid
+    rng : numpy.random.Generator, optional
+    species : dict, optional
+
+    Returns
+    -------
+    engine : NumbaEngine or ArrayEngine
+    """
+
+    if not NUMBA_AVAILABLE:
+        warnings.warn("numba is not installed, the compiled backend runs as the array backend")
+        return ArrayEngine(grid, rng=rng, species=species)
+    return NumbaEngine(grid, rng=rng, species=species)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File for running independent replicates of a simulation in parallel.
+"""
+
+import multiprocessing
+import os
+
+import numpy as np
+
+from biosim.simulation import BioSim
+
+ANIMAL_SPECIES = ('Herbivore', 'Carnivore')
+
+
+def run_replicate(island_map, ini_pop, seed, num_years, params=None, backend="object"):
+    """
+    Runs one headless simulation and records the number of animals every year.
+
+    The parameters are set on the classes of the process running the replicate, so in an
+    ensemble they never reach the process that started it.
+
+    Parameters
+    ----------
+    island_map : str
+    ini_pop : list
+    seed : int
+    num_years : int
+    params : dict, optional
+        Key: 'Herbivore', 'Carnivore' or a landscape letter - Value: dict with parameters.
+    backend : str
+
+    Returns
+    -------
+    series : ndarray
+        Shape (num_years + 1, 2), number of herbivores and carnivores from year 0.
+    """
+
+    sim = BioSim(island_map, ini_pop, seed, backend=backend)
+    for name, values in (params or {}).items():
+        if name in ANIMAL_SPECIES:
+            sim.set_animal_parameters(name, values)
+        else:
+            sim.set_landscape_parameters(name, values)
+
+    series = np.empty((num_years + 1, len(ANIMAL_SPECIES)), dtype=np.int64)
+    for year in range(num_years + 1):
+        if year > 0:
+            sim.simulate(1, vis_years=None)
+        num_animals = sim.num_animals_per_species
+        series[year] = [num_animals[species] for species in ANIMAL_SPECIES]
+    return series
+
+
+def _run_replicate(args):
+    return run_replicate(*args)
+
+
+def run_ensemble(island_map, ini_pop, seeds, num_years, params=None, backend="object",
+                 processes=None):
+    """
+    Runs one replicate per seed across a pool of processes.
+
+    Every replicate owns a generator seeded by BioSim, so the result for a seed does not
+    depend on the number of processes or on which process ran it.
+
+    Parameters
+    ----------
+    island_map : str
+    ini_pop : list
+    seeds : list
+        One integer per replicate.
+    num_years : int
+    params : dict, optional
+        Key: 'Herbivore', 'Carnivore' or a landscape letter - Value: dict with parameters.
+    backend : str
+    processes : int, optional
+        Size of the pool, defaults to the number of CPUs.
+
+    Returns
+    -------
+    ensemble : dict
+        'Year': ndarray with the years 0 to num_years,
+        'Herbivore' and 'Carnivore': ndarray of shape (len(seeds), num_years + 1),
+        one row per seed in the order of seeds.
+    """
+
+    seeds = list(seeds)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, len(seeds)))
+    chunksize = max(1, len(seeds) // (4 * processes))
+
+    stacked = np.empty((len(ANIMAL_SPECIES), len(seeds), num_years + 1), dtype=np.int64)
+    tasks = ((island_map, ini_pop, seed, num_years, params, backend) for seed in seeds)
+    with multiprocessing.Pool(processes) as pool:
+        for row, series in enumerate(pool.imap(_run_replicate, tasks, chunksize)):
+            stacked[:, row] = series.T
+
+    ensemble = {'Year': np.arange(num_years + 1)}
+    for species, counts in zip(ANIMAL_SPECIES, stacked):
+        ensemble[species] = counts
+    return ensemble
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File with the dense grid representation of the island.
+"""
+
+import numpy as np
+
+
+class IslandGrid:
+    """
+    Keeps the island as 2-D NumPy arrays instead of a dictionary of cell objects.
+
+    Coordinate (1, 1) is the upper left corner, as in CreateIsland.map, and the cell at
+    coordinate (row, col) has the flat index (row - 1) * num_cols + (col - 1).
+    """
+
+    def __init__(self, map_list, landscapes):
+        """
+        Parameters
+        ----------
+        map_list : list
+            Lines of the island map, checked by CreateIsland.condition_for_island_map_string.
+        landscapes : dict
+            Key: letter in the map - Value: subclass of SingleCell
+
+        Attributes
+        ----------
+        self.landscape : ndarray
+            Code of the landscape type of each cell, index into self.landscape_types.
+        self.accessible : ndarray
+            True where animals can enter.
+        self.f_max : ndarray
+        self.fodder : ndarray
+        self.herb_count : ndarray
+        self.carn_count : ndarray
+        self.neighbours : ndarray
+            Flat index of the north, south, west and east neighbour of every cell.
+        """
+
+        self.num_rows = len(map_list)
+        self.num_cols = len(map_list[0])
+        self.shape = (self.num_rows, self.num_cols)
+        self.num_cells = self.num_rows * self.num_cols
+
+        self.letters = list(landscapes)
+        self.landscape_types = [landscapes[letter] for letter in self.letters]
+        letter_code = {letter: code for code, letter in enumerate(self.letters)}
+        self.landscape = np.array([[letter_code[letter] for letter in line] for line in map_list],
+                                  dtype=np.uint8).reshape(self.shape)
+
+        accessibility = np.array([land.accessibility for land in self.landscape_types],
+                                 dtype=bool)
+        self.accessible = accessibility[self.landscape]
+
+        self.f_max = np.zeros(self.shape)
+        self.fodder = np.zeros(self.shape)
+        self.herb_count = np.zeros(self.shape, dtype=np.int64)
+        self.carn_count = np.zeros(self.shape, dtype=np.int64)
+
+        cells = np.arange(self.num_cells)
+        last = self.num_cells - 1
+        self.neighbours = np.stack([np.clip(cells - self.num_cols, 0, last),
+                                    np.clip(cells + self.num_cols, 0, last),
+                                    np.clip(cells - 1, 0, last),
+                                    np.clip(cells + 1, 0, last)], axis=1)
+
+        self.fodder_regrow()
+
+    @staticmethod
+    def landscape_f_max(landscape):
+        """
+        Reads f_max of a landscape class.
+        Desert and Water keep it in params while Lowland and Highland use params_dict.
+
+        Parameters
+        ----------
+        landscape : class
+
+        Returns
+        -------
+        f_max : float
+        """
+
+        params = landscape.params_dict if landscape.params_dict is not None else landscape.params
+        return params["f_max"]
+
+    def update_f_max(self):
+        """
+        Fills self.f_max from the current parameters of the landscape classes.
+        """
+
+        table = np.array([self.landscape_f_max(land) for land in self.landscape_types],
+                         dtype=float)
+        self.f_max[:] = table[self.landscape]
+
+    def fodder_regrow(self):
+        """
+        Restores the fodder of every cell to f_max of its landscape type.
+        """
+
+        self.update_f_max()
+        self.fodder[:] = self.f_max
+
+    def contains(self, loc):
+        """
+        Checks if a coordinate is on the map.
+
+        Parameters
+        ----------
+        loc : tuple
+
+        Returns
+        -------
+        bool
+        """
+
+        row, col = loc
+        return 1 <= row <= self.num_rows and 1 <= col <= self.num_cols
+
+    def cell_index(self, loc):
+        """
+        Converts a coordinate to the flat index of the cell.
+
+        Parameters
+        ----------
+        loc : tuple
+
+        Returns
+        -------
+        index : int
+        """
+
+        row, col = loc
+        return (row - 1) * self.num_cols + (col - 1)
+
+    def location(self, index):
+        """
+        Converts a flat index to the coordinate of the cell.
+
+        Parameters
+        ----------
+        index : int
+
+        Returns
+        -------
+        loc : tuple
+        """
+
+        row, col = divmod(int(index), self.num_cols)
+        return row + 1, col + 1
+
+    def neighbour_locations(self, loc):
+        """
+        Coordinates of the cells north, south, west and east of a cell.
+
+        Parameters
+        ----------
+        loc : tuple
+
+        Returns
+        -------
+        neighbours : list
+        """
+
+        return [self.location(index) for index in self.neighbours[self.cell_index(loc)]]
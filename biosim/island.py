@@ -6,7 +6,12 @@ __email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
 """
 File for island with many cells
 """
+from biosim.grid import IslandGrid
 from biosim.landscape import Highland, Lowland, Desert, Water
+from biosim.population import ArrayEngine
+from biosim.rng import numpy_generator
+import random
+import time
 
 
 def check_length_of_string(map_list):
@@ -35,9 +40,15 @@ class CreateIsland:
                        "D": Desert,
                        "W": Water}
 
+    backends = ("object", "array", "compiled")
+
     def __init__(self,
                  geography_island_string,
-                 initial_population
+                 initial_population,
+                 backend="object",
+                 rng=None,
+                 landscapes=None,
+                 metrics=None
                  ):
         """
         Initiates the CreateIsland class.
@@ -53,13 +64,73 @@ class CreateIsland:
             Multilinestring of map
         initial_population : dict
             Key: location given in coordinates - Value: list of dict
-        """
+        backend : str
+            "object" keeps every animal as an object in its SingleCell, "array" keeps the
+            animals as NumPy columns in an ArrayEngine, "compiled" runs the phases on the
+            same columns with the numba kernels of biosim.compiled.
+        rng : random.Random or BlockRandom, optional
+            Random number generator of the simulation, given to every cell, or used to seed
+            the generator of the ArrayEngine. Defaults to the random module.
+        landscapes : dict, optional
+            Key: letter in the map - Value: landscape class, e.g. from
+            SingleCell.per_simulation_class. The animals are of the classes in the species
+            attribute of the landscape classes. Defaults to map_params_dict.
+        metrics : SimulationMetrics, optional
+            Times the phases and counts births, deaths, kills and migrations of every year.
+            Without metrics, simulate_one_year measures nothing.
+
+        The landscape is always kept in the IslandGrid self.grid. Only the object backend
+        builds self.map with one SingleCell per coordinate, for the array backend it is empty.
+
+        The yearly phases of the object backend only visit the occupied cells, found from
+        the count arrays of the grid, which are kept up to date when animals are added,
+        born, killed, die and migrate. The cost of a year thus follows the number of
+        occupied cells, not the area of the map. Since fodder regrows to f_max at the
+        start of feeding, the fodder of an empty cell is only regrown when animals are in
+        it again.
+        """
+
+        if backend not in self.backends:
+            raise ValueError(f"Backend must be one of {self.backends}")
 
         self.year_num = 0
+        self.backend = backend
+        self.rng = random if rng is None else rng
+        self.metrics = metrics
+        if landscapes is not None:
+            self.map_params_dict = landscapes
+
+        self.grid = IslandGrid(self.condition_for_island_map_string(geography_island_string),
+                               self.map_params_dict)
+        self.map = {}
+        self.engine = None
+        self._neighboring_cells = {}
+        if backend == "array":
+            self.engine = ArrayEngine(self.grid, rng=numpy_generator(self.rng),
+                                      species=self.map_params_dict["L"].species)
+        elif backend == "compiled":
+            from biosim.compiled import make_engine
+            self.engine = make_engine(self.grid, rng=numpy_generator(self.rng),
+                                      species=self.map_params_dict["L"].species)
+        else:
+            self.map = self.make_map(geography_island_string)
+
+        self._locations = list(self.map)
+        self._cells = list(self.map.values())
+        self._herb_count = self.grid.herb_count.reshape(-1)
+        self._carn_count = self.grid.carn_count.reshape(-1)
 
-        self.map = self.make_map(geography_island_string)
         self.add_population(initial_population)
 
+    def __setstate__(self, state):
+        """
+        Pickle copies the flat views of the count arrays of the grid, so they are made again.
+        """
+
+        self.__dict__.update(state)
+        self._herb_count = self.grid.herb_count.reshape(-1)
+        self._carn_count = self.grid.carn_count.reshape(-1)
+
     @property
     def num_animals(self):
         """
@@ -93,6 +164,10 @@ class CreateIsland:
         num_herbivores = 0
         num_carnivores = 0
 
+        if self.engine is not None:
+            num_herbivores = len(self.engine.herbivores)
+            num_carnivores = len(self.engine.carnivores)
+
         for cell in self.map.values():
             num_herbivores += cell.num_herbivores
             num_carnivores += cell.num_carnivores
@@ -173,7 +248,7 @@ class CreateIsland:
         for line in map_list:
             coord_y = 1
             for type_landscape in line:
-                island_map[(coord_x, coord_y)] = self.map_params_dict[type_landscape]()
+                island_map[(coord_x, coord_y)] = self.map_params_dict[type_landscape](self.rng)
                 coord_y += 1
             coord_x += 1
 
@@ -197,37 +272,82 @@ class CreateIsland:
 
         for map_location in population:
             loc = map_location['loc']  # Gets a coordinate X: (1, 1)
-            if loc not in self.map.keys():  # Checks if (1,1) is key in self.map
+            if not self.grid.contains(loc):
                 raise ValueError("Location does not exist")
-            if not self.map[loc].accessibility:
+            if not self.grid.accessible[loc[0] - 1, loc[1] - 1]:
                 raise ValueError("Animals not allowed to enter Water")
 
             pop = map_location['pop']  # Takes out 'pop' as key and gets the value
-            self.map[loc].animals_allocate(pop)  # puts animal in location_cell in landscape.py file
+            if self.engine is not None:
+                self.engine.add_animals(loc, pop)
+            else:
+                # puts animal in location_cell in landscape.py file
+                self.map[loc].animals_allocate(pop)
+                self.update_cell_count(self.grid.cell_index(loc), self.map[loc])
+
+    def update_cell_count(self, index, cell):
+        """
+        Copies the number of animals in a cell of the object backend to the count arrays
+        of the grid.
+
+        Parameters
+        ----------
+        index : int
+            Flat index of the cell in the grid.
+        cell : SingleCell
+        """
+
+        self._herb_count[index] = cell.num_herbivores
+        self._carn_count[index] = cell.num_carnivores
+
+    def occupied_cells(self):
+        """
+        Flat indices of the cells with at least one animal, in the order of the map.
+
+        Returns
+        -------
+        occupied : list
+        """
+
+        return ((self._herb_count + self._carn_count) > 0).nonzero()[0].tolist()
 
     def feed_animal(self):
         """
-        Calls eat in all cells of the map.
+        Calls eat in all occupied cells of the map.
         Fodder grows and herbivores and carnivores gets to eat.
 
         Methods
         -------
         SingleCell.eat()
         """
-        for cell in self.map.values():
+        if self.engine is not None:
+            self.engine.feed()
+            return
+
+        cells = self._cells
+        for index in self.occupied_cells():
+            cell = cells[index]
             cell.eat()  # X: Lowland.eat() and lowland- fodder grows and all animals eat.
+            self._herb_count[index] = cell.num_herbivores
 
     def procreation_animals(self):
         """
-        Calls procreate in all cells of the map.
+        Calls procreate in all occupied cells of the map.
 
         Methods
         -------
         SingleCell.procreation()
         """
 
-        for cell in self.map.values():
+        if self.engine is not None:
+            self.engine.procreation()
+            return
+
+        cells = self._cells
+        for index in self.occupied_cells():
+            cell = cells[index]
             cell.procreation()
+            self.update_cell_count(index, cell)
 
     def add_migrated_herb_to_new_cell(self, new_loc, herbivore):
         """
@@ -240,6 +360,7 @@ class CreateIsland:
         """
 
         self.map[new_loc].add_herb_migrated(herbivore)
+        self._herb_count[self.grid.cell_index(new_loc)] += 1
 
     def add_migrated_carn_to_new_cell(self, new_loc, carnivore):
         """
@@ -252,11 +373,14 @@ class CreateIsland:
         """
 
         self.map[new_loc].add_carn_migrated(carnivore)
+        self._carn_count[self.grid.cell_index(new_loc)] += 1
 
     def migration_neighboring_cells(self, loc):
         """
         Finds the cells adjacent to the current cell.
         Meaning the cells located north, east, west and south from current cell.
+        The neighbours come from the precomputed table of the grid and are cached,
+        so they are only built once per cell.
 
         Parameters
         ----------
@@ -269,53 +393,68 @@ class CreateIsland:
             Contains location and landscape type of adjacent cells.
         """
 
-        coord_x, coord_y = loc
-
-        cell_1 = (coord_x - 1, coord_y)
-        cell_2 = (coord_x + 1, coord_y)
-        cell_3 = (coord_x, coord_y - 1)
-        cell_4 = (coord_x, coord_y + 1)
-
-        type_1 = self.map[cell_1]
-        type_2 = self.map[cell_2]
-        type_3 = self.map[cell_3]
-        type_4 = self.map[cell_4]
+        if loc not in self._neighboring_cells:
+            self._neighboring_cells[loc] = [(neighbor, self.map[neighbor]) for neighbor in
+                                            self.grid.neighbour_locations(loc)]
 
-        neighbor_cells = [(cell_1, type_1), (cell_2, type_2), (cell_3, type_3), (cell_4, type_4)]
-
-        return neighbor_cells
+        return self._neighboring_cells[loc]
 
     def migration_animals(self):
         """
-        Checks each cell in the map if it is accessible for the animals, and if the condition is
-        met it finds the cells' neighbors. It then calls migrate method from SingleCell and
-        returns the herbivores and carnivores, if any, that has migrated to a new cell.
+        Checks each occupied cell in the map if it is accessible for the animals, and if the
+        condition is met it finds the cells' neighbors. It then calls migrate method from
+        SingleCell and returns the herbivores and carnivores, if any, that has migrated to a
+        new cell.
         In migrate method in SingleCell the migrated animal gets deleted from that cell.
-        The migrated animal gets added to the new cell that was selected randomly.
+
+        The migrated animals are only added to their new cells after every cell has been
+        handled, so the whole island is migrated in one linear pass and no animal can move
+        twice in the same year.
 
         Methods
         -------
         SingleCell.migrate()
+
+        Returns
+        -------
+        num_migrated : int
+            Number of animals that moved to another cell.
         """
 
-        for loc, cell in self.map.items():
+        if self.engine is not None:
+            return self.engine.migration()
+
+        num_migrated = 0
+        emigrants = []
+        for index in self.occupied_cells():
+            cell = self._cells[index]
             if cell.accessibility is True:
-                neighboring_cells = self.migration_neighboring_cells(loc)
-                migrated_herb, migrated_carn = cell.migrate(neighboring_cells)
+                neighboring_cells = self.migration_neighboring_cells(self._locations[index])
+                emigrants.append(cell.migrate(neighboring_cells))
+                self.update_cell_count(index, cell)
+
+        for migrated_herb, migrated_carn in emigrants:
+            num_migrated += len(migrated_herb) + len(migrated_carn)
+            for new_loc, herb in migrated_herb:
+                self.add_migrated_herb_to_new_cell(new_loc, herb)
 
-                for new_loc, herb in migrated_herb:
-                    self.add_migrated_herb_to_new_cell(new_loc, herb)
+            for new_loc, carn in migrated_carn:
+                self.add_migrated_carn_to_new_cell(new_loc, carn)
 
-                for new_loc, carn in migrated_carn:
-                    self.add_migrated_carn_to_new_cell(new_loc, carn)
+        return num_migrated
 
     def new_year_reset(self):
         """
         Updates the migration to False for all animals when new year starts.
         """
 
-        for cell in self.map.values():
-            for herbivore in cell.present_carnivores:
+        if self.engine is not None:
+            return
+
+        cells = self._cells
+        for index in self.occupied_cells():
+            cell = cells[index]
+            for herbivore in cell.present_herbivores:
                 herbivore.set_migration_false()
 
             for carnivore in cell.present_carnivores:
@@ -325,15 +464,32 @@ class CreateIsland:
         """
         Every year, increment the age of every animal by 1 and reduce the weight of the animal.
         """
-        for cell in self.map.values():
-            cell.aging()
+        if self.engine is not None:
+            self.engine.aging()
+            return
+
+        cells = self._cells
+        for index in self.occupied_cells():
+            cells[index].aging()
 
     def death_animals(self):
         """
-        Calls animal_death in all cells on the map.
+        Calls animal_death in all occupied cells on the map.
+
+        Returns
+        -------
+        num_dead : int
         """
-        for cell in self.map.values():
-            cell.animal_death()
+        if self.engine is not None:
+            return self.engine.death()
+
+        num_dead = 0
+        cells = self._cells
+        for index in self.occupied_cells():
+            cell = cells[index]
+            num_dead += cell.animal_death()
+            self.update_cell_count(index, cell)
+        return num_dead
 
     @property
     def year(self):
@@ -353,6 +509,9 @@ class CreateIsland:
         carn_weight_list : list
         """
 
+        if self.engine is not None:
+            return self.engine.herbivores.weight.tolist(), self.engine.carnivores.weight.tolist()
+
         herb_weight_list = []
         carn_weight_list = []
         for cell in self.map.values():
@@ -375,6 +534,9 @@ class CreateIsland:
         carn_age_list : list
         """
 
+        if self.engine is not None:
+            return self.engine.herbivores.age.tolist(), self.engine.carnivores.age.tolist()
+
         herb_age_list = []
         carn_age_list = []
 
@@ -398,6 +560,9 @@ class CreateIsland:
         carn_age_list : list
         """
 
+        if self.engine is not None:
+            return self.engine.herbivores.phi.tolist(), self.engine.carnivores.phi.tolist()
+
         herb_fitness_list = []
         carn_fitness_list = []
 
@@ -411,6 +576,21 @@ class CreateIsland:
 
         return herb_fitness_list, carn_fitness_list
 
+    def animal_counts(self):
+        """
+        Number of herbivores and carnivores in every cell.
+        The counts are kept up to date as animals are added, born, killed, die and migrate,
+        so this returns the count arrays of the grid without copying them.
+
+        Returns
+        -------
+        herb_counts : ndarray
+            2-D array, herb_counts[row - 1, col - 1] is the number in cell (row, col).
+        carn_counts : ndarray
+        """
+
+        return self.grid.herb_count, self.grid.carn_count
+
     def simulate_one_year(self):
         """
         Simulates a whole year by the following sequence.
@@ -420,7 +600,10 @@ class CreateIsland:
         num_animals_per_species : dict
         """
 
-        # self.new_year_reset()
+        if self.metrics is not None:
+            return self._simulate_one_year_measured()
+
+        self.new_year_reset()
         self.feed_animal()
         self.procreation_animals()
         self.migration_animals()
@@ -429,3 +612,52 @@ class CreateIsland:
         self.year += 1
 
         return self.num_animals_per_species
+
+    def _simulate_one_year_measured(self):
+        """
+        Same as simulate_one_year, and gives the time of every phase and the number of
+        births, deaths, kills and migrations to self.metrics. The numbers come from the
+        count arrays of the grid, which are up to date after every phase.
+        """
+
+        timer = time.perf_counter
+        seconds = {}
+
+        start = timer()
+        self.new_year_reset()
+        seconds['new_year_reset'] = timer() - start
+
+        herbivores = self._herb_count.sum()
+        start = timer()
+        self.feed_animal()
+        seconds['feed_animal'] = timer() - start
+        kills = herbivores - self._herb_count.sum()
+
+        herbivores, carnivores = self._herb_count.sum(), self._carn_count.sum()
+        start = timer()
+        self.procreation_animals()
+        seconds['procreation_animals'] = timer() - start
+        births = {'Herbivore': int(self._herb_count.sum() - herbivores),
+                  'Carnivore': int(self._carn_count.sum() - carnivores)}
+
+        start = timer()
+        migrations = self.migration_animals()
+        seconds['migration_animals'] = timer() - start
+
+        start = timer()
+        self.aging_animals()
+        seconds['aging_animals'] = timer() - start
+
+        herbivores = self._herb_count.sum()
+        start = timer()
+        num_dead = self.death_animals()
+        seconds['death_animals'] = timer() - start
+        herb_deaths = int(herbivores - self._herb_count.sum())
+        deaths = {'Herbivore': herb_deaths, 'Carnivore': int(num_dead) - herb_deaths}
+
+        self.year += 1
+        self.metrics.record({'year': self.year, 'seconds': seconds, 'births': births,
+                             'deaths': deaths, 'kills': int(kills),
+                             'migrations': int(migrations)})
+
+        return self.num_animals_per_species
@@ -7,13 +7,18 @@ __email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
 File with classes for the different kinds of landscapes the map contains. 
 """
 
-from biosim.animals import Carnivore, Herbivore
+from biosim.animals import Animals, Carnivore, Herbivore
+from biosim.parameters import PerSimulationType
+from math import ceil
+from operator import attrgetter
 import random
 
 
-class SingleCell:
+class SingleCell(metaclass=PerSimulationType):
 
     params_dict = None
+    species = {"Herbivore": Herbivore,
+               "Carnivore": Carnivore}
 
     @classmethod
     def cell_parameter(cls, parameter, accessibility=None):
@@ -42,19 +47,57 @@ class SingleCell:
                 raise TypeError("This specific parameter not defined for this cell")
         cls.params_dict.update(parameter)
 
-    def __init__(self):
+    @classmethod
+    def per_simulation_class(cls, species, params_dict=None):
+        """
+        Subclass with its own copy of the parameters, whose animals are of the given classes.
+        BioSim uses one for each landscape type, so the parameters of one simulation do not
+        change those of another. Desert and Water keep their parameters in params, which
+        becomes the same dict as params_dict.
+
+        Parameters
+        ----------
+        species : dict
+            Key: 'Herbivore' and 'Carnivore' - Value: class of the animals.
+        params_dict : dict, optional
+            Parameters of the subclass. Defaults to those of cls.
+
+        Returns
+        -------
+        landscape : class
+        """
+
+        if params_dict is None:
+            params_dict = cls.params_dict if cls.params_dict is not None else cls.params
+        own_params = dict(params_dict)
+        attributes = {'params_dict': own_params, 'species': species,
+                      '_per_simulation_args': (species, own_params),
+                      '__module__': cls.__module__}
+        if getattr(cls, 'params', None) is not None:
+            attributes['params'] = own_params
+        return type(cls.__name__, (cls,), attributes)
+
+    def __init__(self, rng=None):
         """
         A superclass for the properties of a single cell on an island.
         The different types of landscape inherits from this class.
         Initializes the cell and creates empty lists for herbivores and carnivores.
 
+        Parameters
+        ----------
+        rng : random.Random or BlockRandom, optional
+            Random number generator of the simulation, passed on to the animals.
+            Defaults to the random module.
+
         Attributes
         ----------
         self.available_fodder : float
         self.present_herbivores : list
         self.present_carnivore : list
+        self.rng : random.Random, BlockRandom or the random module
         """
 
+        self.rng = random if rng is None else rng
         self.available_fodder = 0
         self.present_herbivores = []
         self.present_carnivores = []
@@ -89,9 +132,9 @@ class SingleCell:
             age = animal["age"]
             weight = animal["weight"]
             if species == "Herbivore":
-                self.present_herbivores.append(Herbivore(age, weight))
+                self.present_herbivores.append(self.species["Herbivore"](age, weight, self.rng))
             elif species == "Carnivore":
-                self.present_carnivores.append(Carnivore(age, weight))
+                self.present_carnivores.append(self.species["Carnivore"](age, weight, self.rng))
             else:
                 raise TypeError("This animal is not a valid animal")
 
@@ -117,13 +160,39 @@ class SingleCell:
     def feed_herb(self):
         """
         Method to feed herbivores randomly with fodder.
+
+        Herbivores eating one at a time in random order until the fodder is gone means that
+        ceil(fodder / F) of them get to eat, chosen at random. All but the last one eat F,
+        the last one eats what is left. So the eaters are drawn in one rng.sample, their
+        weights are updated in one pass and their fitness in one batch, without shuffling
+        or visiting the herbivores that do not eat.
         """
 
-        random.shuffle(self.present_herbivores)
-        for herb in self.present_herbivores:
-            if self.available_fodder > 0:
-                eaten = herb.feeding(self.available_fodder)
-                self.available_fodder -= eaten
+        herbs = self.present_herbivores
+        if not herbs or self.available_fodder <= 0:
+            return
+
+        constants = type(herbs[0]).constants
+        appetite = constants.F
+        if appetite <= 0:
+            return
+
+        num_eaters = min(len(herbs), ceil(self.available_fodder / appetite))
+        eaters = self.rng.sample(herbs, num_eaters)
+
+        gain = constants.max_gain
+        for herb in eaters[:-1]:
+            herb.weight += gain
+            herb.eaten = appetite
+
+        last = eaters[-1]
+        last_meal = min(appetite, self.available_fodder - (num_eaters - 1) * appetite)
+        last.weight += constants.beta * last_meal
+        last.eaten = last_meal
+        self.available_fodder = max(0, self.available_fodder - (num_eaters - 1) * appetite
+                                    - last_meal)
+
+        Animals.update_fitness(eaters)
 
     def feed_carn_with_herb(self):
         """
@@ -131,49 +200,54 @@ class SingleCell:
         individual animals' fitness, carnivores from highest to lowest and herbivores from
         lowest to highest. Carnivores with highest fitness get to first try to kill the
         herbivore with the least amount of fitness.
+
+        The herbivores are sorted once. Their fitness does not change while the carnivores
+        hunt, so the order stays valid and only the kills leave it. A kill is removed in O(1)
+        by its alive flag, and the list is compacted when half of it is dead herbivores.
         """
 
-        self.present_herbivores = sorted(self.present_herbivores, key=lambda x: getattr(x, 'phi'))
-        self.present_carnivores = sorted(self.present_carnivores, key=lambda x: getattr(x, 'phi'),
-                                         reverse=True)
+        self.present_herbivores.sort(key=attrgetter('phi'))
+        self.present_carnivores.sort(key=attrgetter('phi'), reverse=True)
 
+        herbs = self.present_herbivores
+        killed = []
+        num_dead = 0
         for carn in self.present_carnivores:
-            if len(self.present_herbivores) > 0:
-                dead_herbs = carn.hunt_herb(self.present_herbivores)
-                self.present_herbivores = list(set(self.present_herbivores) - set(dead_herbs))
-                self.present_herbivores = sorted(self.present_herbivores,
-                                                 key=lambda x: getattr(x, 'phi'))
+            if num_dead == len(herbs):
+                break
+            dead_herbs = carn.hunt_herb(herbs, self.rng)
+            killed.extend(dead_herbs)
+            num_dead += len(dead_herbs)
+            if 2 * num_dead > len(herbs):
+                herbs = [herb for herb in herbs if herb.alive]
+                num_dead = 0
+
+        if num_dead > 0:
+            herbs = [herb for herb in herbs if herb.alive]
+        self.present_herbivores = herbs
+        Animals.release(killed)
 
     def procreation(self):
         """
         Checks if there are at least two other animal of the same species in this cell.
         If it is, an offspring might occur.
-        """
 
-        herb_newbord = []
-        carn_newbord = []
-
-        if len(self.present_herbivores) >= 2:
-            for herbivores in self.present_herbivores:
-                offspring = herbivores.procreation(len(self.present_herbivores))
-                if not offspring:
-                    continue
-                herb_newbord.append(offspring)
-            self.present_herbivores.extend(herb_newbord)
+        All births of a species are handled in one batch by Animals.batch_procreation,
+        and the newborns are appended after the parents.
+        """
 
-        if len(self.present_carnivores) >= 2:
-            for carnivores in self.present_carnivores:
-                offspring = carnivores.procreation(len(self.present_carnivores))
-                if not offspring:
-                    continue
-                carn_newbord.append(offspring)
-            self.present_carnivores.extend(carn_newbord)
+        for animals in (self.present_herbivores, self.present_carnivores):
+            if len(animals) >= 2:
+                animals.extend(type(animals[0]).batch_procreation(animals, self.rng))
 
     def migrate(self, neighboring_cells):
         """
-        Input is the four adjacent cells. The method uses random.choice to choose a cell, if
-        restrictions are not met. If the chosen cell is water, the animals will not migrate
-        that year.
+        Input is the four adjacent cells. The method decides for every animal if it migrates,
+        and draws the destination of all migrating animals at once with rng.choices.
+        If the chosen cell is water, the animals will not migrate that year.
+
+        The migrating animals are removed from this cell in one linear pass, the caller
+        is responsible for adding them to their new cells.
 
         Parameters
         ----------
@@ -182,41 +256,53 @@ class SingleCell:
         Returns
         -------
         migrated_herb : list
+            Tuples of new location and herbivore.
         migrated_carn : list
+            Tuples of new location and carnivore.
         """
 
-        migrated_herb = []
-        migrated_carn = []
+        self.present_herbivores, migrated_herb = self.split_migrating(self.present_herbivores,
+                                                                      neighboring_cells,
+                                                                      self.rng)
+        self.present_carnivores, migrated_carn = self.split_migrating(self.present_carnivores,
+                                                                      neighboring_cells,
+                                                                      self.rng)
 
-        for herb in self.present_herbivores:
-            if not herb.has_migrated and herb.prob_migrate():
-                chosen_cell = random.choice(neighboring_cells)
-                new_loc = chosen_cell[0]
-                landscape_type = chosen_cell[1]
-                if isinstance(landscape_type, Water):
-                    continue
-                else:
-                    migrated_herb.append((new_loc, herb))
-            herb.set_migration_true()
+        return migrated_herb, migrated_carn
 
-        self.present_herbivores = [herb for herb in self.present_herbivores
-                                   if herb not in migrated_herb]
+    @staticmethod
+    def split_migrating(animals, neighboring_cells, rng=random):
+        """
+        Splits a list of animals in those who stay and those who migrate.
 
-        for carn in self.present_carnivores:
-            if not carn.has_migrated and carn.prob_migrate():
-                chosen_cell = random.choice(neighboring_cells)
-                new_loc = chosen_cell[0]
-                landscape_type = chosen_cell[1]
-                if isinstance(landscape_type, Water):
-                    continue
-                else:
-                    migrated_carn.append((new_loc, carn))
-            carn.set_migration_true()
+        Parameters
+        ----------
+        animals : list
+        neighboring_cells : list
+        rng : random.Random, BlockRandom or the random module
 
-        self.present_carnivores = [carn for carn in self.present_carnivores
-                                   if carn not in migrated_carn]
+        Returns
+        -------
+        staying : list
+        migrating : list
+            Tuples of new location and animal.
+        """
+
+        wants_to_move = [animal.prob_migrate(rng) for animal in animals]
+        destinations = iter(rng.choices(neighboring_cells, k=sum(wants_to_move)))
+
+        staying = []
+        migrating = []
+        for animal, moves in zip(animals, wants_to_move):
+            if moves:
+                new_loc, landscape_type = next(destinations)
+                if landscape_type.accessibility:
+                    animal.set_migration_true()
+                    migrating.append((new_loc, animal))
+                    continue
+            staying.append(animal)
 
-        return migrated_herb, migrated_carn
+        return staying, migrating
 
     def add_herb_migrated(self, herb):
         """
@@ -267,22 +353,28 @@ class SingleCell:
         """
 
         for herbivore in self.present_herbivores:
-            herbivore.growing_older()
+            herbivore.growing_older(update_fitness=False)
+        Herbivore.update_fitness(self.present_herbivores)
 
         for carnivore in self.present_carnivores:
-            carnivore.growing_older()
+            carnivore.growing_older(update_fitness=False)
+        Carnivore.update_fitness(self.present_carnivores)
 
     def animal_death(self):
         """
         Checks if animal dies. If it dies, the method removes the animal from the
-        list of current animals.
-        """
+        list of current animals and gives it back to the pool of its class.
 
-        self.present_herbivores = [herbivore for herbivore in self.present_herbivores if
-                                   not herbivore.animal_dying()]
+        Returns
+        -------
+        num_dead : int
+        """
 
-        self.present_carnivores = [carnivore for carnivore in self.present_carnivores if
-                                   not carnivore.animal_dying()]
+        num_dead = 0
+        for animals in (self.present_herbivores, self.present_carnivores):
+            if animals:
+                num_dead += type(animals[0]).batch_death(animals, self.rng)
+        return num_dead
 
     def get_fodder(self):
         return self.available_fodder
@@ -311,8 +403,8 @@ class Highland(SingleCell):
     accessibility = True
     params_dict = {"f_max": 300}
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng=None):
+        super().__init__(rng)
         self.available_fodder = self.params_dict["f_max"]
 
     def fodder_regrow(self):
@@ -333,8 +425,8 @@ class Lowland(SingleCell):
     accessibility = True
     params_dict = {"f_max": 800}
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng=None):
+        super().__init__(rng)
         self.available_fodder = self.params_dict["f_max"]
 
     def fodder_regrow(self):
@@ -355,8 +447,8 @@ class Desert(SingleCell):
     accessibility = True
     params = {"f_max": 0}
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng=None):
+        super().__init__(rng)
         self.available_fodder = self.params["f_max"]
 
     def fodder_regrow(self):
@@ -376,8 +468,8 @@ class Water(SingleCell):
     accessibility = False
     params = {"f_max": 0}
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng=None):
+        super().__init__(rng)
         self.available_fodder = self.params["f_max"]
 
     def fodder_regrow(self):
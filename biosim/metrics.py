@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File for measuring the yearly cycle of an island: the time of every phase and the number
+of births, deaths, kills and migrations.
+"""
+
+PHASES = ('new_year_reset', 'feed_animal', 'procreation_animals', 'migration_animals',
+          'aging_animals', 'death_animals')
+
+
+class SimulationMetrics:
+    """
+    Metrics of a CreateIsland, filled in by simulate_one_year when the island has one.
+
+    Every simulated year gives a record, a dict with:
+
+    year : the year that was simulated
+    seconds : dict with the wall time of every phase
+    births : dict with the number of newborns of every species
+    deaths : dict with the number of animals of every species that died of old age,
+        starvation or bad fitness
+    kills : number of herbivores killed by carnivores
+    migrations : number of animals that moved to another cell
+
+    The record is stored in last_year, added to the totals and passed to every callback.
+    """
+
+    def __init__(self, callbacks=None):
+        """
+        Parameters
+        ----------
+        callbacks : list, optional
+            Functions called with the record of every year.
+        """
+
+        self.callbacks = [] if callbacks is None else list(callbacks)
+        self.years = 0
+        self.last_year = None
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.births = {'Herbivore': 0, 'Carnivore': 0}
+        self.deaths = {'Herbivore': 0, 'Carnivore': 0}
+        self.kills = 0
+        self.migrations = 0
+
+    def add_callback(self, callback):
+        """
+        Parameters
+        ----------
+        callback : callable
+            Called with the record of every year.
+        """
+
+        self.callbacks.append(callback)
+
+    def record(self, year_record):
+        """
+        Adds the record of one year to the totals and passes it to the callbacks.
+
+        Parameters
+        ----------
+        year_record : dict
+        """
+
+        self.years += 1
+        self.last_year = year_record
+        for phase, seconds in year_record['seconds'].items():
+            self.phase_seconds[phase] += seconds
+        for species in self.births:
+            self.births[species] += year_record['births'][species]
+            self.deaths[species] += year_record['deaths'][species]
+        self.kills += year_record['kills']
+        self.migrations += year_record['migrations']
+
+        for callback in self.callbacks:
+            callback(year_record)
+
+    @property
+    def total_seconds(self):
+        """
+        Returns
+        -------
+        float
+            Time of all phases of all recorded years.
+        """
+
+        return sum(self.phase_seconds.values())
+
+    def summary(self):
+        """
+        Returns
+        -------
+        summary : dict
+            Totals over all recorded years, with the share of the time of every phase.
+        """
+
+        total = self.total_seconds
+        return {'years': self.years,
+                'seconds': dict(self.phase_seconds),
+                'share': {phase: seconds / total if total else 0.0
+                          for phase, seconds in self.phase_seconds.items()},
+                'births': dict(self.births),
+                'deaths': dict(self.deaths),
+                'kills': self.kills,
+                'migrations': self.migrations}
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File for writing movies by streaming the frames of a figure into ffmpeg.
+"""
+
+import io
+import subprocess
+
+import numpy as np
+
+_FFMPEG_BINARY = "ffmpeg"
+
+_CODEC_ARGS = {
+    "mp4": ["-profile:v", "baseline", "-level", "3.0", "-pix_fmt", "yuv420p",
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"],
+    "gif": ["-vf", "split[frames][copy];[copy]palettegen[palette];[frames][palette]paletteuse",
+            "-loop", "0"],
+}
+
+
+class MovieWriter:
+    """
+    Pushes raw RGBA frames of a figure through one ffmpeg pipe.
+
+    Nothing is written to disk except the movie itself, so there are no images to read back
+    when the movie is made.
+    """
+
+    formats = tuple(_CODEC_ARGS)
+
+    def __init__(self, filename, movie_fmt="mp4", fps=5, ffmpeg_binary=_FFMPEG_BINARY):
+        """
+        Parameters
+        ----------
+        filename : str
+            Name of the movie without the file extension.
+        movie_fmt : str
+            'mp4' or 'gif'
+        fps : int
+            Frames per second of the movie.
+        ffmpeg_binary : str
+
+        Raises
+        -------
+        ValueError
+            If the movie format is unknown.
+        """
+
+        if movie_fmt not in _CODEC_ARGS:
+            raise ValueError("Unknown movie format: " + movie_fmt)
+
+        self.filename = "{}.{}".format(filename, movie_fmt)
+        self.movie_fmt = movie_fmt
+        self.fps = fps
+        self.ffmpeg_binary = ffmpeg_binary
+        self.num_frames = 0
+        self._process = None
+        self._frame_shape = None
+
+    @staticmethod
+    def frame_buffer(figure):
+        """
+        Current RGBA pixels of the figure as an array of shape (height, width, 4).
+
+        Agg based canvases are read directly, others are rendered to memory with savefig.
+
+        Parameters
+        ----------
+        figure : matplotlib.figure.Figure
+
+        Returns
+        -------
+        frame : ndarray
+        """
+
+        canvas = figure.canvas
+        if hasattr(canvas, "buffer_rgba"):
+            if getattr(canvas, "renderer", None) is None:
+                canvas.draw()
+            return np.asarray(canvas.buffer_rgba())
+
+        width, height = canvas.get_width_height()
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format="rgba", dpi=figure.dpi)
+        return np.frombuffer(buffer.getvalue(), dtype=np.uint8).reshape(height, width, 4)
+
+    def command(self, input_args):
+        """
+        The ffmpeg command encoding the given input to the movie.
+
+        Parameters
+        ----------
+        input_args : list
+            ffmpeg arguments describing the input, ending with '-i' and the source.
+
+        Returns
+        -------
+        command : list
+        """
+
+        return ([self.ffmpeg_binary, "-y", "-loglevel", "error"] + input_args +
+                _CODEC_ARGS[self.movie_fmt] + [self.filename])
+
+    def stream_command(self, width, height):
+        """
+        The ffmpeg command reading raw RGBA frames of the given size from stdin.
+
+        Parameters
+        ----------
+        width : int
+        height : int
+
+        Returns
+        -------
+        command : list
+        """
+
+        return self.command(["-f", "rawvideo", "-pix_fmt", "rgba",
+                             "-s", "{}x{}".format(width, height),
+                             "-framerate", str(self.fps), "-i", "-"])
+
+    def encode_images(self, pattern):
+        """
+        Makes the movie from images that are already saved.
+
+        Parameters
+        ----------
+        pattern : str
+            ffmpeg file pattern of the images, e.g. 'dv_%05d.png'
+
+        Returns
+        -------
+        filename : str
+
+        Raises
+        -------
+        RuntimeError
+            If ffmpeg failed.
+        """
+
+        try:
+            subprocess.check_call(self.command(["-framerate", str(self.fps), "-i", pattern]))
+        except (OSError, subprocess.CalledProcessError) as err:
+            raise RuntimeError("ERROR: ffmpeg failed with: {}".format(err))
+        return self.filename
+
+    def _open(self, frame):
+        height, width = frame.shape[:2]
+        self._frame_shape = frame.shape
+        try:
+            self._process = subprocess.Popen(self.stream_command(width, height),
+                                             stdin=subprocess.PIPE,
+                                             stderr=subprocess.PIPE)
+        except OSError as err:
+            raise RuntimeError("ERROR: could not start ffmpeg: {}".format(err))
+
+    def write_frame(self, figure):
+        """
+        Sends the current frame of the figure to ffmpeg. The pipe is opened on the first
+        frame, when the size of the frames is known.
+
+        Parameters
+        ----------
+        figure : matplotlib.figure.Figure
+
+        Raises
+        -------
+        RuntimeError
+            If ffmpeg cannot be started, has stopped, or the figure changed size.
+        """
+
+        frame = self.frame_buffer(figure)
+        if self._process is None:
+            self._open(frame)
+        elif frame.shape != self._frame_shape:
+            raise RuntimeError("ERROR: the figure changed size from {} to {} while writing "
+                               "the movie".format(self._frame_shape, frame.shape))
+
+        try:
+            self._process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            self.close()
+            raise RuntimeError("ERROR: ffmpeg stopped before the movie was finished")
+        self.num_frames += 1
+
+    def close(self):
+        """
+        Closes the pipe and waits for ffmpeg to finish the movie.
+
+        Returns
+        -------
+        filename : str or None
+            The movie, or None if no frame was written.
+
+        Raises
+        -------
+        RuntimeError
+            If ffmpeg failed.
+        """
+
+        if self._process is None:
+            return None
+
+        process, self._process = self._process, None
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        error = process.stderr.read()
+        process.stderr.close()
+        if process.wait() != 0:
+            raise RuntimeError("ERROR: ffmpeg failed with: {}".format(
+                error.decode(errors="replace")))
+        return self.filename
+
+    @property
+    def is_open(self):
+        return self._process is not None
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File with the immutable parameters of a species, read by the animals in the yearly loop,
+and the metaclass that lets the per-simulation classes of the animals and landscapes be
+pickled.
+"""
+
+from collections import namedtuple
+import copyreg
+
+_FIELDS = ('w_birth', 'sigma_birth', 'beta', 'eta', 'a_half', 'phi_age', 'w_half',
+           'phi_weight', 'mu', 'gamma', 'zeta', 'xi', 'omega', 'F', 'DeltaPhiMax')
+
+_DERIVED = ('birth_threshold', 'max_gain', 'inv_delta_phi_max')
+
+
+class AnimalParameters(namedtuple('AnimalParameters', _FIELDS + _DERIVED,
+                                  defaults=(None,) * (len(_FIELDS) + len(_DERIVED)))):
+    """
+    Parameters of one species as an immutable object with attribute access, together with
+    constants derived from them:
+
+    birth_threshold : zeta * (w_birth + sigma_birth), the weight needed to give birth
+    max_gain : beta * F, the largest weight gain of one meal
+    inv_delta_phi_max : 1 / DeltaPhiMax, None for species that do not hunt
+
+    A new object is made whenever the parameters of the species change, so an object that
+    is read during a year never changes.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, params_dict):
+        """
+        Parameters
+        ----------
+        params_dict : dict
+            Parameters of the species, as in Herbivore.params_dict.
+
+        Returns
+        -------
+        parameters : AnimalParameters
+        """
+
+        params = {name: params_dict[name] for name in _FIELDS if name in params_dict}
+        params['birth_threshold'] = params['zeta'] * (params['w_birth'] + params['sigma_birth'])
+        params['max_gain'] = params['beta'] * params['F']
+        if params.get('DeltaPhiMax'):
+            params['inv_delta_phi_max'] = 1 / params['DeltaPhiMax']
+        return cls(**params)
+
+
+class PerSimulationType(type):
+    """
+    Metaclass of Animals and SingleCell.
+
+    pickle finds a class by its module and name, which for a class made by
+    per_simulation_class gives the class it was made from. Such a class keeps the arguments
+    it was made with in _per_simulation_args, the parameters being the same dict as its
+    params_dict, and is pickled as its base class and those arguments, so it is made again
+    by per_simulation_class when unpickled. The base classes are pickled by name as usual.
+    """
+
+
+def _make_per_simulation_class(base, args):
+    return base.per_simulation_class(*args)
+
+
+def _reduce_class(cls):
+    if '_per_simulation_args' not in cls.__dict__:
+        return cls.__qualname__
+    return _make_per_simulation_class, (cls.__base__, cls._per_simulation_args)
+
+
+copyreg.pickle(PerSimulationType, _reduce_class)
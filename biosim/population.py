@@ -0,0 +1,505 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File with the struct-of-arrays population backend.
+All animals of one species on the island are stored as NumPy columns together with the
+index of the cell they live in, and the yearly phases work on whole columns at a time.
+"""
+
+import random
+
+import numpy as np
+
+from biosim.animals import Animals, Herbivore, Carnivore
+
+
+class Population:
+    """
+    Struct-of-arrays storage of all animals of one species on the island.
+
+    Every animal is one row in the columns cell, age, weight, phi, alive and has_migrated.
+    The columns are preallocated and grow by doubling, so adding animals is amortised O(1).
+    """
+
+    def __init__(self, species, capacity=64, cell_count=None):
+        """
+        Parameters
+        ----------
+        species : class
+            Herbivore or Carnivore, the parameters are read from species.constants.
+        capacity : int
+            Number of rows allocated from the start.
+        cell_count : ndarray, optional
+            Flat array with the number of animals in every cell. If given, it is kept up to
+            date as animals are added, removed and moved.
+        """
+
+        self.species = species
+        self.size = 0
+        self.cell_count = cell_count
+
+        self._cell = np.zeros(capacity, dtype=np.int64)
+        self._age = np.zeros(capacity, dtype=np.int64)
+        self._weight = np.zeros(capacity, dtype=float)
+        self._phi = np.zeros(capacity, dtype=float)
+        self._alive = np.ones(capacity, dtype=bool)
+        self._has_migrated = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return f'Population: {self.species.__name__}, Size: {self.size}'
+
+    @property
+    def constants(self):
+        return self.species.constants
+
+    @property
+    def cell(self):
+        return self._cell[:self.size]
+
+    @property
+    def age(self):
+        return self._age[:self.size]
+
+    @property
+    def weight(self):
+        return self._weight[:self.size]
+
+    @property
+    def phi(self):
+        return self._phi[:self.size]
+
+    @property
+    def alive(self):
+        return self._alive[:self.size]
+
+    @property
+    def has_migrated(self):
+        return self._has_migrated[:self.size]
+
+    def _reserve(self, extra):
+        """
+        Makes room for extra rows by doubling the capacity of all columns.
+
+        Parameters
+        ----------
+        extra : int
+        """
+
+        capacity = len(self._cell)
+        if self.size + extra <= capacity:
+            return
+
+        while capacity < self.size + extra:
+            capacity *= 2
+
+        for name in ('_cell', '_age', '_weight', '_phi', '_alive', '_has_migrated'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add(self, cells, ages, weights):
+        """
+        Appends animals to the population and calculates their fitness.
+
+        Parameters
+        ----------
+        cells : array_like
+            Cell index of every new animal.
+        ages : array_like
+        weights : array_like
+        """
+
+        cells = np.asarray(cells, dtype=np.int64)
+        num_new = len(cells)
+        if num_new == 0:
+            return
+
+        self._reserve(num_new)
+        new = slice(self.size, self.size + num_new)
+        self._cell[new] = cells
+        self._age[new] = ages
+        self._weight[new] = weights
+        self._alive[new] = True
+        self._has_migrated[new] = False
+        self._phi[new] = Animals.batch_fitness(self._age[new], self._weight[new],
+                                               self.constants)
+        self.size += num_new
+
+        if self.cell_count is not None:
+            np.add.at(self.cell_count, cells, 1)
+
+    def fitness_calculation(self, index=None):
+        """
+        Recalculates the fitness of the whole population, or only of the given rows.
+
+        Parameters
+        ----------
+        index : array_like, optional
+            Rows to recalculate.
+        """
+
+        if index is None:
+            self.phi[:] = Animals.batch_fitness(self.age, self.weight, self.constants)
+        else:
+            self._phi[index] = Animals.batch_fitness(self._age[index], self._weight[index],
+                                                     self.constants)
+
+    def keep(self, mask):
+        """
+        Compacts the population in place so that only the rows where mask is True are kept.
+        The relative order of the kept animals is preserved.
+
+        Parameters
+        ----------
+        mask : ndarray
+            Boolean array of length len(self).
+        """
+
+        mask = np.array(mask, dtype=bool)
+        num_kept = int(np.count_nonzero(mask))
+        if num_kept == self.size:
+            return
+
+        if self.cell_count is not None:
+            np.subtract.at(self.cell_count, self.cell[~mask], 1)
+
+        for name in ('_cell', '_age', '_weight', '_phi', '_alive', '_has_migrated'):
+            column = getattr(self, name)
+            column[:num_kept] = column[:self.size][mask]
+        self.size = num_kept
+
+    def move(self, index, new_cells):
+        """
+        Moves animals to new cells.
+
+        Parameters
+        ----------
+        index : ndarray
+            Rows of the animals that move.
+        new_cells : ndarray
+            Cell index of the destination of every moving animal.
+        """
+
+        if self.cell_count is not None:
+            np.subtract.at(self.cell_count, self._cell[index], 1)
+            np.add.at(self.cell_count, new_cells, 1)
+        self._cell[index] = new_cells
+
+    def counts(self, num_cells):
+        """
+        Number of animals in every cell.
+
+        Parameters
+        ----------
+        num_cells : int
+
+        Returns
+        -------
+        counts : ndarray
+        """
+
+        return np.bincount(self.cell, minlength=num_cells)
+
+
+class ArrayEngine:
+    """
+    Runs the yearly cycle of an island on Population columns instead of animal objects.
+
+    The animals refer to cells by the flat index of the IslandGrid, and the fodder of the
+    grid is used directly.
+    The phases keep the order and the rules of SingleCell, but every animal is handled
+    in one pass over the island.
+    """
+
+    species = {"Herbivore": Herbivore,
+               "Carnivore": Carnivore}
+
+    def __init__(self, grid, rng=None, species=None):
+        """
+        Parameters
+        ----------
+        grid : IslandGrid
+        rng : numpy.random.Generator, optional
+            Defaults to a generator seeded from the random module, so that seeding random
+            makes the engine reproducible.
+        species : dict, optional
+            Key: 'Herbivore' and 'Carnivore' - Value: class with the parameters of the
+            species. Defaults to the class attribute species.
+        """
+
+        if rng is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+        self.rng = rng
+        if species is not None:
+            self.species = species
+
+        self.grid = grid
+        self.num_cells = grid.num_cells
+        self.fodder = grid.fodder.reshape(-1)
+        self.accessible = grid.accessible.reshape(-1)
+        self.neighbours = grid.neighbours
+
+        self.herbivores = Population(self.species["Herbivore"],
+                                     cell_count=grid.herb_count.reshape(-1))
+        self.carnivores = Population(self.species["Carnivore"],
+                                     cell_count=grid.carn_count.reshape(-1))
+
+    def __setstate__(self, state):
+        """
+        Pickle copies the flat views of the arrays of the grid, so they are made again.
+        """
+
+        self.__dict__.update(state)
+        self.fodder = self.grid.fodder.reshape(-1)
+        self.accessible = self.grid.accessible.reshape(-1)
+        self.herbivores.cell_count = self.grid.herb_count.reshape(-1)
+        self.carnivores.cell_count = self.grid.carn_count.reshape(-1)
+
+    def cell_index(self, loc):
+        """
+        Converts a coordinate to the index of the cell.
+
+        Parameters
+        ----------
+        loc : tuple
+
+        Returns
+        -------
+        index : int
+        """
+
+        return self.grid.cell_index(loc)
+
+    def add_animals(self, loc, ini_animals):
+        """
+        Adds animals to one cell. Same input and errors as SingleCell.animals_allocate.
+
+        Parameters
+        ----------
+        loc : tuple
+        ini_animals : list
+            List of dicts with species, age and weight.
+
+        Raises
+        -------
+        TypeError
+        ValueError
+        """
+
+        index = self.cell_index(loc)
+        new_animals = {"Herbivore": ([], []), "Carnivore": ([], [])}
+
+        for animal in ini_animals:
+            species = animal["species"]
+            if species not in new_animals:
+                raise TypeError("This animal is not a valid animal")
+            if animal["age"] < 0:
+                raise ValueError("Age of animal must be positive and integer.")
+            new_animals[species][0].append(animal["age"])
+            new_animals[species][1].append(animal["weight"])
+
+        for population, name in ((self.herbivores, "Herbivore"), (self.carnivores, "Carnivore")):
+            ages, weights = new_animals[name]
+            population.add(np.full(len(ages), index), ages, weights)
+
+    def fodder_regrow(self):
+        """
+        Restores the fodder of every cell to f_max of its landscape type.
+        """
+
+        self.grid.fodder_regrow()
+
+    def feed(self):
+        """
+        Same as SingleCell.eat for every cell: fodder grows, herbivores graze in random order
+        and carnivores hunt herbivores.
+        """
+
+        self.fodder_regrow()
+        self.graze()
+        self.hunt()
+
+    def graze(self):
+        """
+        Herbivores in each cell eat in random order. Since all herbivores have the same
+        appetite F, the herbivore with rank k in its cell eats min(F, fodder - k * F),
+        which is what SingleCell.feed_herb gives when the herbivores eat one at a time.
+        """
+
+        herbs = self.herbivores
+        if len(herbs) == 0:
+            return
+
+        constants = herbs.constants
+        order = np.lexsort((self.rng.random(len(herbs)), herbs.cell))
+        cells = herbs.cell[order]
+        rank = np.arange(len(order)) - np.searchsorted(cells, cells, side='left')
+
+        eaten = np.clip(self.fodder[cells] - rank * constants.F, 0, constants.F)
+        has_eaten = order[eaten > 0]
+        herbs.weight[order] += constants.beta * eaten
+        herbs.fitness_calculation(has_eaten)
+        self.fodder -= np.bincount(cells, weights=eaten, minlength=self.num_cells)
+
+    def hunt(self):
+        """
+        Carnivores hunt cell by cell, the fittest carnivore first, and each carnivore tries
+        the herbivores from the least fit upwards, as in SingleCell.feed_carn_with_herb.
+        """
+
+        herbs = self.herbivores
+        carns = self.carnivores
+        if len(herbs) == 0 or len(carns) == 0:
+            return
+
+        constants = carns.constants
+        appetite = constants.F
+        inv_delta_phi_max = constants.inv_delta_phi_max
+
+        herb_order = np.lexsort((herbs.phi, herbs.cell))
+        carn_order = np.lexsort((-carns.phi, carns.cell))
+        herb_cells = herbs.cell[herb_order]
+        carn_cells = carns.cell[carn_order]
+
+        hunting_cells = np.intersect1d(herb_cells, carn_cells)
+        herb_start = np.searchsorted(herb_cells, hunting_cells, side='left')
+        herb_stop = np.searchsorted(herb_cells, hunting_cells, side='right')
+        carn_start = np.searchsorted(carn_cells, hunting_cells, side='left')
+        carn_stop = np.searchsorted(carn_cells, hunting_cells, side='right')
+
+        for h_0, h_1, c_0, c_1 in zip(herb_start, herb_stop, carn_start, carn_stop):
+            prey = herb_order[h_0:h_1]
+            for carn in carn_order[c_0:c_1]:
+                prey = prey[herbs.alive[prey]]
+                weight_killed_herb = 0.0
+                position = 0
+
+                while position < len(prey) and weight_killed_herb < appetite:
+                    candidates = prey[position:]
+                    phi_difference = carns.phi[carn] - herbs.phi[candidates]
+                    if phi_difference[0] <= 0:
+                        break
+
+                    kill_prob = np.clip(phi_difference * inv_delta_phi_max, 0, 1)
+                    kills = np.flatnonzero(self.rng.random(len(candidates)) <= kill_prob)
+                    if len(kills) == 0:
+                        break
+
+                    position += kills[0]
+                    herb = prey[position]
+                    eat = min(herbs.weight[herb], appetite - weight_killed_herb)
+                    carns.weight[carn] += constants.beta * eat
+                    carns.fitness_calculation([carn])
+                    herbs.alive[herb] = False
+                    weight_killed_herb += eat
+                    position += 1
+
+        herbs.keep(herbs.alive)
+
+    def procreation(self):
+        """
+        Same rules as Animals.procreation: animals in cells with at least two animals of the
+        same species give birth with probability min(1, gamma * phi * (N - 1)) if they are
+        heavy enough, and lose xi times the weight of the offspring.
+        """
+
+        for population in (self.herbivores, self.carnivores):
+            if len(population) < 2:
+                continue
+
+            constants = population.constants
+            same_species = population.cell_count[population.cell]
+            birth_prob = np.minimum(1, constants.gamma * population.phi * (same_species - 1))
+            eligible = (same_species >= 2) & (population.weight >= constants.birth_threshold)
+            parents = np.flatnonzero(eligible &
+                                     (self.rng.random(len(population)) <= birth_prob))
+            if len(parents) == 0:
+                continue
+
+            offspring_weight = self.rng.normal(constants.w_birth, constants.sigma_birth,
+                                               len(parents))
+            population.weight[parents] -= constants.xi * offspring_weight
+            population.fitness_calculation(parents)
+            population.add(population.cell[parents], np.zeros(len(parents)), offspring_weight)
+
+    def migration(self):
+        """
+        Every animal moves with probability mu * phi to one of the four neighbouring cells,
+        chosen at random. If the chosen cell is water the animal stays where it is.
+        All animals are handled in one pass, so no animal can move twice in a year.
+
+        Returns
+        -------
+        num_migrated : int
+            Number of animals that moved to another cell.
+        """
+
+        num_migrated = 0
+        for population in (self.herbivores, self.carnivores):
+            if len(population) == 0:
+                continue
+
+            population.has_migrated[:] = False
+            moving = np.flatnonzero(self.rng.random(len(population)) <
+                                    population.constants.mu * population.phi)
+            direction = self.rng.integers(0, 4, len(moving))
+            new_cells = self.neighbours[population.cell[moving], direction]
+
+            can_enter = self.accessible[new_cells]
+            moving = moving[can_enter]
+            population.move(moving, new_cells[can_enter])
+            population.has_migrated[moving] = True
+            num_migrated += len(moving)
+
+        return num_migrated
+
+    def aging(self):
+        """
+        Increments age by one and reduces weight by eta * weight for every animal.
+        """
+
+        for population in (self.herbivores, self.carnivores):
+            population.age[:] += 1
+            population.weight[:] -= population.constants.eta * population.weight
+            population.fitness_calculation()
+
+    def death(self):
+        """
+        Animals with zero weight die, the others die with probability omega * (1 - phi).
+
+        Returns
+        -------
+        num_dead : int
+        """
+
+        num_dead = 0
+        for population in (self.herbivores, self.carnivores):
+            if len(population) == 0:
+                continue
+
+            dies = ((population.weight <= 0) |
+                    (self.rng.random(len(population)) <
+                     population.constants.omega * (1 - population.phi)))
+            num_dead += int(np.count_nonzero(dies))
+            population.keep(~dies)
+        return num_dead
+
+    def counts(self):
+        """
+        Number of herbivores and carnivores in every cell, as flat views of the count
+        arrays of the grid.
+
+        Returns
+        -------
+        herb_counts : ndarray
+        carn_counts : ndarray
+        """
+
+        return self.herbivores.cell_count, self.carnivores.cell_count
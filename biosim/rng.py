@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File with the random number generators a simulation can own.
+"""
+
+import random
+
+import numpy as np
+
+
+class BlockRandom:
+    """
+    Random number generator with the methods of the random module that the simulation uses,
+    backed by a NumPy Generator.
+
+    Single numbers are taken from blocks that are drawn with one NumPy call, which is much
+    cheaper than one call per number. Whole arrays can be drawn with uniforms and normals,
+    and the Generator itself is available as self.generator.
+    """
+
+    def __init__(self, seed=None, block_size=4096):
+        """
+        Parameters
+        ----------
+        seed : int, optional
+        block_size : int
+            Number of uniform and gaussian numbers drawn at a time.
+        """
+
+        self.generator = np.random.default_rng(seed)
+        self.block_size = block_size
+        self._uniform = []
+        self._next_uniform = 0
+        self._normal = []
+        self._next_normal = 0
+
+    def random(self):
+        """
+        Returns
+        -------
+        float
+            Uniform in [0, 1).
+        """
+
+        if self._next_uniform == len(self._uniform):
+            self._uniform = self.generator.random(self.block_size).tolist()
+            self._next_uniform = 0
+        value = self._uniform[self._next_uniform]
+        self._next_uniform += 1
+        return value
+
+    def gauss(self, mu=0.0, sigma=1.0):
+        """
+        Parameters
+        ----------
+        mu : float
+        sigma : float
+
+        Returns
+        -------
+        float
+            Gaussian with mean mu and standard deviation sigma.
+        """
+
+        if self._next_normal == len(self._normal):
+            self._normal = self.generator.standard_normal(self.block_size).tolist()
+            self._next_normal = 0
+        value = self._normal[self._next_normal]
+        self._next_normal += 1
+        return mu + sigma * value
+
+    def uniforms(self, size):
+        """
+        Parameters
+        ----------
+        size : int
+
+        Returns
+        -------
+        ndarray
+            size numbers uniform in [0, 1).
+        """
+
+        return self.generator.random(size)
+
+    def normals(self, mu, sigma, size):
+        """
+        Parameters
+        ----------
+        mu : float
+        sigma : float
+        size : int
+
+        Returns
+        -------
+        ndarray
+            size gaussian numbers.
+        """
+
+        return self.generator.normal(mu, sigma, size)
+
+    def choice(self, seq):
+        """
+        One element of a non-empty sequence.
+        """
+
+        return seq[int(self.generator.integers(len(seq)))]
+
+    def choices(self, population, k=1):
+        """
+        k elements of population, drawn with replacement and equal weights.
+        """
+
+        return [population[index] for index in self.generator.integers(len(population), size=k)]
+
+    def sample(self, population, k):
+        """
+        k distinct elements of population in random order, drawn without replacement.
+        """
+
+        return [population[index] for index in
+                self.generator.choice(len(population), size=k, replace=False).tolist()]
+
+    def shuffle(self, x):
+        """
+        Shuffles a list in place.
+        """
+
+        x[:] = [x[index] for index in self.generator.permutation(len(x))]
+
+    def getrandbits(self, k):
+        """
+        Non-negative integer with k random bits.
+        """
+
+        value = int.from_bytes(self.generator.bytes((k + 7) // 8), 'little')
+        return value >> (-k % 8)
+
+
+def uniforms(rng, size):
+    """
+    Many uniform numbers in [0, 1) at once. A BlockRandom draws them with one NumPy call,
+    other generators one by one.
+
+    Parameters
+    ----------
+    rng : random.Random, BlockRandom or the random module
+    size : int
+
+    Returns
+    -------
+    list
+    """
+
+    if isinstance(rng, BlockRandom):
+        return rng.uniforms(size).tolist()
+    return [rng.random() for _ in range(size)]
+
+
+def normals(rng, mu, sigma, size):
+    """
+    Many gaussian numbers at once. A BlockRandom draws them with one NumPy call, other
+    generators one by one.
+
+    Parameters
+    ----------
+    rng : random.Random, BlockRandom or the random module
+    mu : float
+    sigma : float
+    size : int
+
+    Returns
+    -------
+    list
+    """
+
+    if isinstance(rng, BlockRandom):
+        return rng.normals(mu, sigma, size).tolist()
+    return [rng.gauss(mu, sigma) for _ in range(size)]
+
+
+def make_rng(kind, seed=None):
+    """
+    Creates the random number generator of a simulation.
+
+    Parameters
+    ----------
+    kind : str
+        "python" for random.Random, "numpy" for BlockRandom.
+    seed : int, optional
+
+    Returns
+    -------
+    rng : random.Random or BlockRandom
+
+    Raises
+    -------
+    ValueError
+        If kind is unknown.
+    """
+
+    if kind == "python":
+        return random.Random(seed)
+    if kind == "numpy":
+        return BlockRandom(seed)
+    raise ValueError("Random number generator must be 'python' or 'numpy'")
+
+
+def numpy_generator(rng):
+    """
+    NumPy Generator for array code driven by rng. A BlockRandom shares its own Generator,
+    other generators seed a new one, so seeding rng makes it reproducible.
+
+    Parameters
+    ----------
+    rng : random.Random, BlockRandom or the random module
+
+    Returns
+    -------
+    numpy.random.Generator
+    """
+
+    if isinstance(rng, BlockRandom):
+        return rng.generator
+    return np.random.default_rng(rng.getrandbits(64))
@@ -5,19 +5,15 @@ __email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
 
 
 from biosim.animals import Herbivore, Carnivore
-from biosim import landscape as Landscape
 from biosim.island import CreateIsland as island
-from biosim.visualization import Visualization
+from biosim.rng import make_rng
+from biosim.statistics import StatisticsCollector
+from biosim.timeseries import TimeSeriesLog
 
-import pandas as pd
 import os
-import subprocess
-import random
-import matplotlib.pyplot as plt
 import numpy as np
 
 _FFMPEG_BINARY = "ffmpeg"
-_CONVERT_BINARY = "magick"
 
 _DEFAULT_GRAPHICS_DIR = os.path.join("..", "data")
 _DEFAULT_GRAPHICS_NAME = "dv"
@@ -36,7 +32,12 @@ class BioSim:
                  img_name=_DEFAULT_GRAPHICS_NAME,
                  img_fmt='png',
                  img_dir=None,
-                 img_base=None
+                 img_base=None,
+                 backend="object",
+                 movie_fmt=None,
+                 keep_images=True,
+                 rng="python",
+                 metrics=None
                  ):
         """
         Parameters
@@ -51,22 +52,41 @@ class BioSim:
         img_fmt: String wih fle type for figure, e.g. 'png'
         img_dir: path
         img_base: where to store pictures and make movies from
+        backend: "object" for animal objects in each cell, "array" for NumPy population columns,
+            "compiled" for the same columns handled by numba kernels (the array backend
+            if numba is not installed)
+        movie_fmt: "mp4" or "gif" to stream every saved frame into one ffmpeg pipe while
+            simulating, None to only save images
+        keep_images: whether images are also saved when a movie is streamed
+        rng: "python" for a random.Random, "numpy" for a BlockRandom drawing numbers in
+            blocks from a NumPy Generator. The simulation owns the generator, seeded with seed,
+            so simulations do not share random numbers.
+        metrics: SimulationMetrics to time the phases of every year and count births,
+            deaths, kills and migrations, None to measure nothing
         """
 
-        random.seed(seed)
+        self.rng = make_rng(rng, seed)
 
         self._year = 0
         self._final_year = None
 
         self._step = 0
         self.hist_specs = hist_specs
+        self._statistics = StatisticsCollector(hist_specs)
         self.inserted_map = island_map
-        self.island = island(island_map, ini_pop)
+        self.species = {"Herbivore": Herbivore.per_simulation_class(),
+                        "Carnivore": Carnivore.per_simulation_class()}
+        self.landscapes = {letter: landscape.per_simulation_class(self.species)
+                           for letter, landscape in island.map_params_dict.items()}
+        self.island = island(island_map, ini_pop, backend=backend, rng=self.rng,
+                             landscapes=self.landscapes, metrics=metrics)
 
         self.ymax_animals = ymax_animals
         self.cmax_animals = cmax_animals
 
-        if img_dir is not None:
+        if img_base is not None:
+            self.img_base = img_base
+        elif img_dir is not None:
             self.img_base = os.path.join(img_dir, img_name)
         else:
             self.img_base = None
@@ -74,75 +94,157 @@ class BioSim:
         self.img_fmt = img_fmt
         self._img_ctr = 0
 
-        self.visualization = Visualization()
-        self.visualization.graphics_setup(kart_rgb=self.plot_island_map(island_map))
+        if movie_fmt is not None and self.img_base is None:
+            raise ValueError("A movie can only be streamed when img_base or img_dir is given.")
+        self.movie_fmt = movie_fmt
+        self.keep_images = keep_images
+        self._movie = None
+
+        self.visualization = None
 
     def set_animal_parameters(self, species, params):
         """
-        Sets parameter for animals
+        Sets parameter for animals of this simulation. Other simulations and the
+        Herbivore and Carnivore classes keep their parameters.
+
         Parameters
         ----------
-        species: object
+        species: str
         params: dict
+        """
+        if species in self.species:
+            self.species[species].set_parameters(params)
 
-        Returns
-        -------
+    def set_landscape_parameters(self, landscape, params):
+        """
+        Sets parameter for a landscape type of this simulation.
 
+        Parameters
+        ----------
+        landscape: str
+            Letter of the landscape type
+        params: dict
         """
-        if species == 'Herbivore':
-            Herbivore.set_parameters(params)
-        elif species == 'Carnviore':
-            Carnivore.set_parameters(params)
+        if landscape in self.landscapes:
+            self.landscapes[landscape].cell_parameter(params)
 
-    def set_landscape_parameters(self, landscape, params):
-        if landscape == 'W':
-            Landscape.Water.cell_parameter(params)
-        elif landscape == 'D':
-            Landscape.Desert.cell_parameter(params)
-        if landscape == 'H':
-            Landscape.Highland.cell_parameter(params)
-        elif landscape == 'L':
-            Landscape.Lowland.cell_parameter(params)
-
-    def simulate(self, num_years, vis_years=1, img_years=None):
+    def setup_graphics(self):
+        """
+        Creates the figure the first time it is needed. The visualization module, and with it
+        matplotlib, is only imported here, so a headless simulation never loads it.
+        """
+
+        if self.visualization is not None:
+            return
+
+        from biosim.visualization import Visualization
+
+        self.visualization = Visualization(self.ymax_animals, self.cmax_animals)
+        self.visualization.graphics_setup(kart_rgb=self.plot_island_map(self.inserted_map))
+
+    def simulate(self, num_years, vis_years=1, img_years=None, checkpoint_years=None,
+                 checkpoint_path=None, log_base=None):
         """
         Simulates number of years using the simulate_one_year method from island.py
+
+        With vis_years=None the simulation runs headless: no figure is built, matplotlib is
+        never imported and no time is spent in plt.pause.
+
         Parameters
         ----------
         num_years: int
-        vis_years: int
-        img_years: int
-
-        Returns
+        vis_years: int or None
+        img_years: int or None
+        checkpoint_years: int or None
+            Writes a checkpoint to checkpoint_path every checkpoint_years years. The file
+            is replaced each time, so it always holds the latest year.
+        checkpoint_path: str or None
+        log_base: str or None
+            Appends every simulated year to log_base + '.csv' and the counts per cell to
+            log_base + '_cells.bin', see biosim.timeseries.
+
+        Raises
         -------
+        ValueError
+            If img_years is given for a headless simulation, or checkpoint_years without
+            checkpoint_path.
         """
         if img_years is None:
             img_years = vis_years
+        if vis_years is None and img_years is not None:
+            raise ValueError("Images can only be saved when vis_years is given.")
+        if checkpoint_years is not None and checkpoint_path is None:
+            raise ValueError("Checkpoints can only be written when checkpoint_path is given.")
 
         self._final_year = self._year + num_years
 
-        while self._year < self._final_year:
-            self.island.simulate_one_year()
-
-        # for year in range(num_years):
-
-            if self._year % vis_years == 0:
-                self.visualization._changing_text.set_text('Year:' + str(self._year))
-                self.visualization.update_graphics(vis_years, self.create_population_heatmap(),
-                                                   self.island.num_animals_per_species)
-                self.visualization.update_histogram_fitness(self.island.fitness_list()[0],
-                                                            self.island.fitness_list()[1],
-                                                            self.hist_specs)
-                self.visualization.update_histogram_age(self.island.age_list()[0],
-                                                        self.island.age_list()[1],
-                                                        self.hist_specs)
-                self.visualization.update_histogram_weight(self.island.weight_list()[0],
-                                                           self.island.weight_list()[1],
-                                                           self.hist_specs)
-            if self._year % img_years == 0:
-                self.save_graphics()
-
-            self._year += 1
+        if self.movie_fmt is not None and img_years is not None and self._movie is None:
+            from biosim.movie import MovieWriter
+            self._movie = MovieWriter(self.img_base, self.movie_fmt,
+                                      ffmpeg_binary=_FFMPEG_BINARY)
+
+        log = None
+        if log_base is not None:
+            log = TimeSeriesLog(log_base, statistics=self._statistics)
+
+        try:
+            while self._year < self._final_year:
+                self.island.simulate_one_year()
+                if log is not None:
+                    log.write(self.island)
+
+            # for year in range(num_years):
+
+                if vis_years is not None and self._year % vis_years == 0:
+                    self.setup_graphics()
+                    self.visualization._changing_text.set_text('Year:' + str(self._year))
+                    self.visualization.update_graphics(vis_years,
+                                                       self.create_population_heatmap(),
+                                                       self.island.num_animals_per_species)
+                    self.visualization.update_histograms(self._statistics.collect(self.island),
+                                                         self._statistics.edges)
+                    self.visualization.draw_frame()
+                if img_years is not None and self._year % img_years == 0:
+                    self.save_graphics()
+
+                self._year += 1
+
+                if checkpoint_years is not None and self._year % checkpoint_years == 0:
+                    self.save_checkpoint(checkpoint_path)
+        finally:
+            if log is not None:
+                log.close()
+
+    def save_checkpoint(self, path):
+        """
+        Writes the state of the simulation to path, see biosim.checkpoint.
+
+        Parameters
+        ----------
+        path: str
+        """
+
+        from biosim.checkpoint import save_checkpoint
+        save_checkpoint(self, path)
+
+    @classmethod
+    def from_checkpoint(cls, path, **kwargs):
+        """
+        Restores a simulation written by save_checkpoint.
+
+        Parameters
+        ----------
+        path: str
+        **kwargs
+            Passed on to BioSim, e.g. img_dir.
+
+        Returns
+        -------
+        BioSim
+        """
+
+        from biosim.checkpoint import load_checkpoint
+        return load_checkpoint(path, **kwargs)
 
     def add_population(self, population):
         """
@@ -155,6 +257,19 @@ class BioSim:
 
         self.island.add_population(population)
 
+    @property
+    def metrics(self):
+        """
+        SimulationMetrics of the island, or None when nothing is measured. Setting it turns
+        the measurements on or off from the next year.
+        """
+
+        return self.island.metrics
+
+    @metrics.setter
+    def metrics(self, metrics):
+        self.island.metrics = metrics
+
     @property
     def year(self):
         return self.island.year
@@ -169,14 +284,22 @@ class BioSim:
 
     @property
     def animal_distribution(self):
-        dict_for_df = {'Row': [], 'Col': [], 'Herbivore': [], 'Carnivore': []}
-        for pos, cell in self.island.map.items():
-            row, col = pos
-            dict_for_df['Row'].append(row)
-            dict_for_df['Col'].append(col)
-            dict_for_df['Herbivore'].append(cell.num_herbivores)
-            dict_for_df['Carnivore'].append(cell.num_carnivores)
-        df_sim = pd.DataFrame.from_dict(dict_for_df)
+        """
+        Number of herbivores and carnivores in every cell as a pandas DataFrame.
+        pandas is only imported when this property is used.
+
+        Returns
+        -------
+        df_sim : pandas.DataFrame
+        """
+
+        import pandas as pd
+
+        herb_counts, carn_counts = self.island.animal_counts()
+        rows, cols = np.indices(herb_counts.shape) + 1
+        df_sim = pd.DataFrame({'Row': rows.ravel(), 'Col': cols.ravel(),
+                               'Herbivore': herb_counts.ravel(),
+                               'Carnivore': carn_counts.ravel()})
         return df_sim
 
     def length_of_map(self):
@@ -188,10 +311,7 @@ class BioSim:
         leny_map: int
         """
 
-        lines = self.inserted_map.strip()
-        lines = lines.split('\n')
-        lenx_map = len(lines[0])
-        leny_map = len(lines)
+        leny_map, lenx_map = self.island.grid.shape
         return lenx_map, leny_map
 
     def plot_island_map(self, island_map):
@@ -222,58 +342,57 @@ class BioSim:
 
     def create_population_heatmap(self):
         """
-        Uses DataFrame and return values to plot in the heatmaps.
+        Returns the values to plot in the heatmaps. These are the count arrays the island
+        keeps up to date, so nothing is copied or rebuilt.
 
         Returns
         -------
-        herb_array : object
-        carn_array : object
+        herb_array : ndarray
+        carn_array : ndarray
         """
-        x_len, y_len = self.length_of_map()
 
-        df = self.animal_distribution
-        df.set_index(['Row', 'Col'], inplace=True)
-        herb_array = np.asarray(df['Herbivore']).reshape(y_len, x_len)
-        carn_array = np.asarray(df['Carnivore']).reshape(y_len, x_len)
+        herb_array, carn_array = self.island.animal_counts()
 
         return herb_array, carn_array
 
-    def make_movie(self, movie_fmt):
+    def make_movie(self, movie_fmt=None):
         """
-        Method will create an mp4 or a gif from saved images.
+        Method will create an mp4 or a gif.
+
+        If the movie was streamed while simulating, the ffmpeg pipe is closed and the movie
+        finished. Otherwise the movie is made from the saved images.
 
         Parameters
         ----------
-        movie_fmt
-            Must have a ffmpeg
+        movie_fmt : str, optional
+            'mp4' or 'gif'. Defaults to the streamed format, or mp4. Must have a ffmpeg
+
+        Returns
+        -------
+        filename : str
+
+        Raises
+        -------
+        RuntimeError
+            If there is no filename, or ffmpeg failed.
+        ValueError
+            If the movie format is unknown or differs from the streamed format.
         """
 
         if self.img_base is None:
             raise RuntimeError("No filename defined.")
 
-        if movie_fmt == "mp4":
-            try:
-                subprocess.check_call([_FFMPEG_BINARY,
-                                       "-framerate", "5", "-i",
-                                       "{}_%05d.png".format(self.img_base),
-                                       "-y",
-                                       "-profile:v", "baseline",
-                                       "-level", "3.0",
-                                       "-pix_fmt", "yuv420p",
-                                       "{}.{}".format(self.img_base, movie_fmt)])
-            except subprocess.CalledProcessError as err:
-                raise RuntimeError("ERROR: ffmpeg failed with: {)". format(err))
-        elif movie_fmt == "gif":
-            try:
-                subprocess.check_call([_CONVERT_BINARY,
-                                       "-delay", "1",
-                                       "-loop", "0",
-                                       "{}.{]".format(self.img_base),
-                                       "{].{}".format(self.img_base, movie_fmt)])
-            except subprocess.CalledProcessError as err:
-                raise RuntimeError("ERROR: converted failed with: {}".format(err))
-        else:
-            raise ValueError("Uknown movie format: " + movie_fmt)
+        if self._movie is not None:
+            if movie_fmt is not None and movie_fmt != self._movie.movie_fmt:
+                raise ValueError("The movie is streamed as " + self._movie.movie_fmt)
+            movie, self._movie = self._movie, None
+            return movie.close()
+
+        from biosim.movie import MovieWriter
+
+        writer = MovieWriter(self.img_base, movie_fmt or _DEFAULT_MOVIE_FORMAT,
+                             ffmpeg_binary=_FFMPEG_BINARY)
+        return writer.encode_images("{}_%05d.{}".format(self.img_base, self.img_fmt))
 
     def save_graphics(self):
         """
@@ -281,12 +400,17 @@ class BioSim:
 
         """
 
-        if self.img_base is None:
+        if self.img_base is None or self.visualization is None:
             return
 
-        plt.savefig('{base}_{num:05d}.{type}'.format(base=self.img_base,
-                                                     num=self._img_ctr,
-                                                     type=self.img_fmt))
+        if self._movie is not None:
+            self._movie.write_frame(self.visualization.figure)
+            if not self.keep_images:
+                return
+
+        self.visualization.figure.savefig('{base}_{num:05d}.{type}'.format(base=self.img_base,
+                                                                           num=self._img_ctr,
+                                                                           type=self.img_fmt))
         self._img_ctr += 1
 
 
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File for collecting statistics of the animals on the island.
+"""
+
+import numpy as np
+
+DEFAULT_HIST_SPECS = {'fitness': {'max': 1.0, 'delta': 0.05},
+                      'age': {'max': 60.0, 'delta': 2},
+                      'weight': {'max': 60, 'delta': 2}}
+
+
+class StatisticsCollector:
+    """
+    Collects weight, age and fitness of both species in one pass over the island, bins
+    them directly into histograms and keeps their mean and standard deviation.
+
+    The values of every species are gathered cell by cell into a preallocated buffer of its
+    own, which is binned and emptied when it is full and once at the end, so the memory use
+    does not depend on the number of animals. The moments of every buffer are
+    merged with those of the earlier buffers of the species.
+    """
+
+    properties = ('age', 'weight', 'fitness')
+    species = ('Herbivore', 'Carnivore')
+
+    def __init__(self, hist_specs=None, buffer_size=4096):
+        """
+        Parameters
+        ----------
+        hist_specs : dict, optional
+            Key: 'fitness', 'age' or 'weight' - Value: dict with 'max' and 'delta'.
+            Properties that are not given use DEFAULT_HIST_SPECS.
+        buffer_size : int
+            Number of animals of a species gathered before its buffer is binned.
+        """
+
+        self.hist_specs = dict(DEFAULT_HIST_SPECS)
+        if hist_specs is not None:
+            self.hist_specs.update(hist_specs)
+
+        self.edges = {}
+        for prop in self.properties:
+            spec = self.hist_specs[prop]
+            num_bins = int(spec["max"] / spec["delta"])
+            self.edges[prop] = np.linspace(0, spec["max"], num_bins + 1)
+
+        self.buffer_size = buffer_size
+        self._buffers = {species: np.empty((len(self.properties), buffer_size))
+                         for species in self.species}
+        self._filled = dict.fromkeys(self.species, 0)
+        self._histograms = None
+        self._moments = None
+
+    def _new_histograms(self):
+        return {species: {prop: np.zeros(len(self.edges[prop]) - 1, dtype=np.int64)
+                          for prop in self.properties}
+                for species in self.species}
+
+    def _flush(self, species):
+        """
+        Bins the values in the buffer of a species and empties it.
+
+        Parameters
+        ----------
+        species : str
+        """
+
+        filled = self._filled[species]
+        if filled:
+            self._add_values(species, self._buffers[species][:, :filled])
+            self._filled[species] = 0
+
+    def _add_values(self, species, values):
+        """
+        Bins values into the histograms of a species and merges their count, mean and sum
+        of squared deviations into its moments.
+
+        Parameters
+        ----------
+        species : str
+        values : ndarray
+            One row per property, one column per animal.
+        """
+
+        histograms = self._histograms[species]
+        moments = self._moments[species]
+        num_values = values.shape[1]
+        for row, prop in enumerate(self.properties):
+            counts, _ = np.histogram(values[row], bins=self.edges[prop])
+            histograms[prop] += counts
+
+        count, mean, squares = moments
+        buffer_mean = values.mean(axis=1)
+        buffer_squares = ((values - buffer_mean[:, np.newaxis]) ** 2).sum(axis=1)
+        total = count + num_values
+        delta = buffer_mean - mean
+        moments[0] = total
+        moments[1] = mean + delta * num_values / total
+        moments[2] = squares + buffer_squares + delta ** 2 * count * num_values / total
+
+    def _add_animals(self, species, animals):
+        """
+        Copies age, weight and fitness of the animal objects of one cell to the buffer of
+        their species, and bins the buffer whenever it is full.
+
+        Parameters
+        ----------
+        species : str
+        animals : list
+        """
+
+        buffer = self._buffers[species]
+        start = 0
+        while start < len(animals):
+            filled = self._filled[species]
+            if filled == self.buffer_size:
+                self._flush(species)
+                filled = 0
+            chunk = animals[start:start + self.buffer_size - filled]
+            stop = filled + len(chunk)
+            buffer[0, filled:stop] = [animal.age for animal in chunk]
+            buffer[1, filled:stop] = [animal.weight for animal in chunk]
+            buffer[2, filled:stop] = [animal.phi for animal in chunk]
+            self._filled[species] = stop
+            start += len(chunk)
+
+    def _add_columns(self, species, population):
+        """
+        Copies the columns of a Population to the buffer of the species, one buffer at a
+        time.
+
+        Parameters
+        ----------
+        species : str
+        population : Population
+        """
+
+        buffer = self._buffers[species]
+        for start in range(0, len(population), self.buffer_size):
+            stop = min(start + self.buffer_size, len(population))
+            filled = stop - start
+            buffer[0, :filled] = population.age[start:stop]
+            buffer[1, :filled] = population.weight[start:stop]
+            buffer[2, :filled] = population.phi[start:stop]
+            self._filled[species] = filled
+            self._flush(species)
+
+    def collect(self, island):
+        """
+        Histograms of age, weight and fitness of all animals on the island.
+
+        Parameters
+        ----------
+        island : CreateIsland
+
+        Returns
+        -------
+        histograms : dict
+            Key: species - Value: dict with key: property - value: counts per bin.
+            The bin edges are in self.edges.
+        """
+
+        self._histograms = self._new_histograms()
+        self._moments = {species: [0, np.zeros(len(self.properties)),
+                                   np.zeros(len(self.properties))]
+                         for species in self.species}
+        self._filled = dict.fromkeys(self.species, 0)
+
+        if island.engine is not None:
+            for name, population in zip(self.species, (island.engine.herbivores,
+                                                        island.engine.carnivores)):
+                self._add_columns(name, population)
+            return self._histograms
+
+        cells = list(island.map.values())
+        for index in island.occupied_cells():
+            cell = cells[index]
+            if cell.present_herbivores:
+                self._add_animals('Herbivore', cell.present_herbivores)
+            if cell.present_carnivores:
+                self._add_animals('Carnivore', cell.present_carnivores)
+        for species in self.species:
+            self._flush(species)
+
+        return self._histograms
+
+    def summary(self):
+        """
+        Mean and standard deviation of age, weight and fitness of the animals of the last
+        call to collect. Both are nan for a species without animals.
+
+        Returns
+        -------
+        summary : dict
+            Key: species - Value: dict with key: property - value: (mean, std).
+        """
+
+        summary = {}
+        for species, (count, mean, squares) in self._moments.items():
+            if count == 0:
+                summary[species] = {prop: (np.nan, np.nan) for prop in self.properties}
+                continue
+            std = np.sqrt(squares / count)
+            summary[species] = {prop: (float(mean[row]), float(std[row]))
+                                for row, prop in enumerate(self.properties)}
+        return summary
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File for parameter sweeps: every point of a design is simulated headless for a number of
+seeds in a pool of processes, and the yearly animal counts are collected in one table.
+
+A parameter is named by its species or landscape and its name, e.g. 'Herbivore.zeta',
+'Carnivore.DeltaPhiMax' or 'Lowland.f_max'.
+
+Run from the command line with a JSON configuration:
+
+    python -m biosim.sweep config.json --output results.parquet
+
+The configuration holds 'island_map', 'ini_pop', 'num_years', 'seeds', optionally
+'backend', and either 'grid' (parameter name: list of values) or 'lhs' with 'bounds'
+(parameter name: [low, high]), 'num_points' and 'seed'.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from biosim.ensemble import ANIMAL_SPECIES, run_replicate
+
+LANDSCAPE_LETTERS = {'Lowland': 'L', 'Highland': 'H', 'Desert': 'D', 'Water': 'W'}
+
+
+def grid_design(values):
+    """
+    Every combination of the given values.
+
+    Parameters
+    ----------
+    values : dict
+        Key: parameter name - Value: list of values
+
+    Returns
+    -------
+    design : list
+        One dict per point with key: parameter name - value: value
+    """
+
+    names = list(values)
+    return [dict(zip(names, point)) for point in itertools.product(*values.values())]
+
+
+def latin_hypercube_design(bounds, num_points, seed=None):
+    """
+    Latin hypercube sample: the range of every parameter is split in num_points equal
+    intervals, and every interval is used by exactly one point.
+
+    Parameters
+    ----------
+    bounds : dict
+        Key: parameter name - Value: (low, high)
+    num_points : int
+    seed : int, optional
+
+    Returns
+    -------
+    design : list
+        One dict per point with key: parameter name - value: value
+    """
+
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in bounds.items():
+        strata = (rng.permutation(num_points) + rng.random(num_points)) / num_points
+        columns[name] = low + strata * (high - low)
+    return [{name: float(column[row]) for name, column in columns.items()}
+            for row in range(num_points)]
+
+
+def point_params(point):
+    """
+    Converts a design point to the parameters of run_replicate.
+
+    Parameters
+    ----------
+    point : dict
+        Key: parameter name, e.g. 'Herbivore.zeta' - Value: value
+
+    Returns
+    -------
+    params : dict
+        Key: 'Herbivore', 'Carnivore' or a landscape letter - Value: dict with parameters.
+
+    Raises
+    -------
+    ValueError
+        If a parameter name is not of the form species.parameter or landscape.parameter.
+    """
+
+    params = {}
+    for name, value in point.items():
+        owner, _, parameter = name.partition('.')
+        if owner not in ANIMAL_SPECIES:
+            if owner not in LANDSCAPE_LETTERS:
+                raise ValueError("Unknown parameter: " + name)
+            owner = LANDSCAPE_LETTERS[owner]
+        params.setdefault(owner, {})[parameter] = value
+    return params
+
+
+def part_name(island_map, ini_pop, point, seed, num_years, backend):
+    """
+    File name of the result of one point and seed. It only depends on the inputs, so a
+    restarted sweep finds the results that are already done.
+    """
+
+    key = json.dumps([island_map, ini_pop, point, seed, num_years, backend],
+                     sort_keys=True, default=list)
+    return hashlib.sha1(key.encode()).hexdigest()[:20] + '.npz'
+
+
+def _run_point(args):
+    part_path, island_map, ini_pop, point, seed, num_years, backend = args
+    series = run_replicate(island_map, ini_pop, seed, num_years, point_params(point), backend)
+
+    temporary = part_path + '.tmp.npz'
+    np.savez(temporary, series=series)
+    os.replace(temporary, part_path)
+    return part_path
+
+
+def write_table(columns, output):
+    """
+    Writes a table to parquet if a parquet engine is installed, otherwise to CSV.
+
+    Parameters
+    ----------
+    columns : dict
+        Key: column name - Value: array
+    output : str
+        File name. With a parquet engine missing, the extension is replaced by .csv.
+
+    Returns
+    -------
+    output : str
+        The file that was written.
+    """
+
+    import pandas as pd
+
+    table = pd.DataFrame(columns)
+    if output.endswith('.parquet'):
+        try:
+            table.to_parquet(output, index=False)
+            return output
+        except ImportError:
+            output = output[:-len('.parquet')] + '.csv'
+    table.to_csv(output, index=False)
+    return output
+
+
+def run_sweep(island_map, ini_pop, design, seeds, num_years, output, backend="object",
+              processes=None, part_dir=None):
+    """
+    Simulates every point of the design for every seed and writes one row per point, seed
+    and year with the parameter values and the number of herbivores and carnivores.
+
+    The result of every point and seed is saved in part_dir as soon as it is done. Parts
+    that already exist are not simulated again, so a sweep that stopped can be restarted
+    with the same arguments.
+
+    Parameters
+    ----------
+    island_map : str
+    ini_pop : list
+    design : list
+        One dict per point, e.g. from grid_design or latin_hypercube_design.
+    seeds : list
+    num_years : int
+    output : str
+        Table to write, .parquet or .csv.
+    backend : str
+    processes : int, optional
+        Size of the pool, defaults to the number of CPUs.
+    part_dir : str, optional
+        Defaults to output + '.parts'.
+
+    Returns
+    -------
+    output : str
+        The file that was written.
+    """
+
+    if part_dir is None:
+        part_dir = output + '.parts'
+    os.makedirs(part_dir, exist_ok=True)
+
+    tasks = []
+    for point in design:
+        for seed in seeds:
+            part_path = os.path.join(part_dir, part_name(island_map, ini_pop, point, seed,
+                                                         num_years, backend))
+            tasks.append((part_path, island_map, ini_pop, point, seed, num_years, backend))
+    pending = [task for task in tasks if not os.path.exists(task[0])]
+
+    if pending:
+        if processes is None:
+            processes = os.cpu_count() or 1
+        processes = max(1, min(processes, len(pending)))
+        with multiprocessing.Pool(processes) as pool:
+            for _ in pool.imap_unordered(_run_point, pending):
+                pass
+
+    names = list(design[0]) if design else []
+    num_rows = len(tasks) * (num_years + 1)
+    columns = {'point': np.repeat(np.arange(len(design)), len(seeds) * (num_years + 1)),
+               'seed': np.tile(np.repeat(seeds, num_years + 1), len(design))}
+    for name in names:
+        columns[name] = np.repeat([point[name] for point in design],
+                                  len(seeds) * (num_years + 1))
+    columns['year'] = np.tile(np.arange(num_years + 1), len(tasks))
+    counts = np.empty((num_rows, len(ANIMAL_SPECIES)), dtype=np.int64)
+    for row, task in enumerate(tasks):
+        with np.load(task[0]) as part:
+            counts[row * (num_years + 1):(row + 1) * (num_years + 1)] = part['series']
+    for column, species in enumerate(ANIMAL_SPECIES):
+        columns[species] = counts[:, column]
+
+    return write_table(columns, output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parameter sweep of BioSim.")
+    parser.add_argument('config', help="JSON file with the sweep configuration")
+    parser.add_argument('--output', default='sweep.parquet',
+                        help="result table, .parquet or .csv (default: %(default)s)")
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with open(args.config) as config_file:
+        config = json.load(config_file)
+
+    ini_pop = [{'loc': tuple(cell['loc']), 'pop': cell['pop']} for cell in config['ini_pop']]
+    if 'grid' in config:
+        design = grid_design(config['grid'])
+    elif 'lhs' in config:
+        design = latin_hypercube_design(config['lhs']['bounds'], config['lhs']['num_points'],
+                                        config['lhs'].get('seed'))
+    else:
+        parser.error("The configuration needs a 'grid' or an 'lhs' design.")
+
+    output = run_sweep(config['island_map'], ini_pop, design, config['seeds'],
+                       config['num_years'], args.output, config.get('backend', 'object'),
+                       args.processes)
+    print(f"{len(design)} points x {len(config['seeds'])} seeds written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""
+File for logging the island year by year to disk while simulating.
+
+Every year adds one line to a CSV file with the number of animals of each species and the
+mean and standard deviation of their age, weight and fitness, and one record to a binary
+file with the number of herbivores and carnivores in every cell. Both files are only
+appended to and flushed every year, so a live run can be followed with e.g. tail -f, and
+no history is kept in memory.
+
+The binary file starts with two int32 values, the number of rows and columns of the
+island, followed by one record per year of int32 counts with shape (2, rows, cols):
+herbivores first, then carnivores. read_cell_counts maps it to an array.
+"""
+
+import os
+
+import numpy as np
+
+from biosim.statistics import StatisticsCollector
+
+_CELL_DTYPE = np.dtype('<i4')
+
+
+def csv_columns():
+    """
+    Returns
+    -------
+    columns : list
+        Names of the columns of the CSV file.
+    """
+
+    columns = ['year'] + list(StatisticsCollector.species)
+    for species in StatisticsCollector.species:
+        for prop in StatisticsCollector.properties:
+            columns += [f'{species}_{prop}_mean', f'{species}_{prop}_std']
+    return columns
+
+
+def read_cell_counts(path):
+    """
+    Maps the binary file of a TimeSeriesLog to an array without reading it into memory.
+    A record that is still being written is left out.
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    counts : numpy.memmap
+        Shape (years, 2, rows, cols); counts[:, 0] are herbivores, counts[:, 1] carnivores.
+    """
+
+    num_rows, num_cols = np.fromfile(path, dtype=_CELL_DTYPE, count=2)
+    record = 2 * num_rows * num_cols
+    num_years = (os.path.getsize(path) // _CELL_DTYPE.itemsize - 2) // record
+    return np.memmap(path, dtype=_CELL_DTYPE, mode='r', offset=2 * _CELL_DTYPE.itemsize,
+                     shape=(num_years, 2, num_rows, num_cols))
+
+
+class TimeSeriesLog:
+    """
+    Appends one record per year of an island to log_base + '.csv' and, with cell_counts,
+    to log_base + '_cells.bin'. Existing files are continued, so a simulation restored
+    from a checkpoint can keep writing to the same log.
+    """
+
+    def __init__(self, log_base, cell_counts=True, statistics=None):
+        """
+        Parameters
+        ----------
+        log_base : str
+            Path and start of the file names.
+        cell_counts : bool
+            Whether the counts per cell are written.
+        statistics : StatisticsCollector, optional
+            Collector used for the means and standard deviations.
+        """
+
+        self.csv_path = log_base + '.csv'
+        self.cells_path = log_base + '_cells.bin' if cell_counts else None
+        self._statistics = StatisticsCollector() if statistics is None else statistics
+        self._csv_file = None
+        self._cells_file = None
+
+    def _open(self, grid):
+        new_csv = not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) == 0
+        self._csv_file = open(self.csv_path, 'a')
+        if new_csv:
+            self._csv_file.write(','.join(csv_columns()) + '\n')
+
+        if self.cells_path is None:
+            return
+        shape = np.array([grid.num_rows, grid.num_cols], dtype=_CELL_DTYPE)
+        if os.path.exists(self.cells_path) and os.path.getsize(self.cells_path) > 0:
+            if not np.array_equal(np.fromfile(self.cells_path, dtype=_CELL_DTYPE, count=2),
+                                  shape):
+                raise ValueError(f"{self.cells_path} was written for another island.")
+            self._cells_file = open(self.cells_path, 'ab')
+        else:
+            self._cells_file = open(self.cells_path, 'ab')
+            self._cells_file.write(shape.tobytes())
+
+    def write(self, island):
+        """
+        Appends the current year of the island to the log.
+
+        Parameters
+        ----------
+        island : CreateIsland
+        """
+
+        if self._csv_file is None:
+            self._open(island.grid)
+
+        self._statistics.collect(island)
+        summary = self._statistics.summary()
+        num_animals = island.num_animals_per_species
+        row = [island.year] + [num_animals[species] for species in StatisticsCollector.species]
+        for species in StatisticsCollector.species:
+            for prop in StatisticsCollector.properties:
+                row += summary[species][prop]
+        self._csv_file.write(','.join(map(repr, row)) + '\n')
+        self._csv_file.flush()
+
+        if self._cells_file is not None:
+            herb_count, carn_count = island.animal_counts()
+            self._cells_file.write(herb_count.astype(_CELL_DTYPE).tobytes())
+            self._cells_file.write(carn_count.astype(_CELL_DTYPE).tobytes())
+            self._cells_file.flush()
+
+    def close(self):
+        """
+        Closes the files. Writing again opens them for appending.
+        """
+
+        for log_file in (self._csv_file, self._cells_file):
+            if log_file is not None:
+                log_file.close()
+        self._csv_file = None
+        self._cells_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -10,12 +10,17 @@ import numpy as np
 
 class Visualization:
 
-    density_heatmap = {'Herbivores': 200,
-                       'Carnivores': 50}
+    density_heatmap = {'Herbivore': 200,
+                       'Carnivore': 50}
 
-    def __init__(self):
+    def __init__(self, ymax_animals=None, cmax_animals=None):
         """
-
+        Parameters
+        ----------
+        ymax_animals : int, optional
+            Fixed y-axis limit of the population graph. Grows with the data if None.
+        cmax_animals : dict, optional
+            Key: 'Herbivore' or 'Carnivore' - Value: upper color limit of the heatmap.
         """
 
         self.steps = 0
@@ -47,8 +52,13 @@ class Visualization:
         self._weight_axis = None
 
         self._txt_year = None
-        self._ymax_animals = None
-        self._cmax_animals = None
+        self._ymax_animals = ymax_animals
+        self._cmax_animals = cmax_animals
+        self._pop_x = np.zeros(64)
+        self._pop_y = np.zeros((2, 64))
+        self._hist_steps = {}
+        self._background = None
+        self._limits_changed = True
         self._changing_text = None
         self.linegraph_ax = None
         self.hist_specs = None
@@ -58,6 +68,7 @@ class Visualization:
         if self._fig is None:
             self._fig = plt.figure(figsize=(16, 10))
             plt.axis('off')
+            self._fig.canvas.mpl_connect('resize_event', self._redraw_background)
 
         if self._fit_ax is None:
             self._fit_ax = self._fig.add_subplot(6, 3, 16)
@@ -116,8 +127,14 @@ class Visualization:
 
         if self._pop_ax is None:
             self._pop_ax = self._fig.add_axes([0.5, 0.65, 0.4, 0.3])
-            if self._ymax_animals is not None:
-                self._pop_ax.set_ylim(0, self._ymax_animals)
+            self._pop_ax.title.set_text("Number of animals by species")
+            self._pop_ax.set_xlabel('Years')
+            self._pop_ax.set_ylabel('Number of each species')
+            self._pop_ax.set_xlim(0, 1)
+            self._pop_ax.set_ylim(0, self._ymax_animals if self._ymax_animals is not None
+                                  else 10)
+            self.herbivore_line = self._pop_ax.plot([], [], '-', color='g', linewidth=0.5)[0]
+            self.carnivore_line = self._pop_ax.plot([], [], '-', color='r', linewidth=0.5)[0]
 
         if self._txt_year is None:
             self._txt_year = self._fig.add_axes([0.5, 0.95, 0.05, 0.05])
@@ -128,6 +145,22 @@ class Visualization:
         plt.pause(0.001)
 
     def update_graphics(self, years, distribution=None, num_species_dict=None):
+        """
+        Updates the heatmaps and the population graph of the current year.
+
+        The artists are created once and only get new data here, so the cost of a frame does
+        not grow with the number of years. Call draw_frame to show the changes.
+
+        Parameters
+        ----------
+        years : int
+            Years between two updates.
+        distribution : tuple
+            Herbivore and carnivore count per cell, see BioSim.create_population_heatmap.
+        num_species_dict : dict
+            Key: species - Value: number of animals.
+        """
+
         self.steps += 1
         self._changing_text.set_text('Year:' + str(self.steps))
 
@@ -137,42 +170,44 @@ class Visualization:
             self._herb_heat_axis = self._herb_heat_ax.imshow(distribution[0],
                                                              interpolation='nearest',
                                                              cmap='BuGn',
-                                                             vmax=self._cmax_animals['Herbivores'])
+                                                             vmax=self._cmax_animals['Herbivore'])
             self._herb_heat_ax.figure.colorbar(self._herb_heat_axis, ax=self._herb_heat_ax,
                                                orientation='horizontal', fraction=0.07, pad=0.04)
+            self._limits_changed = True
         else:
             self._herb_heat_axis.set_data(distribution[0])
         if self._carn_heat_axis is None:
             self._carn_heat_axis = self._carn_heat_ax.imshow(distribution[1],
                                                              interpolation='nearest',
                                                              cmap='OrRd',
-                                                             vmax=self._cmax_animals['Carnivores'])
+                                                             vmax=self._cmax_animals['Carnivore'])
             self._carn_heat_ax.figure.colorbar(self._carn_heat_axis, ax=self._carn_heat_ax,
                                                orientation='horizontal', fraction=0.07, pad=0.04)
+            self._limits_changed = True
         else:
             self._carn_heat_axis.set_data(distribution[1])
 
         self.current_herbivore_data.append(num_species_dict["Herbivore"])
         self.current_carnivore_data.append(num_species_dict["Carnivore"])
         length = len(self.current_carnivore_data)
-        x_value = list(np.arange(length))
-
-        if self._pop_ax is not None:
-            x_val = []
-            for val in x_value:
-                x_val.append(val * years)
-            self._pop_ax.set_ylim(0, max(self.current_herbivore_data)+10)
-
-            self._pop_ax.title.set_text("Number of animals by species")
-            self._pop_ax.set_xlabel('Years')
-            self._pop_ax.set_ylabel('Number of each species')
 
-            self._pop_ax.plot(x_val, self.current_herbivore_data,
-                                   '-', color='g', linewidth=0.5)
-            self._pop_ax.plot(x_val, self.current_carnivore_data,
-                                   '-', color='r', linewidth=0.5)
-
-        plt.pause(0.01)
+        if length > len(self._pop_x):
+            self._pop_x = np.concatenate([self._pop_x, np.zeros_like(self._pop_x)])
+            self._pop_y = np.concatenate([self._pop_y, np.zeros_like(self._pop_y)], axis=1)
+        self._pop_x[length - 1] = (length - 1) * years
+        self._pop_y[0, length - 1] = num_species_dict["Herbivore"]
+        self._pop_y[1, length - 1] = num_species_dict["Carnivore"]
+        self.herbivore_line.set_data(self._pop_x[:length], self._pop_y[0, :length])
+        self.carnivore_line.set_data(self._pop_x[:length], self._pop_y[1, :length])
+
+        x_max = self._pop_x[length - 1]
+        if x_max > self._pop_ax.get_xlim()[1]:
+            self._pop_ax.set_xlim(0, 2 * x_max)
+            self._limits_changed = True
+        y_max = self._pop_y[:, length - 1].max()
+        if self._ymax_animals is None and y_max > self._pop_ax.get_ylim()[1]:
+            self._pop_ax.set_ylim(0, 1.5 * y_max + 10)
+            self._limits_changed = True
 
     def update_histogram_fitness(self, fitness_list_herb=None, fitness_list_carn=None,
                                  hist_specs=None):
@@ -231,7 +266,83 @@ class Visualization:
                                  range=(0, hist_specs["weight"]["max"]))
             self._weight_ax.title.set_text("Histogram of weight")
 
+    def update_histograms(self, histograms, edges):
+        """
+        Gives the step artists of the histograms new counts, e.g. from StatisticsCollector.
+
+        Parameters
+        ----------
+        histograms : dict
+            Key: 'Herbivore' or 'Carnivore' - Value: dict with key: 'fitness', 'age' or
+            'weight' - value: counts per bin.
+        edges : dict
+            Key: 'fitness', 'age' or 'weight' - Value: bin edges.
+        """
+
+        for ax, prop, title in ((self._fit_ax, 'fitness', "Histogram of fitness"),
+                                (self._age_ax, 'age', "Histogram of age"),
+                                (self._weight_ax, 'weight', "Histogram of weight")):
+            for species, color in (("Herbivore", "g"), ("Carnivore", "r")):
+                step = self._hist_steps.get((species, prop))
+                if step is None or step.axes is None:
+                    self._hist_steps[species, prop] = ax.stairs(histograms[species][prop],
+                                                                edges[prop], color=color)
+                    ax.set_xlim(edges[prop][0], edges[prop][-1])
+                    ax.title.set_text(title)
+                    self._limits_changed = True
+                else:
+                    step.set_data(histograms[species][prop], edges[prop])
+
+            top = max(histograms[species][prop].max(initial=0) for species in histograms)
+            if top > ax.get_ylim()[1]:
+                ax.set_ylim(0, 1.5 * top)
+                self._limits_changed = True
+
+    def _redraw_background(self, event=None):
+        self._limits_changed = True
+
+    def _dynamic_artists(self):
+        artists = [self._changing_text, self.herbivore_line, self.carnivore_line,
+                   self._herb_heat_axis, self._carn_heat_axis]
+        artists.extend(self._hist_steps.values())
+        return [artist for artist in artists if artist is not None]
+
+    def draw_frame(self):
+        """
+        Shows the changes made by update_graphics and update_histograms.
+
+        When an axis limit has changed the whole figure is drawn and saved as background
+        without the changing artists. Otherwise the background is restored and only the
+        changing artists are drawn and blitted, which keeps the cost of a frame constant.
+        """
+
+        canvas = self._fig.canvas
+        if not canvas.supports_blit:
+            canvas.draw_idle()
+            canvas.flush_events()
+            return
+
+        artists = self._dynamic_artists()
+        if self._limits_changed or self._background is None:
+            for artist in artists:
+                artist.set_visible(False)
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self._fig.bbox)
+            for artist in artists:
+                artist.set_visible(True)
+            self._limits_changed = False
+
+        canvas.restore_region(self._background)
+        for artist in artists:
+            self._fig.draw_artist(artist)
+        canvas.blit(self._fig.bbox)
+        canvas.flush_events()
+
     @property
     def map(self):
         return self._map
 
+    @property
+    def figure(self):
+        return self._fig
+
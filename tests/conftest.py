@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Fixtures shared by all tests in the tests folder."""
+
+from biosim.animals import Herbivore, Carnivore
+from biosim.landscape import Lowland, Highland, Desert, Water
+import copy
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def restore_parameters():
+    """
+    The parameters are class attributes, so a test that sets them would change them for
+    every test after it. They are put back after each test.
+    """
+
+    classes = (Herbivore, Carnivore, Lowland, Highland, Desert, Water)
+    saved = [(cls, name, copy.deepcopy(getattr(cls, name)))
+             for cls in classes for name in ('params', 'params_dict') if name in vars(cls)]
+    yield
+    for cls, name, value in saved:
+        current = getattr(cls, name)
+        if isinstance(current, dict) and isinstance(value, dict):
+            current.clear()
+            current.update(value)
+        else:
+            setattr(cls, name, value)
+    Herbivore.update_constants()
+    Carnivore.update_constants()
@@ -81,6 +81,33 @@ class TestAnimals:
         herb = Herbivore(6, -3)
         assert herb.phi == 0
 
+    def test_batch_fitness(self):
+        ages = [0, 2, 6, 6, 30]
+        weights = [5, 13, 0, -3, 40]
+        phi = Animals.batch_fitness(ages, weights, Herbivore.constants)
+        for age, weight, animal_phi in zip(ages, weights, phi):
+            assert animal_phi == approx(Herbivore(age, weight).phi)
+        assert phi[2] == 0 and phi[3] == 0
+
+    def test_update_fitness(self):
+        carns = [Carnivore(5, 20), Carnivore(3, 8)]
+        for carn in carns:
+            carn.growing_older(update_fitness=False)
+        Animals.update_fitness(carns)
+        for carn in carns:
+            assert carn.phi == approx(carn.fitness_calculation())
+
+    def test_update_fitness_threshold(self, mocker):
+        small = [Herbivore(5, 20) for _ in range(Animals.batch_threshold - 1)]
+        large = [Herbivore(5, 20) for _ in range(Animals.batch_threshold)]
+        batch = mocker.spy(Animals, 'batch_fitness')
+
+        Animals.update_fitness(small)
+        assert batch.call_count == 0
+        Animals.update_fitness(large)
+        assert batch.call_count == 1
+        assert large[0].phi == approx(small[0].phi)
+
     def test_procreation(self, mocker):
         herb = Herbivore(4, 30)
         herb_born = herb.procreation(1)
@@ -115,6 +142,75 @@ class TestAnimals:
         # # assert offspring["Type"] == "Herbivore"
         # assert isinstance(offspring, Herbivore)
 
+    def test_batch_procreation(self, mocker):
+        assert Herbivore.batch_procreation([Herbivore(5, 40)]) == []
+        assert Herbivore.batch_procreation([Herbivore(5, 20) for _ in range(10)]) == []
+
+        mocker.patch('random.random', return_value=0.0)
+        mocker.patch('random.gauss', return_value=5)
+        herbs = [Herbivore(5, 40), Herbivore(5, 20), Herbivore(5, 50)]
+        offspring = Herbivore.batch_procreation(herbs)
+
+        assert len(offspring) == 2
+        assert [herb.weight for herb in herbs] == [34, 20, 44]
+        assert herbs[0].phi == approx(Herbivore(5, 34).phi)
+        for newborn in offspring:
+            assert type(newborn) is Herbivore
+            assert (newborn.age, newborn.weight, newborn.alive, newborn.has_migrated) == \
+                   (0, 5, True, False)
+            assert newborn.phi == approx(Herbivore(0, 5).phi)
+
+    def test_batch_procreation_probability(self, mocker):
+        mocker.patch('random.random', return_value=0.5)
+        herbs = [Herbivore(5, 40) for _ in range(2)]
+        assert herbs[0].params_dict['gamma'] * herbs[0].phi < 0.5
+        assert Herbivore.batch_procreation(herbs) == []
+
+    def test_batch_death(self, mocker):
+        species = Herbivore.per_simulation_class()
+        herbs = [species(5, 20), species(5, 0), species(5, 20)]
+        survivor, starved, unlucky = herbs
+        rng = mocker.Mock()
+        rng.random.side_effect = [0.99, 0.99, 0.0]
+
+        assert species.batch_death(herbs, rng) == 2
+        assert herbs == [survivor]
+        assert rng.random.call_count == 3
+        assert starved in species._pool and unlucky in species._pool
+        assert species.batch_death([], rng) == 0
+
+    def test_animal_dying_one_draw(self, mocker):
+        draw = mocker.patch('random.random', return_value=0.99)
+        assert Herbivore(5, 20).animal_dying() is False
+        assert draw.call_count == 1
+
+    @pytest.mark.parametrize('Species', [Herbivore, Carnivore])
+    def test_slots(self, Species):
+        animal = Species(5, 20)
+        assert not hasattr(animal, '__dict__')
+        assert not hasattr(Species.per_simulation_class()(5, 20), '__dict__')
+        with pytest.raises(AttributeError):
+            animal.colour = 'brown'
+
+    def test_pool_reuses_dead_animals(self):
+        species = Herbivore.per_simulation_class()
+        dead = [species(10, 30) for _ in range(3)]
+        Animals.release(dead)
+        assert len(species._pool) == 3
+        assert Herbivore._pool is not species._pool
+
+        offspring = species.newborns([5.0, 6.0])
+        assert offspring[0] in dead and offspring[1] in dead
+        assert [(animal.age, animal.weight) for animal in offspring] == [(0, 5.0), (0, 6.0)]
+        assert all(animal.alive and not animal.has_migrated for animal in offspring)
+        assert len(species._pool) == 1
+
+    def test_pool_size(self):
+        species = Carnivore.per_simulation_class()
+        species.pool_size = 2
+        Animals.release([species(10, 30) for _ in range(5)])
+        assert len(species._pool) == 2
+
     def test_has_moved(self, mocker):
         herb = Herbivore(5, 20)
         assert herb.has_migrated is False
@@ -236,6 +332,12 @@ class TestCarnivore:
         assert carn.weight == 21.5
         assert phi_not_eaten < phi_eaten
 
+        carn = Carnivore(5, 20)
+        herb_phi = [Herbivore(5, 0), Herbivore(5, 0)]
+        herb_phi[0].alive = False
+        del_herb = carn.hunt_herb(herb_phi)
+        assert del_herb == [herb_phi[1]]
+
         carn = Carnivore(5, 20)
         herb_phi = [Herbivore(5, 0)]
         del_herb = carn.hunt_herb(herb_phi)
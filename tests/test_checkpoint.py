@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the checkpoint.py file in the biosim folder."""
+
+from biosim.checkpoint import CHECKPOINT_VERSION, load_checkpoint, save_checkpoint
+from biosim.simulation import BioSim
+import json
+import numpy as np
+import pytest
+
+
+def state(sim):
+    return (sim.year, sim.island.weight_list(), sim.island.age_list(),
+            sim.island.fitness_list(), sim.island.animal_counts()[0].tolist(),
+            sim.island.animal_counts()[1].tolist())
+
+
+class TestCheckpoint:
+
+    @pytest.mark.parametrize("backend", ["object", "array", "compiled"])
+    @pytest.mark.parametrize("rng", ["python", "numpy"])
+    def test_restore_is_exact(self, tmp_path, backend, rng):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(40)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        path = str(tmp_path / 'sim.npz')
+        sim = BioSim(island_map, ini_pop, seed=4, backend=backend, rng=rng)
+        sim.set_animal_parameters('Herbivore', {'zeta': 3.0})
+        sim.set_landscape_parameters('L', {'f_max': 500})
+        sim.simulate(6, vis_years=None)
+        sim.save_checkpoint(path)
+        sim.simulate(8, vis_years=None)
+
+        restored = BioSim.from_checkpoint(path)
+        assert restored.year == 6
+        assert restored.species['Herbivore'].params_dict['zeta'] == 3.0
+        restored.simulate(8, vis_years=None)
+        assert state(restored) == state(sim)
+
+    def test_fodder_restored(self, tmp_path):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(40)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        path = str(tmp_path / 'sim.npz')
+        sim = BioSim(island_map, ini_pop, seed=1)
+        sim.simulate(2, vis_years=None)
+        save_checkpoint(sim, path)
+        restored = load_checkpoint(path)
+        assert [cell.available_fodder for cell in restored.island.map.values()] == \
+               [cell.available_fodder for cell in sim.island.map.values()]
+
+    def test_version_checked(self, tmp_path):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(40)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        path = str(tmp_path / 'sim.npz')
+        save_checkpoint(BioSim(island_map, ini_pop, seed=1), path)
+        with np.load(path) as checkpoint:
+            arrays = dict(checkpoint)
+        meta = json.loads(str(arrays['meta']))
+        meta['version'] = CHECKPOINT_VERSION + 1
+        arrays['meta'] = np.array(json.dumps(meta))
+        with open(path, 'wb') as checkpoint_file:
+            np.savez(checkpoint_file, **arrays)
+        with pytest.raises(ValueError):
+            load_checkpoint(path)
+
+    def test_simulate_writes_checkpoints(self, tmp_path, mocker):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(40)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        path = str(tmp_path / 'sim.npz')
+        sim = BioSim(island_map, ini_pop, seed=1)
+        spy = mocker.spy(sim, 'save_checkpoint')
+        sim.simulate(7, vis_years=None, checkpoint_years=3, checkpoint_path=path)
+        assert spy.call_count == 2
+        assert load_checkpoint(path).year == 6
+
+    def test_checkpoint_needs_path(self):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(40)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        sim = BioSim(island_map, ini_pop, seed=1)
+        with pytest.raises(ValueError):
+            sim.simulate(2, vis_years=None, checkpoint_years=1)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the compiled.py file in the biosim folder."""
+
+from biosim import compiled
+from biosim.compiled import NumbaEngine, hunt_kernel, make_engine
+from biosim.grid import IslandGrid
+from biosim.island import CreateIsland
+from biosim.population import ArrayEngine
+from biosim.simulation import BioSim
+import numpy as np
+import pytest
+import random
+
+KERNELS = ('graze_kernel', 'hunt_kernel', 'procreation_kernel', 'migration_kernel',
+           'aging_kernel', 'death_kernel')
+
+
+def python_kernel(kernel):
+    return getattr(kernel, 'py_func', kernel)
+
+
+class TestNumbaEngine:
+
+    def test_backend(self):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(60)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 40} for _ in range(10)]},
+                   {'loc': (3, 4),
+                    'pop': [{'species': 'Herbivore', 'age': 3, 'weight': 30} for _ in range(20)]}]
+
+        island = CreateIsland(island_map, ini_pop, backend="compiled", rng=random.Random(1))
+        if compiled.NUMBA_AVAILABLE:
+            assert isinstance(island.engine, NumbaEngine)
+        assert island.num_animals_per_species == {'Herbivore': 80, 'Carnivore': 10}
+
+    def test_fallback(self, monkeypatch):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+
+        monkeypatch.setattr(compiled, 'NUMBA_AVAILABLE', False)
+        grid = IslandGrid(island_map.split('\n'), CreateIsland.map_params_dict)
+        with pytest.warns(UserWarning):
+            engine = make_engine(grid, rng=np.random.default_rng(1))
+        assert type(engine) is ArrayEngine
+
+    def test_reproducible(self):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(60)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 40} for _ in range(10)]},
+                   {'loc': (3, 4),
+                    'pop': [{'species': 'Herbivore', 'age': 3, 'weight': 30} for _ in range(20)]}]
+
+        first = BioSim(island_map, ini_pop, seed=5, backend="compiled")
+        second = BioSim(island_map, ini_pop, seed=5, backend="compiled")
+        first.simulate(10, vis_years=None)
+        second.simulate(10, vis_years=None)
+        assert first.island.weight_list() == second.island.weight_list()
+
+    def test_counts_follow_animals(self):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(60)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 40} for _ in range(10)]},
+                   {'loc': (3, 4),
+                    'pop': [{'species': 'Herbivore', 'age': 3, 'weight': 30} for _ in range(20)]}]
+
+        sim = BioSim(island_map, ini_pop, seed=5, backend="compiled")
+        sim.simulate(10, vis_years=None)
+        engine = sim.island.engine
+        herb_count, carn_count = sim.island.animal_counts()
+        assert np.array_equal(herb_count.reshape(-1), engine.herbivores.counts(engine.num_cells))
+        assert np.array_equal(carn_count.reshape(-1), engine.carnivores.counts(engine.num_cells))
+        assert sim.island.num_animals > 0
+
+    def test_same_as_python(self, monkeypatch):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(60)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 40} for _ in range(10)]},
+                   {'loc': (3, 4),
+                    'pop': [{'species': 'Herbivore', 'age': 3, 'weight': 30} for _ in range(20)]}]
+
+        compiled_island = CreateIsland(island_map, ini_pop, backend="compiled",
+                                       rng=random.Random(8))
+        python_island = CreateIsland(island_map, ini_pop, backend="compiled",
+                                     rng=random.Random(8))
+
+        for _ in range(5):
+            compiled_island.simulate_one_year()
+            with monkeypatch.context() as patch:
+                for name in KERNELS:
+                    patch.setattr(compiled, name, python_kernel(getattr(compiled, name)))
+                python_island.simulate_one_year()
+            assert compiled_island.num_animals > 0
+            assert compiled_island.weight_list() == pytest.approx(python_island.weight_list())
+
+    def test_hunt_kernel(self):
+        herb_cell = np.array([0, 0, 0, 1])
+        herb_phi = np.array([0.1, 0.2, 0.3, 0.1])
+        herb_weight = np.array([30.0, 30.0, 30.0, 30.0])
+        herb_alive = np.ones(4, dtype=bool)
+        carn_cell = np.array([0])
+        carn_weight = np.array([20.0])
+        carn_phi = np.array([0.9])
+
+        num_killed = hunt_kernel(np.arange(4), herb_cell, herb_phi, herb_weight, herb_alive,
+                                 np.arange(1), carn_cell, np.array([5]), carn_weight, carn_phi,
+                                 50.0, 0.75, 1e-6, 40.0, 0.3, 4.0, 0.4,
+                                 np.random.default_rng(1))
+        assert num_killed == 2
+        assert list(herb_alive) == [False, False, True, True]
+        assert carn_weight[0] == pytest.approx(20 + 0.75 * 50)
+        assert carn_phi[0] == pytest.approx(compiled.fitness(5, carn_weight[0], 40.0, 0.3,
+                                                             4.0, 0.4))
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the ensemble.py file in the biosim folder."""
+
+from biosim.animals import Herbivore
+from biosim.ensemble import run_ensemble, run_replicate
+import numpy as np
+import pytest
+
+
+class TestEnsemble:
+
+    def test_run_replicate(self):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(30)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        series = run_replicate(island_map, ini_pop, 3, 5)
+        assert series.shape == (6, 2)
+        assert list(series[0]) == [30, 5]
+
+    @pytest.mark.parametrize("backend", ["object", "array"])
+    def test_shape(self, backend):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(30)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        ensemble = run_ensemble(island_map, ini_pop, [1, 2, 3], 4, backend=backend,
+                                processes=2)
+        assert list(ensemble['Year']) == [0, 1, 2, 3, 4]
+        assert ensemble['Herbivore'].shape == (3, 5)
+        assert ensemble['Carnivore'].shape == (3, 5)
+        assert np.all(ensemble['Herbivore'][:, 0] == 30)
+
+    def test_reproducible(self):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(30)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        seeds = [5, 6, 5, 7]
+        parallel = run_ensemble(island_map, ini_pop, seeds, 5, processes=3)
+        single = run_ensemble(island_map, ini_pop, seeds, 5, processes=1)
+        assert np.array_equal(parallel['Herbivore'], single['Herbivore'])
+        assert np.array_equal(parallel['Herbivore'][0], parallel['Herbivore'][2])
+        assert np.array_equal(parallel['Herbivore'][1],
+                              run_replicate(island_map, ini_pop, 6, 5)[:, 0])
+
+    def test_params_stay_in_workers(self):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(30)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        omega = Herbivore.params_dict['omega']
+        ensemble = run_ensemble(island_map, ini_pop, [1, 2], 1,
+                                params={'Herbivore': {'omega': 1e9}}, processes=2)
+        assert np.all(ensemble['Herbivore'][:, 1] == 0)
+        assert Herbivore.params_dict['omega'] == omega
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the grid.py file in the biosim folder."""
+
+from biosim.grid import IslandGrid
+from biosim.island import CreateIsland
+from biosim.landscape import Lowland, Highland, Desert
+import pytest
+
+
+class TestIslandGrid:
+
+    @pytest.fixture
+    def grid(self):
+        map_list = ['WWWWW', 'WLHDW', 'WWLWW', 'WWWWW']
+        return IslandGrid(map_list, CreateIsland.map_params_dict)
+
+    def test_init(self, grid):
+        assert grid.shape == (4, 5)
+        assert grid.num_cells == 20
+        assert grid.letters[grid.landscape[1, 2]] == 'H'
+        assert grid.accessible[1, 1] and grid.accessible[2, 2]
+        assert not grid.accessible[0, 0] and not grid.accessible[2, 1]
+        assert grid.herb_count.sum() == 0 and grid.carn_count.sum() == 0
+
+    def test_fodder(self, grid):
+        assert grid.fodder[1, 1] == Lowland.params_dict["f_max"]
+        assert grid.fodder[1, 2] == Highland.params_dict["f_max"]
+        assert grid.fodder[1, 3] == Desert.params["f_max"]
+        assert grid.fodder[0, 0] == 0
+
+        grid.fodder[1, 1] = 0
+        grid.fodder_regrow()
+        assert grid.fodder[1, 1] == Lowland.params_dict["f_max"]
+
+    def test_index(self, grid):
+        assert grid.cell_index((2, 3)) == 7
+        assert grid.location(7) == (2, 3)
+        assert grid.contains((4, 5))
+        assert not grid.contains((5, 1))
+        assert not grid.contains((0, 1))
+
+    def test_neighbours(self, grid):
+        assert grid.neighbour_locations((2, 3)) == [(1, 3), (3, 3), (2, 2), (2, 4)]
+        assert list(grid.neighbours[7]) == [2, 12, 6, 8]
+
+
+class TestArrayIsland:
+
+    def test_large_map(self):
+        lines = ['W' * 300] + ['W' + 'L' * 298 + 'W' for _ in range(298)] + ['W' * 300]
+        island = CreateIsland('\n'.join(lines),
+                              [{'loc': (150, 150),
+                                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}]}],
+                              backend="array")
+        assert island.map == {}
+        assert island.grid.shape == (300, 300)
+        island.simulate_one_year()
+        assert island.num_animals <= 2
@@ -190,6 +190,41 @@ class TestCreateIsland:
         assert test_island.map[(3, 3)].num_animals == 0  # South- east
         assert test_island.map[(3, 1)].num_animals == 0  # South- west
 
+    def test_migration_conserves_population(self):
+        multi_string = "WWWWW\nWLLHW\nWLDLW\nWHLLW\nWWWWW"
+        pop = [{'loc': (3, 3),
+                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(200)] +
+                       [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(50)]}]
+        test_island = CreateIsland(multi_string, pop)
+
+        for _ in range(5):
+            test_island.new_year_reset()
+            test_island.migration_animals()
+            animals = [animal for cell in test_island.map.values()
+                       for animal in cell.present_herbivores + cell.present_carnivores]
+            assert test_island.num_animals_per_species == {'Herbivore': 200, 'Carnivore': 50}
+            assert len(set(map(id, animals))) == 250
+
+        assert test_island.map[(3, 3)].num_animals < 250
+        for loc, cell in test_island.map.items():
+            if not cell.accessibility:
+                assert cell.num_animals == 0
+
+    def test_animal_counts(self):
+        multi_string = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        pop = [{'loc': (2, 2),
+                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(60)] +
+                       [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(10)]}]
+        test_island = CreateIsland(multi_string, pop)
+        herb_counts, carn_counts = test_island.animal_counts()
+        assert herb_counts[1, 1] == 60 and carn_counts[1, 1] == 10
+
+        for _ in range(10):
+            test_island.simulate_one_year()
+            for (row, col), cell in test_island.map.items():
+                assert herb_counts[row - 1, col - 1] == cell.num_herbivores
+                assert carn_counts[row - 1, col - 1] == cell.num_carnivores
+
     def test_aging_animals(self):
         multi_string = "WWW\nWLW\nWWW"
         pop = [{'loc': (2, 2),
@@ -214,7 +249,48 @@ class TestCreateIsland:
         print(num_animals_before, num_animals_after)
         assert num_animals_before > num_animals_after
 
+    def test_death_animals_count(self):
+        pop = [{'loc': (2, 2),
+                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 2} for _ in range(50)] +
+                [{'species': 'Carnivore', 'age': 5, 'weight': 0} for _ in range(5)]}]
+        test_island = CreateIsland("WWW\nWLW\nWWW", pop, rng=random.Random(5))
+
+        num_dead = test_island.death_animals()
+        assert num_dead == 55 - test_island.num_animals
+        assert test_island.num_animals_per_species['Carnivore'] == 0
+
     def test_simulate_one_year(self):
         pass
 
+    def test_occupied_cells(self):
+        pop = [{'loc': (2, 3), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}]},
+               {'loc': (3, 2), 'pop': [{'species': 'Carnivore', 'age': 5, 'weight': 20}]}]
+        test_island = CreateIsland("WWWW\nWLLW\nWLHW\nWWWW", pop, rng=random.Random(1))
+        assert test_island.occupied_cells() == [6, 9]
+
+    def test_phases_skip_empty_cells(self, mocker):
+        pop = [{'loc': (2, 2),
+                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(10)]}]
+        test_island = CreateIsland("WWWW\nWLLW\nWLHW\nWWWW", pop, rng=random.Random(1))
+        empty = test_island.map[(3, 3)]
+        for method in ('eat', 'procreation', 'migrate', 'aging', 'animal_death'):
+            mocker.spy(empty, method)
+
+        test_island.simulate_one_year()
+        for method in ('eat', 'procreation', 'migrate', 'aging', 'animal_death'):
+            assert getattr(empty, method).call_count == 0
+
+    def test_empty_cell_fodder_regrows_when_occupied(self):
+        pop = [{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}]}]
+        test_island = CreateIsland("WWWW\nWLLW\nWWWW", pop, rng=random.Random(1))
+        empty = test_island.map[(2, 3)]
+        empty.available_fodder = 123
+        test_island.feed_animal()
+        assert empty.available_fodder == 123
+
+        test_island.add_population([{'loc': (2, 3), 'pop': [{'species': 'Herbivore',
+                                                             'age': 5, 'weight': 20}]}])
+        test_island.feed_animal()
+        assert empty.available_fodder == empty.params_dict['f_max'] - Herbivore.params_dict['F']
+
 
@@ -118,6 +118,39 @@ class TestSingleClass:
         lowland.feed_herb()
         assert lowland.available_fodder == 0
 
+    def test_feed_herb_in_bulk(self):
+        lowland = Lowland(random.Random(2))
+        lowland.animals_allocate([{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                  for _ in range(5)])
+        lowland.available_fodder = 25
+        lowland.feed_herb()
+
+        gains = sorted(herb.weight - 20 for herb in lowland.present_herbivores)
+        beta = Herbivore.params_dict['beta']
+        assert gains == pytest.approx([0, 0, beta * 5, beta * 10, beta * 10])
+        assert lowland.available_fodder == 0
+
+        lowland.available_fodder = 800
+        lowland.feed_herb()
+        assert lowland.available_fodder == 800 - 5 * Herbivore.params_dict['F']
+
+    def test_feed_herb_distribution(self):
+        lowland = Lowland(random.Random(3))
+        lowland.animals_allocate([{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                  for _ in range(5)])
+        times_fed = [0] * 5
+        times_last = [0] * 5
+        for _ in range(3000):
+            for herb in lowland.present_herbivores:
+                herb.weight = 20
+            lowland.available_fodder = 25
+            lowland.feed_herb()
+            for number, herb in enumerate(lowland.present_herbivores):
+                times_fed[number] += herb.weight > 20
+                times_last[number] += 20 < herb.weight < 25
+        assert all(abs(fed / 3000 - 3 / 5) < 0.05 for fed in times_fed)
+        assert all(abs(last / 3000 - 1 / 5) < 0.05 for last in times_last)
+
     def test_feed_carn_with_herb(self):
         lowland = Lowland()
 
@@ -143,6 +176,28 @@ class TestSingleClass:
         sorted_phi_carn = [carn.phi for carn in lowland.present_carnivores]
         assert sorted_phi_carn[0] > sorted_phi_carn[1]
 
+    def test_feed_carn_with_herb_many_carnivores(self):
+        state = random.getstate()
+
+        def hunt():
+            random.setstate(state)
+            lowland = Lowland()
+            lowland.animals_allocate([{'species': 'Herbivore', 'age': 40, 'weight': 5}
+                                      for _ in range(500)])
+            lowland.animals_allocate([{'species': 'Carnivore', 'age': 5, 'weight': 30}
+                                      for _ in range(40)])
+            lowland.feed_carn_with_herb()
+            return lowland
+
+        lowland = hunt()
+        assert 0 < len(lowland.present_herbivores) < 500
+        assert all(herb.alive for herb in lowland.present_herbivores)
+        phis = [herb.phi for herb in lowland.present_herbivores]
+        assert phis == sorted(phis)
+        assert ([carn.weight for carn in lowland.present_carnivores] ==
+                [carn.weight for carn in hunt().present_carnivores])
+        random.setstate(state)
+
     def test_procreation(self, mocker):
         mocker.patch('random.random', return_value=0.0)
         mocker.patch('random.gauss', return_value=5)
@@ -280,6 +335,36 @@ class TestSingleClass:
         lowland.animal_death()
         assert carn_not_dying in lowland.present_herbivores
 
+    def test_animal_death_in_place(self):
+        lowland = Lowland(random.Random(4))
+        lowland.animals_allocate(
+            [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(10)])
+        lowland.animals_allocate(
+            [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(10)])
+        herbs = lowland.present_herbivores
+        for herb in herbs[:4]:
+            herb.weight = 0
+        for carn in lowland.present_carnivores:
+            carn.weight = 0
+
+        survivors = herbs[4:]
+        num_dead = lowland.animal_death()
+        assert lowland.present_herbivores is herbs
+        assert num_dead == 20 - len(herbs)
+        assert all(herb in survivors for herb in herbs)
+        assert lowland.present_carnivores == []
+
+    def test_dead_animals_pooled(self):
+        lowland = Lowland.per_simulation_class({'Herbivore': Herbivore.per_simulation_class(),
+                                                'Carnivore': Carnivore.per_simulation_class()})()
+        lowland.animals_allocate(
+            [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(5)])
+        herb_dying = lowland.present_herbivores[0]
+        herb_dying.weight = 0
+
+        lowland.animal_death()
+        assert herb_dying in type(herb_dying)._pool
+
     def test_num_herbivores(self):
         lowland = Lowland()
         ini_animal = [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(20)]
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the metrics.py file in the biosim folder."""
+
+from biosim.island import CreateIsland
+from biosim.metrics import PHASES, SimulationMetrics
+from biosim.simulation import BioSim
+import random
+import pytest
+
+
+class TestSimulationMetrics:
+
+    @pytest.mark.parametrize("backend", ["object", "array"])
+    def test_counts_add_up(self, backend):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(60)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 40} for _ in range(10)]}]
+
+        metrics = SimulationMetrics()
+        island = CreateIsland(island_map, ini_pop, backend=backend, rng=random.Random(3),
+                              metrics=metrics)
+        for _ in range(5):
+            before = island.num_animals_per_species
+            after = island.simulate_one_year()
+            record = metrics.last_year
+            assert record['year'] == island.year
+            assert set(record['seconds']) == set(PHASES)
+            assert after['Herbivore'] == (before['Herbivore'] + record['births']['Herbivore']
+                                          - record['deaths']['Herbivore'] - record['kills'])
+            assert after['Carnivore'] == (before['Carnivore'] + record['births']['Carnivore']
+                                          - record['deaths']['Carnivore'])
+
+        assert metrics.years == 5
+        assert metrics.migrations > 0
+        assert metrics.summary()['share']['feed_animal'] > 0
+
+    @pytest.mark.parametrize("backend", ["object", "array"])
+    def test_same_result_as_unmeasured(self, backend):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(60)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 40} for _ in range(10)]}]
+
+        measured = CreateIsland(island_map, ini_pop, backend=backend, rng=random.Random(3),
+                                metrics=SimulationMetrics())
+        plain = CreateIsland(island_map, ini_pop, backend=backend, rng=random.Random(3))
+        for _ in range(5):
+            assert measured.simulate_one_year() == plain.simulate_one_year()
+        assert measured.weight_list() == plain.weight_list()
+
+    def test_callbacks(self, mocker):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(60)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 40} for _ in range(10)]}]
+
+        callback = mocker.Mock()
+        sim = BioSim(island_map, ini_pop, seed=1, metrics=SimulationMetrics([callback]))
+        sim.simulate(3, vis_years=None)
+        assert callback.call_count == 3
+        assert callback.call_args[0][0]['year'] == 3
+
+    def test_switch_on_and_off(self, mocker):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(60)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 40} for _ in range(10)]}]
+
+        sim = BioSim(island_map, ini_pop, seed=1)
+        spy = mocker.spy(sim.island, '_simulate_one_year_measured')
+        sim.simulate(2, vis_years=None)
+        assert spy.call_count == 0
+
+        sim.metrics = SimulationMetrics()
+        sim.simulate(2, vis_years=None)
+        assert sim.metrics.years == 2
+        sim.metrics = None
+        sim.simulate(1, vis_years=None)
+        assert spy.call_count == 2
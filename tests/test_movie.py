@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the movie.py file in the biosim folder."""
+
+from biosim import simulation
+from biosim.movie import MovieWriter
+from biosim.simulation import BioSim
+import glob
+import os
+import stat
+import sys
+import matplotlib.pyplot as plt
+import pytest
+
+FAKE_FFMPEG = """#!{python}
+import sys
+data = sys.stdin.buffer.read()
+with open(sys.argv[-1], 'w') as movie:
+    movie.write(' '.join(sys.argv[1:-1]) + '\\n' + str(len(data)))
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    """Script that records its arguments and the number of bytes it got on stdin."""
+
+    path = tmp_path / 'ffmpeg'
+    path.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def read_movie(filename):
+    with open(filename) as movie:
+        args, num_bytes = movie.read().split('\n')
+    return args, int(num_bytes)
+
+
+class TestMovieWriter:
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            MovieWriter('movie', 'avi')
+
+    def test_stream(self, tmp_path, fake_ffmpeg):
+        fig = plt.figure(figsize=(2, 1), dpi=50)
+        writer = MovieWriter(str(tmp_path / 'movie'), 'mp4', ffmpeg_binary=fake_ffmpeg)
+        for _ in range(3):
+            writer.write_frame(fig)
+        assert writer.close() == str(tmp_path / 'movie.mp4')
+        plt.close(fig)
+
+        args, num_bytes = read_movie(str(tmp_path / 'movie.mp4'))
+        assert '-s 100x50' in args
+        assert num_bytes == 3 * 100 * 50 * 4
+
+    def test_gif_palette(self, tmp_path, fake_ffmpeg):
+        fig = plt.figure(figsize=(1, 1), dpi=20)
+        writer = MovieWriter(str(tmp_path / 'movie'), 'gif', ffmpeg_binary=fake_ffmpeg)
+        writer.write_frame(fig)
+        writer.close()
+        plt.close(fig)
+
+        args, _ = read_movie(str(tmp_path / 'movie.gif'))
+        assert 'palettegen' in args
+
+    def test_missing_ffmpeg(self, tmp_path):
+        fig = plt.figure(figsize=(1, 1), dpi=20)
+        writer = MovieWriter(str(tmp_path / 'movie'), ffmpeg_binary=str(tmp_path / 'none'))
+        with pytest.raises(RuntimeError):
+            writer.write_frame(fig)
+        plt.close(fig)
+
+    def test_close_without_frames(self):
+        assert MovieWriter('movie').close() is None
+
+
+class TestBioSimMovie:
+
+    @pytest.fixture(autouse=True)
+    def ffmpeg(self, mocker, fake_ffmpeg):
+        mocker.patch.object(simulation, '_FFMPEG_BINARY', fake_ffmpeg)
+
+    def test_stream_without_images(self, tmp_path):
+        base = str(tmp_path / 'dv')
+        sim = BioSim("WWWW\nWLHW\nWWWW", [], seed=1, img_base=base,
+                     movie_fmt='mp4', keep_images=False)
+        sim.simulate(4, vis_years=1, img_years=2)
+        assert sim.make_movie() == base + '.mp4'
+        plt.close(sim.visualization.figure)
+
+        assert glob.glob(base + '_*.png') == []
+        width, height = sim.visualization.figure.canvas.get_width_height(physical=True)
+        assert read_movie(base + '.mp4')[1] == 2 * width * height * 4
+
+    def test_stream_and_keep_images(self, tmp_path):
+        base = str(tmp_path / 'dv')
+        sim = BioSim("WWWW\nWLHW\nWWWW", [], seed=1, img_base=base, movie_fmt='gif')
+        sim.simulate(2, vis_years=1, img_years=1)
+        with pytest.raises(ValueError):
+            sim.make_movie('mp4')
+        sim.make_movie()
+        plt.close(sim.visualization.figure)
+
+        assert len(glob.glob(base + '_*.png')) == 2
+        assert os.path.isfile(base + '.gif')
+
+    def test_movie_from_images(self, tmp_path):
+        base = str(tmp_path / 'dv')
+        sim = BioSim("WWWW\nWLHW\nWWWW", [], seed=1, img_base=base)
+        sim.simulate(2, vis_years=1, img_years=1)
+        plt.close(sim.visualization.figure)
+
+        assert sim.make_movie('gif') == base + '.gif'
+        args, _ = read_movie(base + '.gif')
+        assert base + '_%05d.png' in args
+
+    def test_movie_needs_img_base(self):
+        with pytest.raises(ValueError):
+            BioSim("WWWW\nWLHW\nWWWW", [], seed=1, movie_fmt='mp4')
+        with pytest.raises(RuntimeError):
+            BioSim("WWWW\nWLHW\nWWWW", [], seed=1).make_movie()
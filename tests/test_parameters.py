@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the parameters.py file in the biosim folder."""
+
+from biosim.animals import Herbivore, Carnivore
+from biosim.landscape import Desert
+from biosim.parameters import AnimalParameters
+import pickle
+import pytest
+from pytest import approx
+
+
+class TestAnimalParameters:
+
+    def test_derived(self):
+        params = Carnivore.params_dict
+        constants = AnimalParameters.from_dict(params)
+        assert constants.birth_threshold == approx(params['zeta'] *
+                                                   (params['w_birth'] + params['sigma_birth']))
+        assert constants.max_gain == approx(params['beta'] * params['F'])
+        assert constants.inv_delta_phi_max == approx(1 / params['DeltaPhiMax'])
+
+    def test_no_hunting(self):
+        constants = AnimalParameters.from_dict(Herbivore.params_dict)
+        assert constants.DeltaPhiMax is None
+        assert constants.inv_delta_phi_max is None
+
+    def test_immutable(self):
+        constants = Herbivore.constants
+        with pytest.raises(AttributeError):
+            constants.F = 100
+
+    def test_set_parameters_updates_constants(self):
+        Herbivore.set_parameters({'F': 20, 'beta': 0.5})
+        assert Herbivore.constants.F == 20
+        assert Herbivore.constants.max_gain == approx(10)
+
+    def test_per_simulation_class(self):
+        own = Herbivore.per_simulation_class()
+        own.set_parameters({'mu': 0.9})
+        assert own.constants.mu == 0.9
+        assert Herbivore.params_dict['mu'] != 0.9
+        assert Herbivore.constants.mu != 0.9
+        assert own.__name__ == 'Herbivore'
+        assert isinstance(own(5, 20), Herbivore)
+
+    def test_pickle_per_simulation_class(self):
+        own = Herbivore.per_simulation_class()
+        own.set_parameters({'mu': 0.9})
+        desert = Desert.per_simulation_class({'Herbivore': own, 'Carnivore': Carnivore})
+        desert.cell_parameter({'f_max': 20})
+
+        animal, restored, restored_desert = pickle.loads(pickle.dumps((own(5, 20), own,
+                                                                       desert)))
+        assert type(animal) is restored
+        assert restored is not Herbivore and issubclass(restored, Herbivore)
+        assert restored.constants.mu == 0.9
+        assert restored_desert.species['Herbivore'] is restored
+        assert restored_desert.params is restored_desert.params_dict
+        assert restored_desert.params['f_max'] == 20
+        assert pickle.loads(pickle.dumps(Herbivore)) is Herbivore
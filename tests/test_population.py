@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the population.py file in the biosim folder."""
+
+from biosim.animals import Herbivore, Carnivore
+from biosim.grid import IslandGrid
+from biosim.island import CreateIsland
+from biosim.landscape import Lowland, Highland
+from biosim.population import Population, ArrayEngine
+import numpy as np
+import pytest
+from pytest import approx
+
+
+class TestPopulation:
+
+    def test_add(self):
+        herbs = Population(Herbivore, capacity=2)
+        herbs.add([3, 3, 4], [5, 0, 6], [20, 5, 0])
+        assert len(herbs) == 3
+        assert list(herbs.cell) == [3, 3, 4]
+        assert herbs.phi[0] == approx(Herbivore(5, 20).phi)
+        assert herbs.phi[1] == approx(Herbivore(0, 5).phi)
+        assert herbs.phi[2] == 0
+
+    def test_keep(self):
+        carns = Population(Carnivore)
+        carns.add([1, 2, 3, 4], [1, 2, 3, 4], [10, 20, 30, 40])
+        carns.keep(np.array([True, False, True, False]))
+        assert list(carns.age) == [1, 3]
+        assert list(carns.weight) == [10, 30]
+
+    def test_counts(self):
+        herbs = Population(Herbivore)
+        herbs.add([0, 2, 2], [1, 1, 1], [10, 10, 10])
+        assert list(herbs.counts(4)) == [1, 0, 2, 0]
+
+
+class TestArrayEngine:
+
+    @pytest.fixture
+    def engine(self):
+        map_list = ['WWWW', 'WLHW', 'WDWW', 'WWWW']
+        return ArrayEngine(IslandGrid(map_list, CreateIsland.map_params_dict),
+                           rng=np.random.default_rng(1))
+
+    def test_init(self, engine):
+        assert engine.num_cells == 16
+        assert engine.fodder[engine.cell_index((2, 2))] == Lowland.params_dict["f_max"]
+        assert engine.fodder[engine.cell_index((2, 3))] == Highland.params_dict["f_max"]
+        assert engine.accessible[engine.cell_index((3, 2))]
+        assert not engine.accessible[engine.cell_index((1, 1))]
+
+    def test_add_animals(self, engine):
+        engine.add_animals((2, 2), [{'species': 'Herbivore', 'age': 5, 'weight': 20},
+                                    {'species': 'Carnivore', 'age': 5, 'weight': 20}])
+        assert len(engine.herbivores) == 1
+        assert len(engine.carnivores) == 1
+
+        with pytest.raises(TypeError):
+            engine.add_animals((2, 2), [{'species': 'Dog', 'age': 5, 'weight': 20}])
+        with pytest.raises(ValueError):
+            engine.add_animals((2, 2), [{'species': 'Herbivore', 'age': -1, 'weight': 20}])
+
+    def test_graze(self, engine):
+        f_max = Highland.params_dict["f_max"]
+        appetite = Herbivore.params_dict["F"]
+        num_herbs = int(f_max // appetite) + 10
+        engine.add_animals((2, 3), [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                    for _ in range(num_herbs)])
+        engine.feed()
+        gained = engine.herbivores.weight - 20
+        assert engine.fodder[engine.cell_index((2, 3))] == 0
+        assert gained.sum() == approx(f_max * Herbivore.params_dict["beta"])
+        assert np.count_nonzero(gained) == np.ceil(f_max / appetite)
+
+    def test_hunt(self, engine):
+        engine.add_animals((3, 2), [{'species': 'Herbivore', 'age': 50, 'weight': 3}
+                                    for _ in range(50)])
+        engine.add_animals((3, 2), [{'species': 'Carnivore', 'age': 5, 'weight': 40}])
+        engine.feed()
+        assert len(engine.herbivores) < 50
+        assert engine.carnivores.weight[0] > 40
+
+    def test_procreation(self, engine):
+        engine.add_animals((2, 2), [{'species': 'Carnivore', 'age': 5, 'weight': 80}
+                                    for _ in range(20)])
+        engine.add_animals((2, 3), [{'species': 'Carnivore', 'age': 5, 'weight': 80}])
+        engine.procreation()
+        counts = engine.carnivores.counts(engine.num_cells)
+        assert counts[engine.cell_index((2, 2))] > 20
+        assert counts[engine.cell_index((2, 3))] == 1
+        assert np.all(engine.carnivores.weight[:20] < 80)
+
+    def test_migration(self, engine):
+        engine.add_animals((2, 2), [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                    for _ in range(100)])
+        engine.migration()
+        herb_counts, carn_counts = engine.counts()
+        assert herb_counts.sum() == 100
+        assert np.all(herb_counts[~engine.accessible] == 0)
+        assert herb_counts[engine.cell_index((2, 3))] > 0
+        assert np.count_nonzero(engine.herbivores.has_migrated) == 100 - herb_counts[5]
+
+    def test_aging(self, engine):
+        engine.add_animals((2, 2), [{'species': 'Herbivore', 'age': 3, 'weight': 12}])
+        engine.aging()
+        assert engine.herbivores.age[0] == 4
+        assert engine.herbivores.weight[0] == approx(11.4)
+
+    def test_death(self, engine):
+        engine.add_animals((2, 2), [{'species': 'Herbivore', 'age': 5, 'weight': 0},
+                                    {'species': 'Carnivore', 'age': 5, 'weight': 0}])
+        assert engine.death() == 2
+        assert len(engine.herbivores) == 0
+        assert len(engine.carnivores) == 0
+
+
+class TestArrayBackend:
+
+    def test_invalid_backend(self):
+        with pytest.raises(ValueError):
+            CreateIsland("WWW\nWLW\nWWW", [], backend="dict")
+
+    def test_simulate_one_year(self):
+        pop = [{'loc': (2, 2),
+                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(50)] +
+                       [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+        island = CreateIsland("WWWW\nWLHW\nWWWW", pop, backend="array")
+        assert island.num_animals_per_species == {'Herbivore': 50, 'Carnivore': 5}
+
+        for _ in range(10):
+            island.simulate_one_year()
+        assert island.year == 10
+        assert island.animal_counts()[0].sum() == island.num_animals_per_species["Herbivore"]
+        assert len(island.age_list()[0]) == island.num_animals_per_species["Herbivore"]
+
+    def test_animal_counts(self):
+        pop = [{'loc': (2, 2),
+                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(60)] +
+                       [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(10)]}]
+        island = CreateIsland("WWWWW\nWLLHW\nWLDLW\nWWWWW", pop, backend="array")
+        herb_counts, carn_counts = island.animal_counts()
+
+        for _ in range(10):
+            island.simulate_one_year()
+            engine = island.engine
+            assert np.array_equal(herb_counts.ravel(), engine.herbivores.counts(engine.num_cells))
+            assert np.array_equal(carn_counts.ravel(), engine.carnivores.counts(engine.num_cells))
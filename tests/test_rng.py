@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the rng.py file in the biosim folder."""
+
+from biosim.rng import BlockRandom, make_rng, numpy_generator
+import numpy as np
+import random
+import pytest
+from pytest import approx
+
+
+class TestBlockRandom:
+
+    def test_reproducible(self):
+        first = BlockRandom(3, block_size=8)
+        second = BlockRandom(3, block_size=8)
+        assert [first.random() for _ in range(20)] == [second.random() for _ in range(20)]
+
+    def test_blocks_match_generator(self):
+        rng = BlockRandom(3, block_size=5)
+        values = [rng.random() for _ in range(12)]
+        generator = np.random.default_rng(3)
+        expected = np.concatenate([generator.random(5) for _ in range(3)])[:12]
+        assert values == approx(expected.tolist())
+
+    def test_gauss(self):
+        rng = BlockRandom(1)
+        values = np.array([rng.gauss(10, 2) for _ in range(20000)])
+        assert values.mean() == approx(10, abs=0.1)
+        assert values.std() == approx(2, abs=0.1)
+
+    def test_choices_and_shuffle(self):
+        rng = BlockRandom(1)
+        population = ['a', 'b', 'c']
+        assert set(rng.choices(population, k=100)) == set(population)
+        assert rng.choice(population) in population
+
+        items = list(range(50))
+        rng.shuffle(items)
+        assert sorted(items) == list(range(50))
+        assert items != list(range(50))
+
+    def test_sample(self):
+        rng = BlockRandom(1)
+        population = list(range(100))
+        sample = rng.sample(population, 30)
+        assert len(set(sample)) == 30
+        assert set(sample) <= set(population)
+        assert rng.sample(population, 0) == []
+
+    def test_getrandbits(self):
+        rng = BlockRandom(1)
+        assert all(0 <= rng.getrandbits(13) < 2 ** 13 for _ in range(100))
+        assert rng.getrandbits(64) < 2 ** 64
+
+
+class TestMakeRng:
+
+    def test_kinds(self):
+        assert isinstance(make_rng("python", 1), random.Random)
+        assert isinstance(make_rng("numpy", 1), BlockRandom)
+        with pytest.raises(ValueError):
+            make_rng("other")
+
+    def test_numpy_generator(self):
+        rng = BlockRandom(1)
+        assert numpy_generator(rng) is rng.generator
+        first = numpy_generator(random.Random(4)).random()
+        assert first == numpy_generator(random.Random(4)).random()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the simulation.py file in the biosim folder."""
+
+from biosim.simulation import BioSim
+import subprocess
+import sys
+import pytest
+
+
+class TestHeadless:
+
+    @pytest.fixture
+    def sim(self):
+        return BioSim(island_map="WWWW\nWLHW\nWWWW",
+                      ini_pop=[{'loc': (2, 2),
+                                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                        for _ in range(20)]}],
+                      seed=1)
+
+    def test_no_figure(self, sim):
+        sim.simulate(num_years=5, vis_years=None)
+        assert sim.visualization is None
+        assert sim.year == 5
+
+    def test_images_need_visualization(self, sim):
+        with pytest.raises(ValueError):
+            sim.simulate(num_years=5, vis_years=None, img_years=1)
+
+    def test_pyplot_not_imported(self):
+        code = ("import sys\n"
+                "from biosim.simulation import BioSim\n"
+                "sim = BioSim('WWW\\nWLW\\nWWW', [], seed=1)\n"
+                "sim.simulate(3, vis_years=None)\n"
+                "print('matplotlib.pyplot' in sys.modules)")
+        out = subprocess.check_output([sys.executable, '-c', code])
+        assert out.decode().strip() == 'False'
+
+
+class TestLazyImports:
+
+    @pytest.mark.parametrize('module', ['pandas', 'matplotlib', 'subprocess'])
+    def test_not_imported(self, module):
+        code = ("import sys\n"
+                "import biosim.simulation\n"
+                f"print({module!r} in sys.modules)")
+        out = subprocess.check_output([sys.executable, '-c', code])
+        assert out.decode().strip() == 'False'
+
+    def test_animal_distribution(self):
+        sim = BioSim(island_map="WWW\nWLW\nWWW",
+                     ini_pop=[{'loc': (2, 2),
+                               'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}]}],
+                     seed=1)
+        df = sim.animal_distribution
+        assert list(df.columns) == ['Row', 'Col', 'Herbivore', 'Carnivore']
+        assert df.set_index(['Row', 'Col']).loc[(2, 2), 'Herbivore'] == 1
+
+
+class TestHeatmap:
+
+    def test_no_copy(self):
+        sim = BioSim(island_map="WWWW\nWLHW\nWWWW",
+                     ini_pop=[{'loc': (2, 3),
+                               'pop': [{'species': 'Carnivore', 'age': 5, 'weight': 20}]}],
+                     seed=1)
+        herb_array, carn_array = sim.create_population_heatmap()
+        assert herb_array is sim.island.grid.herb_count
+        assert carn_array.shape == (3, 4)
+        assert carn_array[1, 2] == 1
+        assert sim.length_of_map() == (4, 3)
+
+
+class TestRandomGenerator:
+
+    @staticmethod
+    def make_sim(seed, rng="python", backend="object"):
+        return BioSim(island_map="WWWWW\nWLLHW\nWLDLW\nWWWWW",
+                      ini_pop=[{'loc': (2, 2),
+                                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                        for _ in range(40)] +
+                                       [{'species': 'Carnivore', 'age': 5, 'weight': 20}
+                                        for _ in range(5)]}],
+                      seed=seed, rng=rng, backend=backend)
+
+    def test_unknown_rng(self):
+        with pytest.raises(ValueError):
+            self.make_sim(1, rng="mersenne")
+
+    @pytest.mark.parametrize("rng", ["python", "numpy"])
+    @pytest.mark.parametrize("backend", ["object", "array"])
+    def test_simulations_do_not_interfere(self, rng, backend):
+        alone = self.make_sim(1, rng, backend)
+        alone.simulate(num_years=10, vis_years=None)
+
+        first = self.make_sim(1, rng, backend)
+        second = self.make_sim(2, rng, backend)
+        for _ in range(10):
+            first.simulate(num_years=1, vis_years=None)
+            second.simulate(num_years=1, vis_years=None)
+
+        assert first.num_animals_per_species == alone.num_animals_per_species
+
+    def test_global_random_untouched(self):
+        import random
+        state = random.getstate()
+        sim = self.make_sim(1)
+        sim.simulate(num_years=3, vis_years=None)
+        assert random.getstate() == state
+
+
+class TestSimulationParameters:
+
+    @staticmethod
+    def make_sim(backend="object"):
+        return BioSim(island_map="WWWWW\nWLLHW\nWLDLW\nWWWWW",
+                      ini_pop=[{'loc': (2, 2),
+                                'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                        for _ in range(40)]}],
+                      seed=1, backend=backend)
+
+    @pytest.mark.parametrize("backend", ["object", "array"])
+    def test_parameters_do_not_leak(self, backend):
+        from biosim.animals import Herbivore
+        from biosim.landscape import Lowland
+
+        reference = self.make_sim(backend)
+        reference.simulate(num_years=5, vis_years=None)
+
+        changed = self.make_sim(backend)
+        changed.set_animal_parameters('Herbivore', {'omega': 1e9})
+        changed.set_landscape_parameters('L', {'f_max': 1.})
+        other = self.make_sim(backend)
+        changed.simulate(num_years=1, vis_years=None)
+        other.simulate(num_years=5, vis_years=None)
+
+        assert changed.num_animals == 0
+        assert other.num_animals_per_species == reference.num_animals_per_species
+        assert Herbivore.params_dict['omega'] != 1e9
+        assert Lowland.params_dict['f_max'] != 1.
+
+    def test_desert_parameters(self):
+        sim = self.make_sim()
+        sim.set_landscape_parameters('D', {'f_max': 50.})
+        assert sim.island.map[(3, 3)].params['f_max'] == 50.
+        sim.add_population([{'loc': (3, 3),
+                             'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}]}])
+        sim.simulate(num_years=1, vis_years=None)
+        appetite = sim.species['Herbivore'].params_dict['F']
+        assert sim.island.map[(3, 3)].available_fodder == 50. - appetite
+
+    @pytest.mark.parametrize("backend", ["object", "array", "compiled"])
+    def test_pickle(self, backend):
+        import pickle
+
+        sim = self.make_sim(backend)
+        sim.set_animal_parameters('Herbivore', {'omega': 0.3})
+        sim.set_landscape_parameters('L', {'f_max': 500.})
+        sim.simulate(num_years=2, vis_years=None)
+        restored = pickle.loads(pickle.dumps(sim))
+
+        assert restored.species['Herbivore'].constants.omega == 0.3
+        assert restored.landscapes['L'].params_dict['f_max'] == 500.
+        assert restored.landscapes['L'].species is restored.species
+        sim.simulate(num_years=3, vis_years=None)
+        restored.simulate(num_years=3, vis_years=None)
+        assert restored.num_animals_per_species == sim.num_animals_per_species
+
+    def test_concurrent_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        def run(omega):
+            sim = self.make_sim()
+            sim.set_animal_parameters('Herbivore', {'omega': omega})
+            sim.simulate(num_years=5, vis_years=None)
+            return sim.num_animals_per_species['Herbivore']
+
+        sequential = [run(omega) for omega in (0.1, 0.4, 0.8)]
+        with ThreadPoolExecutor(3) as pool:
+            assert list(pool.map(run, (0.1, 0.4, 0.8))) == sequential
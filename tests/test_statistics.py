@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the statistics.py file in the biosim folder."""
+
+from biosim.island import CreateIsland
+from biosim.statistics import StatisticsCollector
+import numpy as np
+import pytest
+
+
+class TestStatisticsCollector:
+
+    @pytest.fixture
+    def population(self):
+        return [{'loc': (2, 2),
+                 'pop': [{'species': 'Herbivore', 'age': age % 20, 'weight': 10 + age % 30}
+                         for age in range(100)] +
+                        [{'species': 'Carnivore', 'age': 3, 'weight': 25} for _ in range(7)]},
+                {'loc': (2, 3),
+                 'pop': [{'species': 'Herbivore', 'age': 70, 'weight': 15} for _ in range(5)]}]
+
+    def test_edges(self):
+        stats = StatisticsCollector({'age': {'max': 40, 'delta': 4}})
+        assert len(stats.edges['age']) == 11
+        assert stats.edges['age'][-1] == 40
+        assert len(stats.edges['fitness']) == 21
+
+    @pytest.mark.parametrize("backend", ["object", "array"])
+    def test_collect(self, population, backend):
+        island = CreateIsland("WWWW\nWLHW\nWWWW", population, backend=backend)
+        histograms = StatisticsCollector().collect(island)
+
+        assert histograms['Herbivore']['weight'].sum() == 105
+        assert histograms['Herbivore']['age'].sum() == 100
+        assert histograms['Carnivore']['age'].sum() == 7
+        assert histograms['Carnivore']['age'][1] == 7
+
+    @pytest.mark.parametrize("backend", ["object", "array"])
+    def test_matches_lists(self, population, backend):
+        island = CreateIsland("WWWW\nWLHW\nWWWW", population, backend=backend)
+        stats = StatisticsCollector()
+        histograms = stats.collect(island)
+
+        for prop, values in (('age', island.age_list()), ('weight', island.weight_list()),
+                             ('fitness', island.fitness_list())):
+            for species, species_values in zip(stats.species, values):
+                expected, _ = np.histogram(species_values, bins=stats.edges[prop])
+                assert np.array_equal(histograms[species][prop], expected)
+
+    def test_small_buffer(self, population):
+        island = CreateIsland("WWWW\nWLHW\nWWWW", population)
+        expected = StatisticsCollector().collect(island)
+        histograms = StatisticsCollector(buffer_size=8).collect(island)
+
+        for species in expected:
+            for prop in expected[species]:
+                assert np.array_equal(histograms[species][prop], expected[species][prop])
+
+    def test_binned_once_per_species(self, population, mocker):
+        island = CreateIsland("WWWW\nWLHW\nWWWW", population)
+        stats = StatisticsCollector()
+        add_values = mocker.spy(stats, '_add_values')
+        stats.collect(island)
+        assert add_values.call_count == 2
+
+    def test_collect_twice(self, population):
+        island = CreateIsland("WWWW\nWLHW\nWWWW", population)
+        stats = StatisticsCollector()
+        first = stats.collect(island)
+        second = stats.collect(island)
+        assert np.array_equal(first['Herbivore']['age'], second['Herbivore']['age'])
+
+    @pytest.mark.parametrize("backend", ["object", "array"])
+    def test_summary(self, population, backend):
+        island = CreateIsland("WWWW\nWLHW\nWWWW", population, backend=backend)
+        stats = StatisticsCollector(buffer_size=16)
+        stats.collect(island)
+        summary = stats.summary()
+
+        for prop, values in (('age', island.age_list()), ('weight', island.weight_list()),
+                             ('fitness', island.fitness_list())):
+            for species, species_values in zip(stats.species, values):
+                mean, std = summary[species][prop]
+                assert mean == pytest.approx(np.mean(species_values))
+                assert std == pytest.approx(np.std(species_values))
+
+    def test_summary_without_animals(self):
+        stats = StatisticsCollector()
+        stats.collect(CreateIsland("WWW\nWLW\nWWW", []))
+        assert np.isnan(stats.summary()['Carnivore']['age'][0])
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the sweep.py file in the biosim folder."""
+
+from biosim.ensemble import run_replicate
+from biosim.sweep import (grid_design, latin_hypercube_design, point_params, run_sweep,
+                          main)
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class TestDesigns:
+
+    def test_grid(self):
+        design = grid_design({'Herbivore.zeta': [3, 4], 'Lowland.f_max': [500, 600, 700]})
+        assert len(design) == 6
+        assert {'Herbivore.zeta': 4, 'Lowland.f_max': 500} in design
+
+    def test_latin_hypercube(self):
+        design = latin_hypercube_design({'Carnivore.F': (10, 60), 'Herbivore.xi': (1, 2)},
+                                        10, seed=1)
+        assert len(design) == 10
+        strata = sorted(int((point['Carnivore.F'] - 10) / 5) for point in design)
+        assert strata == list(range(10))
+        assert all(1 <= point['Herbivore.xi'] < 2 for point in design)
+
+    def test_point_params(self):
+        params = point_params({'Herbivore.zeta': 3, 'Carnivore.DeltaPhiMax': 5,
+                               'Highland.f_max': 100})
+        assert params == {'Herbivore': {'zeta': 3}, 'Carnivore': {'DeltaPhiMax': 5},
+                          'H': {'f_max': 100}}
+        with pytest.raises(ValueError):
+            point_params({'Dog.zeta': 3})
+
+
+class TestRunSweep:
+
+    def test_table(self, tmp_path):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(20)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(3)]}]
+
+        design = grid_design({'Herbivore.zeta': [3.5, 100], 'Lowland.f_max': [800]})
+        output = run_sweep(island_map, ini_pop, design, [1, 2], 4,
+                           str(tmp_path / 'sweep.csv'), processes=2)
+        table = pd.read_csv(output)
+
+        assert len(table) == 2 * 2 * 5
+        assert list(table.columns) == ['point', 'seed', 'Herbivore.zeta', 'Lowland.f_max',
+                                       'year', 'Herbivore', 'Carnivore']
+        rows = table[(table['point'] == 1) & (table['seed'] == 2)]
+        expected = run_replicate(island_map, ini_pop, 2, 4, point_params(design[1]))
+        assert np.array_equal(rows[['Herbivore', 'Carnivore']].to_numpy(), expected)
+
+    def test_parquet_falls_back_to_csv(self, tmp_path):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(20)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(3)]}]
+
+        output = run_sweep(island_map, ini_pop, [{'Herbivore.zeta': 3.5}], [1], 2,
+                           str(tmp_path / 'sweep.parquet'), processes=1)
+        assert output.endswith('.parquet') or output.endswith('.csv')
+        assert os.path.isfile(output)
+
+    def test_resume(self, tmp_path):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(20)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(3)]}]
+
+        design = grid_design({'Herbivore.zeta': [3, 4]})
+        output = str(tmp_path / 'sweep.csv')
+        run_sweep(island_map, ini_pop, design, [1, 2], 3, output, processes=2)
+
+        part_dir = output + '.parts'
+        parts = sorted(os.listdir(part_dir))
+        assert len(parts) == 4
+        mtimes = {part: os.stat(os.path.join(part_dir, part)).st_mtime_ns for part in parts}
+        os.remove(os.path.join(part_dir, parts[0]))
+
+        first = pd.read_csv(output)
+        run_sweep(island_map, ini_pop, design, [1, 2], 3, output, processes=2)
+        assert sorted(os.listdir(part_dir)) == parts
+        for part in parts[1:]:
+            assert os.stat(os.path.join(part_dir, part)).st_mtime_ns == mtimes[part]
+        assert pd.read_csv(output).equals(first)
+
+    def test_cli(self, tmp_path, capsys):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(20)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(3)]}]
+
+        config = {'island_map': island_map, 'ini_pop': ini_pop, 'num_years': 2,
+                  'seeds': [1], 'lhs': {'bounds': {'Lowland.f_max': [100, 900]},
+                                        'num_points': 3, 'seed': 1}}
+        config_path = tmp_path / 'config.json'
+        config_path.write_text(json.dumps(config))
+
+        main([str(config_path), '--output', str(tmp_path / 'out.csv'), '--processes', '2'])
+        assert len(pd.read_csv(tmp_path / 'out.csv')) == 3 * 3
+        assert 'written to' in capsys.readouterr().out
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Astrid Sedal, Mikal Breiteig'
+__email__ = 'astrised@nmbu.no, mibreite@nmbu.no'
+
+"""Tests the timeseries.py file in the biosim folder."""
+
+from biosim.island import CreateIsland
+from biosim.simulation import BioSim
+from biosim.timeseries import TimeSeriesLog, csv_columns, read_cell_counts
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class TestTimeSeriesLog:
+
+    @pytest.mark.parametrize("backend", ["object", "array"])
+    def test_write(self, tmp_path, backend):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(40)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        base = str(tmp_path / 'log')
+        island = CreateIsland(island_map, ini_pop, backend=backend)
+        with TimeSeriesLog(base) as log:
+            log.write(island)
+            island.simulate_one_year()
+            log.write(island)
+
+        table = pd.read_csv(base + '.csv')
+        assert list(table.columns) == csv_columns()
+        assert list(table['year']) == [0, 1]
+        assert table['Herbivore'][0] == 40
+        assert table['Herbivore_age_mean'][0] == 5
+        assert table['Herbivore_age_std'][0] == 0
+
+        counts = read_cell_counts(base + '_cells.bin')
+        assert counts.shape == (2, 2, 4, 5)
+        assert counts[0, 0, 1, 1] == 40
+        assert counts[0, 1, 1, 1] == 5
+        assert np.array_equal(counts[1, 0], island.animal_counts()[0])
+
+    def test_append(self, tmp_path):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(40)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        base = str(tmp_path / 'log')
+        island = CreateIsland(island_map, ini_pop)
+        for _ in range(3):
+            with TimeSeriesLog(base) as log:
+                log.write(island)
+        assert len(pd.read_csv(base + '.csv')) == 3
+        assert read_cell_counts(base + '_cells.bin').shape[0] == 3
+
+    def test_other_island(self, tmp_path):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(40)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        base = str(tmp_path / 'log')
+        with TimeSeriesLog(base) as log:
+            log.write(CreateIsland(island_map, ini_pop))
+        with pytest.raises(ValueError):
+            with TimeSeriesLog(base) as log:
+                log.write(CreateIsland("WWW\nWLW\nWWW", []))
+
+    def test_without_cell_counts(self, tmp_path):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(40)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        base = tmp_path / 'log'
+        with TimeSeriesLog(str(base), cell_counts=False) as log:
+            log.write(CreateIsland(island_map, ini_pop))
+        assert not (tmp_path / 'log_cells.bin').exists()
+
+    def test_simulate_logs_every_year(self, tmp_path):
+        island_map = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+        ini_pop = [{'loc': (2, 2),
+                    'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(40)] +
+                           [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+        base = str(tmp_path / 'log')
+        sim = BioSim(island_map, ini_pop, seed=2)
+        sim.simulate(4, vis_years=None, log_base=base)
+        sim.simulate(2, vis_years=None, log_base=base)
+
+        table = pd.read_csv(base + '.csv')
+        assert list(table['year']) == [1, 2, 3, 4, 5, 6]
+        assert table['Herbivore'].iloc[-1] == sim.island.num_animals_per_species['Herbivore']
+        assert read_cell_counts(base + '_cells.bin').shape == (6, 2, 4, 5)